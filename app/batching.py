@@ -0,0 +1,120 @@
+import asyncio
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional
+
+from prometheus_client import Histogram
+
+COALESCED_BATCH_SIZE = Histogram('predict_coalesced_batch_size', 'Requests merged into one model.predict call',
+                                 buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+QUEUE_WAIT = Histogram('predict_queue_wait_seconds', 'Time a /predict request waits before its batch runs',
+                       buckets=(.0005, .001, .002, .005, .01, .025, .05, .1, .25))
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-trip requests into one vectorized predict call.
+
+    The worker takes everything already queued, then waits at most
+    `max_wait_ms` for more, so a lone request is never held longer than that
+    and bursts fill batches up to `max_batch_size`. `predict_fn` gets a list
+    of payloads and must return one result per payload; it runs in `executor`
+    (the loop's default one if None) so the event loop keeps accepting
+    requests meanwhile.
+
+    `submit` takes optional `on_start` / `on_done` hooks, called when the
+    item's batch starts and once its fate is settled (scored, failed, or
+    dropped because its future was cancelled before the batch ran; such
+    items are never scored). InferenceExecutor.admit uses them to hold an
+    admission slot for exactly as long as the work exists.
+    """
+
+    def __init__(self, predict_fn: Callable[[List[Dict[str, Any]]], List[float]],
+                 max_batch_size: int = 64, max_wait_ms: float = 2.0,
+                 executor: Optional[Executor] = None):
+        self.predict_fn = predict_fn
+        self.executor = executor
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def submit(self, payload: Dict[str, Any], on_start: Optional[Callable[[], None]] = None,
+               on_done: Optional[Callable[[], None]] = None) -> "asyncio.Future":
+        if self._task is None:
+            self.start()
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((payload, fut, time.perf_counter(), on_start, on_done))
+        return fut
+
+    @staticmethod
+    def _settle(item):
+        if item[4] is not None:
+            item[4]()
+
+    def _live(self, batch):
+        # Drop items whose request already gave up (deadline, disconnect)
+        live = []
+        for item in batch:
+            if item[1].done():
+                self._settle(item)
+            else:
+                live.append(item)
+        return live
+
+    async def _collect(self):
+        batch = self._live([await self._queue.get()])
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch += self._live([self._queue.get_nowait()])
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch += self._live([await asyncio.wait_for(self._queue.get(), remaining)])
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = self._live(await self._collect())
+            if not batch:
+                continue
+            now = time.perf_counter()
+            for _, _, enqueued, on_start, _ in batch:
+                QUEUE_WAIT.observe(now - enqueued)
+                if on_start is not None:
+                    on_start()
+            COALESCED_BATCH_SIZE.observe(len(batch))
+            try:
+                try:
+                    results = await loop.run_in_executor(self.executor, self.predict_fn,
+                                                         [item[0] for item in batch])
+                except Exception as e:
+                    for item in batch:
+                        if not item[1].done():
+                            item[1].set_exception(e)
+                    continue
+                for item, y in zip(batch, results):
+                    if not item[1].done():
+                        item[1].set_result(y)
+            finally:
+                for item in batch:
+                    self._settle(item)
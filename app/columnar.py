@@ -0,0 +1,62 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+MEDIA_TYPES = {ARROW_STREAM: "arrow", MSGPACK: "msgpack", "application/x-msgpack": "msgpack"}
+
+
+class UnsupportedMediaType(Exception):
+    """The codec for a negotiated format is not installed (answer 415)."""
+
+
+def negotiate(content_type: Optional[str]) -> Optional[str]:
+    """'arrow' or 'msgpack' for columnar request bodies, None for JSON."""
+    if not content_type:
+        return None
+    return MEDIA_TYPES.get(content_type.split(";")[0].strip().lower())
+
+
+def decode_columns(fmt: str, body: bytes) -> Dict[str, np.ndarray]:
+    """Column name -> array from an Arrow IPC stream or a msgpack map.
+
+    Arrow numeric columns are handed over without copying; timestamp columns
+    keep their timezone. In msgpack, each value is either a list or a binary
+    little-endian buffer: float64, except int64 ns since the epoch for
+    `pickup_datetime`.
+    """
+    if fmt == "arrow":
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise UnsupportedMediaType("pyarrow is not installed")
+        table = pa.ipc.open_stream(body).read_all()
+        return {
+            name: col.to_pandas() if pa.types.is_timestamp(col.type) else col.to_numpy()
+            for name, col in zip(table.column_names, table.columns)
+        }
+    try:
+        import msgpack
+    except ImportError:
+        raise UnsupportedMediaType("msgpack is not installed")
+    out = {}
+    for name, value in msgpack.unpackb(body, raw=False).items():
+        if isinstance(value, bytes):
+            out[name] = np.frombuffer(value, dtype="<i8" if name == "pickup_datetime" else "<f8")
+        else:
+            out[name] = np.asarray(value)
+    return out
+
+
+def encode_fares(fmt: str, fares: np.ndarray) -> bytes:
+    fares = np.ascontiguousarray(fares, dtype="<f8")
+    if fmt == "arrow":
+        import pyarrow as pa
+        table = pa.table({"fare": fares})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    import msgpack
+    return msgpack.packb({"fare": fares.tobytes()})
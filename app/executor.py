@@ -0,0 +1,159 @@
+import asyncio
+import collections
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable
+
+from prometheus_client import Counter, Gauge
+
+INFERENCE_QUEUE_DEPTH = Gauge('inference_queue_depth', 'Inference jobs admitted but not yet running',
+                              multiprocess_mode='livesum')
+INFERENCE_IN_FLIGHT = Gauge('inference_in_flight', 'Inference jobs admitted and not yet finished',
+                            multiprocess_mode='livesum')
+INFERENCE_REJECTED = Counter('inference_rejected_total', 'Inference requests shed', ['reason'])
+
+
+class Overloaded(Exception):
+    """No capacity left; the caller should answer 429 straight away."""
+
+
+class DeadlineExceeded(Exception):
+    """The request waited past its deadline; the caller should answer 503."""
+
+
+class InferenceExecutor:
+    """Dedicated thread pool for model calls with admission control.
+
+    At most `max_workers + max_queue` jobs are admitted at once; the next one
+    raises Overloaded without queueing. A job still waiting when its
+    `deadline_ms` runs out is dropped with DeadlineExceeded instead of
+    running late. `run(..., wait=True)` is for bulk work that should be
+    throttled rather than shed (/predict_stream): it waits for a free slot
+    and has no deadline. `admit` applies the same admission and deadline to work
+    scheduled elsewhere (the /predict micro-batcher), which should run on
+    `pool` so all model calls share one bounded set of threads.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 64, deadline_ms: float = 1000.0):
+        self.max_workers = max(1, int(max_workers))
+        self.capacity = self.max_workers + max(0, int(max_queue))
+        self.deadline = float(deadline_ms) / 1000.0 if deadline_ms else None
+        self.pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="inference")
+        self._admitted = 0
+        self._queued = 0
+        self._waiters = collections.deque()  # (loop, future) of run(wait=True) calls waiting for a slot
+        self._lock = threading.Lock()
+
+    def _enter(self):
+        with self._lock:
+            if self._admitted >= self.capacity:
+                INFERENCE_REJECTED.labels(reason="queue_full").inc()
+                raise Overloaded(f"{self._admitted} inference jobs in flight (limit {self.capacity})")
+            self._admitted += 1
+            INFERENCE_IN_FLIGHT.set(self._admitted)
+
+    async def _enter_waiting(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._admitted < self.capacity:
+                    self._admitted += 1
+                    INFERENCE_IN_FLIGHT.set(self._admitted)
+                    return
+                waiter = (loop, loop.create_future())
+                self._waiters.append(waiter)
+            try:
+                await waiter[1]
+            except asyncio.CancelledError:
+                with self._lock:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+                    else:  # woken but gone: pass the freed slot on
+                        self._wake_one()
+                raise
+
+    def _wake_one(self):
+        # Called with the lock held; _exit may run on a pool thread
+        if self._waiters:
+            loop, future = self._waiters.popleft()
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+    def _exit(self):
+        with self._lock:
+            self._admitted -= 1
+            INFERENCE_IN_FLIGHT.set(self._admitted)
+            self._wake_one()
+
+    def _set_queued(self, delta: int):
+        with self._lock:
+            self._queued += delta
+            INFERENCE_QUEUE_DEPTH.set(self._queued)
+
+    async def run(self, fn: Callable[..., Any], *args, wait: bool = False) -> Any:
+        if wait:
+            await self._enter_waiting()
+        else:
+            self._enter()
+        enqueued = time.perf_counter()
+        self._set_queued(1)
+        started = False
+
+        def job():
+            nonlocal started
+            started = True
+            self._set_queued(-1)
+            if not wait and self.deadline is not None and time.perf_counter() - enqueued > self.deadline:
+                INFERENCE_REJECTED.labels(reason="deadline").inc()
+                raise DeadlineExceeded(f"Queued longer than {self.deadline * 1000:.0f} ms")
+            return fn(*args)
+
+        # The slot is held until the job itself is done, not until the awaiting
+        # request is: a cancelled request whose job is already running still
+        # occupies a worker thread.
+        def done(_):
+            if not started:  # cancelled while still queued
+                self._set_queued(-1)
+            self._exit()
+
+        try:
+            future = self.pool.submit(job)
+        except BaseException:
+            self._set_queued(-1)
+            self._exit()
+            raise
+        future.add_done_callback(done)
+        return await asyncio.wrap_future(future)
+
+    async def admit(self, submit: Callable[..., "asyncio.Future"], *args) -> Any:
+        """Admit work scheduled elsewhere: `submit(*args, on_start=..., on_done=...)`
+        (MicroBatcher.submit) is only called once a slot is free and must return a
+        future. The slot is held until `on_done` says the work is settled, so
+        batched requests count against capacity and queue depth like run()."""
+        self._enter()
+        self._set_queued(1)
+        started = False
+
+        def on_start():
+            nonlocal started
+            started = True
+            self._set_queued(-1)
+
+        def on_done():
+            if not started:
+                self._set_queued(-1)
+            self._exit()
+
+        try:
+            fut = submit(*args, on_start=on_start, on_done=on_done)
+        except BaseException:
+            on_done()
+            raise
+        if self.deadline is None:
+            return await fut
+        try:
+            # On timeout the future is cancelled: the batcher drops it if its batch has not started
+            return await asyncio.wait_for(fut, self.deadline)
+        except asyncio.TimeoutError:
+            INFERENCE_REJECTED.labels(reason="deadline").inc()
+            raise DeadlineExceeded(f"No result within {self.deadline * 1000:.0f} ms")
@@ -1,32 +1,254 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Header, HTTPException
+from fastapi.responses import JSONResponse, Response
+from fastapi.exceptions import RequestValidationError
+import csv
+import hmac
+import io
+import json
+import logging
 import time
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
-from pydantic import BaseModel
-from typing import Optional
+import threading
+from dataclasses import asdict
+from datetime import datetime, timezone
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST, CollectorRegistry, multiprocess
+from pydantic import BaseModel, ValidationError
+from typing import Optional, List, Union
 import yaml
+import os
 from pathlib import Path
 
-from taxi_fare.predict import predict_single, load_model_from_path
+from taxi_fare.predict import (predict_single, predict_rows, predict_batch, predict_columns,
+                               load_model_from_path, uses_spatial_features, RawCoordinatesRequired)
+from taxi_fare.lookup import FareLookupTable
+from taxi_fare.cache import PredictionCache
+from taxi_fare.concurrency import plan_threads, apply_thread_limits, serving_processes
+from app.batching import MicroBatcher
+from app.executor import InferenceExecutor, Overloaded, DeadlineExceeded
+from app.reload import ModelWatcher, model_version
+from app.columnar import negotiate, decode_columns, encode_fares, UnsupportedMediaType
+from app.streaming import iter_lines, iter_rows, iter_chunks, DuplexStreamingResponse
+from app.warmup import warm_up, warmup_requests
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Taxi Fare Service")
 # Prometheus metrics
 PREDICTIONS_TOTAL = Counter('predictions_total', 'Total number of predictions served')
 PREDICTION_LATENCY = Histogram('prediction_latency_seconds', 'Latency of prediction endpoint')
+STAGE_LATENCY = Histogram('prediction_stage_seconds', 'Time per request stage (validation, features, predict, serialization)',
+                          ['endpoint', 'stage'],
+                          buckets=(.00005, .0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, 1.0))
+PREDICTION_BATCH_SIZE = Histogram('prediction_batch_size', 'Number of trips per /predict_batch call',
+                                  buckets=(1, 8, 32, 64, 128, 256, 512, 1024, 4096))
+CACHE_HITS = Counter('prediction_cache_hits_total', 'Predictions answered from the in-process cache')
+CACHE_MISSES = Counter('prediction_cache_misses_total', 'Cache lookups that had to run the model')
+CACHE_EVICTIONS = Counter('prediction_cache_evictions_total', 'Cache entries dropped', ['reason'])
+MODEL_RELOADS = Counter('model_reloads_total', 'Model (re)loads by outcome', ['result'])
+WARMUP_SECONDS = Gauge('model_warmup_seconds', 'Duration of the startup warm-up of this worker')
+STREAM_ROWS = Counter('stream_rows_total', 'Rows scored through /predict_stream', ['result'])
+STREAM_ROWS_PER_SECOND = Histogram('stream_rows_per_second', 'Throughput of each /predict_stream upload',
+                                   buckets=(100, 1e3, 5e3, 1e4, 5e4, 1e5, 5e5, 1e6))
 
 # Config
-cfg_path = Path("configs/app.yaml")
+cfg_path = Path(os.environ.get("TAXI_FARE_APP_CONFIG", "configs/app.yaml"))
 cfg = yaml.safe_load(cfg_path.read_text())
 MODEL_PATH = cfg.get("model_path", "artifacts/models/model.joblib")
+COMPILED_MODEL = bool(cfg.get("compiled_model", False))
+MMAP_MODEL = bool(cfg.get("mmap_model", False))
+SERVING_MODE = cfg.get("serving_mode", "model")
+LOOKUP_TABLE_PATH = cfg.get("lookup_table_path", "artifacts/models/fare_table.npz")
+BATCHING = cfg.get("batching", {}) or {}
+CACHE = cfg.get("cache", {}) or {}
+RELOAD = cfg.get("reload", {}) or {}
+INFERENCE = cfg.get("inference", {}) or {}
+STREAMING = cfg.get("streaming", {}) or {}
+WARMUP = cfg.get("warmup", {}) or {}
+THREADS = plan_threads("serving", processes=serving_processes())  # configs/concurrency.yaml
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+# Without a token the admin endpoints are closed; this opens them for local development only
+ADMIN_OPEN = os.environ.get("TAXI_FARE_ADMIN_OPEN") == "1"
+
+# All model calls run on this bounded pool; excess requests are shed (429/503)
+inference = InferenceExecutor(
+    max_workers=THREADS.inference_threads if INFERENCE.get("max_workers", "auto") == "auto"
+    else INFERENCE["max_workers"],
+    max_queue=INFERENCE.get("max_queue", 64),
+    deadline_ms=INFERENCE.get("deadline_ms", 1000),
+)
+
+# True while the startup warm-up runs. Uvicorn accepts no connections until
+# it is done, so every request seen meanwhile is synthetic and is left out of
+# the request metrics (predictions, latency, cache hits/misses).
+_warming = False
+
+def _live_traffic(record):
+    def recorder(*args):
+        if not _warming:
+            record(*args)
+    return recorder
+
+def _observe_stages(endpoint: str, timings: dict):
+    if _warming:
+        return
+    for stage, seconds in timings.items():
+        STAGE_LATENCY.labels(endpoint=endpoint, stage=stage).observe(seconds)
+
+def _predict_coalesced(payloads):
+    # Stage timings here are per coalesced batch, not per /predict request. A
+    # lone request takes the single-trip path; neither touches pandas.
+    timings = {}
+    if len(payloads) == 1:
+        ys = [predict_single(model, payloads[0], timings)]
+    else:
+        ys = predict_rows(model, payloads, timings)
+    _observe_stages("/predict", timings)
+    return ys
+
+# Coalesces concurrent /predict calls into one model.predict call
+batcher = MicroBatcher(
+    _predict_coalesced,
+    max_batch_size=BATCHING.get("max_batch_size", 64),
+    max_wait_ms=BATCHING.get("max_wait_ms", 2),
+    executor=inference.pool,
+) if BATCHING.get("enabled", False) else None
 
-# Load model at startup
+cache = PredictionCache(
+    max_size=CACHE.get("max_size", 10000),
+    ttl_seconds=CACHE.get("ttl_seconds", 300),
+    precision=CACHE.get("precision", 4),
+    on_hit=_live_traffic(CACHE_HITS.inc),
+    on_miss=_live_traffic(CACHE_MISSES.inc),
+    on_evict=lambda reason, n: CACHE_EVICTIONS.labels(reason=reason).inc(n),
+) if CACHE.get("enabled", False) else None
+
+# Active model; replaced wholesale by reload_model. Handlers read it once
+# per request, so in-flight requests finish on the model they started with.
 model = None
+MODEL_INFO = {"version": None, "path": None, "loaded_at": None, "load_seconds": None}
+_reload_lock = threading.Lock()
+ready = False  # set once a model is loaded and the startup warm-up has passed; reported by /ready
+
+WARMUP_PAYLOADS = [
+    {"pickup_lat": 59.33, "pickup_lon": 18.06, "dropoff_lat": 59.36, "dropoff_lon": 18.01,
+     "pickup_datetime": "2025-01-01T10:00:00Z"},
+    {"dist": 0.05, "hour": 18},
+]
+
+def _warmup_payloads(m) -> list:
+    # Zone/POI models reject featurized trips, so they are warmed with raw ones only
+    return WARMUP_PAYLOADS[:1] if uses_spatial_features(m) else WARMUP_PAYLOADS
+
+def _active_model_path() -> str:
+    return LOOKUP_TABLE_PATH if SERVING_MODE == "lookup" else MODEL_PATH
+
+@_live_traffic
+def _record_prediction(duration: float):
+    PREDICTIONS_TOTAL.inc()
+    PREDICTION_LATENCY.observe(duration)
+
+def _read_model(path: str):
+    if SERVING_MODE == "lookup":
+        return FareLookupTable.load(path)
+    return load_model_from_path(path, compiled=COMPILED_MODEL, mmap=MMAP_MODEL)
+
+def reload_model(force: bool = False) -> dict:
+    """Load the configured artifact, warm it up and swap it in atomically.
+
+    Runs off the request path (startup, watcher thread or /admin/reload). A
+    no-op when the artifact's content hash matches the active model unless
+    `force` is set. On failure the current model stays active. A successful
+    load marks the worker ready, so one that booted without a model starts
+    passing /ready once /admin/reload or the watcher has loaded one.
+    """
+    global model, ready
+    with _reload_lock:
+        path = _active_model_path()
+        try:
+            version = model_version(path)
+            if not force and model is not None and version == MODEL_INFO["version"]:
+                return dict(MODEL_INFO)
+            start = time.time()
+            new_model = _read_model(path)
+            if hasattr(new_model, "n_jobs"):
+                new_model.n_jobs = THREADS.n_jobs
+            payloads = _warmup_payloads(new_model)
+            for p in payloads:
+                predict_single(new_model, p)
+            predict_rows(new_model, payloads)
+            load_seconds = time.time() - start
+        except Exception:
+            MODEL_RELOADS.labels(result="failure").inc()
+            raise
+        model = new_model
+        ready = True
+        MODEL_INFO.update(version=version, path=path, load_seconds=round(load_seconds, 4),
+                          loaded_at=datetime.now(timezone.utc).isoformat())
+        MODEL_RELOADS.labels(result="success").inc()
+        return dict(MODEL_INFO)
+
+watcher = ModelWatcher(_active_model_path, reload_model,
+                       poll_seconds=RELOAD.get("poll_seconds", 10)) if RELOAD.get("watch", False) else None
+
 @app.on_event("startup")
 def _load_model():
-    global model
-    if Path(MODEL_PATH).exists():
-        model = load_model_from_path(MODEL_PATH)
-    else:
-        model = None
+    apply_thread_limits(THREADS)
+    if model is not None:
+        return  # already loaded in the gunicorn master (preload_app), shared copy-on-write
+    if Path(_active_model_path()).exists():
+        reload_model()
+
+if os.environ.get("TAXI_FARE_PRELOAD_MODEL") == "1":
+    _load_model()
+
+@app.on_event("startup")
+async def _start_background_tasks():
+    if batcher is not None:
+        batcher.start()
+    if watcher is not None:
+        watcher.start()
+
+@app.on_event("startup")
+async def _warm_up():
+    # Runs after the model and batcher are up. Uvicorn only starts accepting
+    # connections once startup hooks finish, so no real request pays for
+    # first-call setup (pydantic, sklearn/joblib, thread pools, cold caches).
+    global ready, _warming
+    if model is None:
+        return
+    if WARMUP.get("enabled", True):
+        _warming = True
+        try:
+            seconds, failures = await warm_up(app, warmup_requests(WARMUP.get("rounds", 8),
+                                                                    raw_only=uses_spatial_features(model)))
+            if cache is not None:
+                cache.clear()  # drop the synthetic trips
+        finally:
+            _warming = False
+        WARMUP_SECONDS.set(seconds)
+        if failures:
+            logger.error("Warm-up failed, worker stays not ready: %s", failures)
+            ready = False
+            return
+    ready = True
+
+@app.on_event("shutdown")
+async def _stop_background_tasks():
+    if batcher is not None:
+        await batcher.stop()
+    if watcher is not None:
+        await watcher.stop()
+
+@app.exception_handler(Overloaded)
+def _overloaded(request: Request, exc: Overloaded):
+    return JSONResponse(status_code=429, content={"error": str(exc)}, headers={"Retry-After": "1"})
+
+@app.exception_handler(RawCoordinatesRequired)
+def _raw_coordinates_required(request: Request, exc: RawCoordinatesRequired):
+    return JSONResponse(status_code=422, content={"detail": str(exc)})
+
+@app.exception_handler(DeadlineExceeded)
+def _deadline_exceeded(request: Request, exc: DeadlineExceeded):
+    return JSONResponse(status_code=503, content={"error": str(exc)}, headers={"Retry-After": "1"})
 
 class RawRequest(BaseModel):
     pickup_lat: float
@@ -39,33 +261,227 @@ class FeatureRequest(BaseModel):
     dist: float
     hour: int
 
+class BatchRequest(BaseModel):
+    trips: List[Union[FeatureRequest, RawRequest]]
+
+async def _parse_json(request: Request, model_cls, timings: dict):
+    # Parsed by hand (instead of a typed parameter) so validation gets its own stage timing
+    body = await request.body()
+    start = time.perf_counter()
+    try:
+        obj = model_cls(**json.loads(body))
+    except ValidationError as e:
+        raise RequestValidationError([dict(err, loc=("body", *err["loc"])) for err in e.errors()])
+    except (ValueError, TypeError) as e:
+        raise RequestValidationError([{"type": "json_invalid", "loc": ("body",), "msg": str(e)}])
+    timings["validation"] = time.perf_counter() - start
+    return obj
+
+def _respond(endpoint: str, content: dict, timings: dict) -> JSONResponse:
+    start = time.perf_counter()
+    response = JSONResponse(content)
+    timings["serialization"] = time.perf_counter() - start
+    _observe_stages(endpoint, timings)
+    return response
+
+def _json_body(model_cls) -> dict:
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": model_cls.schema()}}}}
+
 @app.get("/health")
 def health():
-    return {"status": "ok", "model_loaded": model is not None}
+    return {"status": "ok", "model_loaded": model is not None, "serving_mode": SERVING_MODE,
+            "threads": asdict(THREADS),
+            "model_version": MODEL_INFO["version"], "model_loaded_at": MODEL_INFO["loaded_at"],
+            "model_load_seconds": MODEL_INFO["load_seconds"]}
 
-@app.post("/predict")
-def predict(req: RawRequest, request: Request):
-    if model is None:
+@app.get("/ready")
+def readiness():
+    # Readiness probe: unlike /health (liveness) it stays 503 until the model is warmed up
+    if ready and model is not None:
+        return {"ready": True, "model_version": MODEL_INFO["version"]}
+    return JSONResponse(status_code=503, content={"ready": False, "model_loaded": model is not None})
+
+@app.post("/predict", openapi_extra=_json_body(RawRequest))
+async def predict(request: Request):
+    m = model
+    if m is None:
         return {"error": "Model not loaded. Train first."}
+    timings = {}
+    req = await _parse_json(request, RawRequest, timings)
     start = time.time()
-    y = predict_single(model, req.dict())
-    duration = time.time() - start
-    PREDICTIONS_TOTAL.inc()
-    PREDICTION_LATENCY.observe(duration)
-    return {"fare": y}
+    payload = req.dict()
+    y = cache.get(m, payload) if cache is not None else None
+    if y is None:
+        if batcher is not None:
+            y = await inference.admit(batcher.submit, payload)
+        else:
+            y = await inference.run(predict_single, m, payload, timings)
+        # The batcher scores with whichever model is active when the batch runs
+        if cache is not None and m is model:
+            cache.put(m, payload, y)
+    _record_prediction(time.time() - start)
+    return _respond("/predict", {"fare": y}, timings)
 
-@app.post("/predict_features")
-def predict_features(req: FeatureRequest, request: Request):
-    if model is None:
+@app.post("/predict_features", openapi_extra=_json_body(FeatureRequest))
+async def predict_features(request: Request):
+    m = model
+    if m is None:
         return {"error": "Model not loaded. Train first."}
+    timings = {}
+    req = await _parse_json(request, FeatureRequest, timings)
     start = time.time()
-    y = predict_single(model, req.dict())
+    payload = req.dict()
+    y = cache.get(m, payload) if cache is not None else None
+    if y is None:
+        y = await inference.run(predict_single, m, payload, timings)
+        if cache is not None:
+            cache.put(m, payload, y)
+    _record_prediction(time.time() - start)
+    return _respond("/predict_features", {"fare": y}, timings)
+
+@app.post("/predict_batch")
+async def predict_batch_endpoint(request: Request):
+    """Score many trips in one call.
+
+    JSON bodies follow BatchRequest. Arrow IPC stream and msgpack bodies
+    (see app/columnar.py) are decoded straight into column arrays and
+    answered in the same format with a single `fare` column.
+    """
+    m = model
+    if m is None:
+        return {"error": "Model not loaded. Train first."}
+    fmt = negotiate(request.headers.get("content-type"))
+    timings = {}
+    if fmt is None:
+        req = await _parse_json(request, BatchRequest, timings)
+        start = time.time()
+        ys = await inference.run(predict_batch, m, [t.dict() for t in req.trips], timings)
+    else:
+        body = await request.body()
+        start = time.time()
+
+        def decode_and_predict():
+            t = time.perf_counter()
+            columns = decode_columns(fmt, body)
+            timings["validation"] = time.perf_counter() - t
+            return predict_columns(m, columns, timings)
+
+        try:
+            ys = await inference.run(decode_and_predict)
+        except UnsupportedMediaType as e:
+            raise HTTPException(status_code=415, detail=str(e))
+        except (KeyError, ValueError) as e:
+            raise HTTPException(status_code=422, detail=f"Invalid {fmt} payload: {e}")
     duration = time.time() - start
-    PREDICTIONS_TOTAL.inc()
+    PREDICTIONS_TOTAL.inc(len(ys))
     PREDICTION_LATENCY.observe(duration)
-    return {"fare": y}
+    PREDICTION_BATCH_SIZE.observe(len(ys))
+    if fmt is None:
+        return _respond("/predict_batch", {"fares": ys}, timings)
+    t = time.perf_counter()
+    response = Response(encode_fares(fmt, ys), media_type=request.headers["content-type"].split(";")[0])
+    timings["serialization"] = time.perf_counter() - t
+    _observe_stages("/predict_batch", timings)
+    return response
+
+def _validate_trip(record: dict) -> dict:
+    if "dist" in record and "hour" in record:
+        return FeatureRequest(**record).dict()
+    return RawRequest(**record).dict()
+
+def _score_rows(m, payloads: List[dict]) -> List[tuple]:
+    # Featurized row by row so a bad row only fails itself; one model.predict for the rest
+    errors = {}
+    ys = predict_rows(m, payloads, errors=errors)
+    return [(None, f"{type(errors[i]).__name__}: {errors[i]}") if i in errors else (y, None)
+            for i, y in enumerate(ys)]
+
+@app.post("/predict_stream")
+async def predict_stream(request: Request):
+    """Score an NDJSON or CSV upload of any size chunk by chunk, streaming results back.
+
+    Only one chunk of rows is held in memory at a time. Each input row gets
+    one output row with either its fare or an error; bad rows never stop the
+    stream. NDJSON responses end with a summary object including rows/sec.
+    """
+    m = model
+    if m is None:
+        return {"error": "Model not loaded. Train first."}
+    fmt = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    chunk_rows = int(STREAMING.get("chunk_rows", 1000))
+
+    def fmt_rows(rows):
+        if fmt == "csv":
+            buf = io.StringIO()
+            csv.writer(buf, lineterminator="\n").writerows(
+                (row_no, "" if fare is None else fare, "" if error is None else error) for row_no, fare, error in rows)
+            return buf.getvalue()
+        return "".join(json.dumps({"row": row_no, "fare": fare} if error is None else {"row": row_no, "error": error})
+                       + "\n" for row_no, fare, error in rows)
+
+    async def body():
+        start = time.time()
+        n_ok = n_err = 0
+        if fmt == "csv":
+            yield fmt_rows([("row", "fare", "error")])
+        rows = iter_rows(iter_lines(request.stream()), fmt)
+        async for chunk in iter_chunks(rows, chunk_rows):
+            out = {}
+            valid_rows, payloads = [], []
+            for row_no, record, error in chunk:
+                if error is None:
+                    try:
+                        payloads.append(_validate_trip(record))
+                        valid_rows.append(row_no)
+                        continue
+                    except ValidationError as e:
+                        error = "; ".join(f"{'.'.join(map(str, d['loc']))}: {d['msg']}" for d in e.errors())
+                out[row_no] = (None, error)
+            if payloads:
+                # Backpressure instead of shedding: wait for a free inference slot. Until then
+                # the upload is not read further, which slows the client down.
+                out.update(zip(valid_rows, await inference.run(_score_rows, m, payloads, wait=True)))
+            rows_out = []
+            for row_no, _, _ in chunk:
+                fare, error = out[row_no]
+                n_ok += error is None
+                n_err += error is not None
+                rows_out.append((row_no, fare, error))
+            yield fmt_rows(rows_out)
+        seconds = time.time() - start
+        rate = (n_ok + n_err) / seconds if seconds > 0 else 0.0
+        STREAM_ROWS.labels(result="ok").inc(n_ok)
+        STREAM_ROWS.labels(result="error").inc(n_err)
+        STREAM_ROWS_PER_SECOND.observe(rate)
+        PREDICTIONS_TOTAL.inc(n_ok)
+        if fmt == "ndjson":
+            yield json.dumps({"summary": {"rows": n_ok + n_err, "errors": n_err,
+                                          "seconds": round(seconds, 4), "rows_per_sec": round(rate, 1)}}) + "\n"
+
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return DuplexStreamingResponse(body(), media_type=media_type)
+
+@app.post("/admin/reload")
+def admin_reload(force: bool = False, x_admin_token: Optional[str] = Header(default=None)):
+    if ADMIN_TOKEN:
+        if not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+            raise HTTPException(status_code=403, detail="Invalid admin token")
+    elif not ADMIN_OPEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled: set ADMIN_TOKEN")
+    if not Path(_active_model_path()).exists():
+        raise HTTPException(status_code=404, detail=f"No model artifact at {_active_model_path()}")
+    try:
+        return reload_model(force=force)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reload failed, previous model kept: {e}")
 
 
 @app.get('/metrics')
 def metrics():
-    return FastAPI.responses.Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    # Under gunicorn every worker writes to PROMETHEUS_MULTIPROC_DIR (see
+    # docker/gunicorn_conf.py); aggregate those instead of this worker's registry.
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
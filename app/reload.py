@@ -0,0 +1,63 @@
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import Callable, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+def model_version(path: str) -> str:
+    """Short content hash of a model artifact, stable across copies and restarts."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:12]
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return Path(path).stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+class ModelWatcher:
+    """Polls a model artifact and calls `reload_fn` in the threadpool when it changes.
+
+    `path_fn` is re-evaluated every poll. A failed reload (e.g. a half-written
+    file) is logged and retried on the next change or poll.
+    """
+
+    def __init__(self, path_fn: Callable[[], str], reload_fn: Callable[[], object],
+                 poll_seconds: float = 10.0):
+        self.path_fn = path_fn
+        self.reload_fn = reload_fn
+        self.poll_seconds = float(poll_seconds)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        last = _mtime(self.path_fn())
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            current = _mtime(self.path_fn())
+            if current is None or current == last:
+                continue
+            try:
+                await run_in_threadpool(self.reload_fn)
+                last = current
+            except Exception:
+                logger.exception("Model reload from %s failed; keeping the current model", self.path_fn())
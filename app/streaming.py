@@ -0,0 +1,75 @@
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from starlette.responses import StreamingResponse
+
+# (row number, parsed record or None, error message or None)
+Row = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into text lines, holding at most one partial line."""
+    buf = b""
+    async for chunk in chunks:
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8", errors="replace").rstrip("\r")
+    if buf:
+        yield buf.decode("utf-8", errors="replace").rstrip("\r")
+
+
+async def iter_rows(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[Row]:
+    """Parse NDJSON objects or CSV records (first line is the header), one per line.
+
+    Blank lines are skipped without consuming a row number. A line that fails
+    to parse is yielded with an error instead of stopping the stream.
+    """
+    header = None
+    row_no = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        if fmt == "csv" and header is None:
+            header = next(csv.reader([line]))
+            continue
+        try:
+            if fmt == "csv":
+                values = next(csv.reader([line]))
+                if len(values) != len(header):
+                    raise ValueError(f"expected {len(header)} fields, got {len(values)}")
+                record = dict(zip(header, values))
+            else:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("expected a JSON object")
+            yield row_no, record, None
+        except ValueError as e:
+            yield row_no, None, str(e)
+        row_no += 1
+
+
+async def iter_chunks(rows: AsyncIterator[Row], size: int) -> AsyncIterator[List[Row]]:
+    chunk: List[Row] = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse whose body iterator keeps reading the request body.
+
+    The stock class (for ASGI spec < 2.4) also reads `receive` to watch for
+    disconnects, which would swallow the upload; here only the body reads
+    it, and request.stream() raises ClientDisconnect on its own.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,64 @@
+import json
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+
+RAW_TRIP = {"pickup_lat": 59.33, "pickup_lon": 18.06, "dropoff_lat": 59.36, "dropoff_lon": 18.01,
+            "pickup_datetime": "2025-01-01T10:00:00Z"}
+FEATURE_TRIP = {"dist": 0.05, "hour": 18}
+
+
+def warmup_requests(rounds: int, raw_only: bool = False) -> List[Tuple[str, Dict[str, Any]]]:
+    """Synthetic /predict and /predict_features bodies, each one distinct.
+
+    Coordinates and dist are shifted per round by more than the prediction
+    cache's precision so every request reaches the model instead of the cache.
+    With `raw_only` (models with zone/POI features) /predict_features is left out.
+    """
+    out = []
+    for i in range(max(1, int(rounds))):
+        shift = i * 1e-3
+        out.append(("/predict", dict(RAW_TRIP, dropoff_lat=RAW_TRIP["dropoff_lat"] + shift,
+                                     pickup_datetime=f"2025-01-01T{i % 24:02d}:00:00Z")))
+        if not raw_only:
+            out.append(("/predict_features", dict(FEATURE_TRIP, dist=FEATURE_TRIP["dist"] + shift, hour=i % 24)))
+    return out
+
+
+async def asgi_post(app, path: str, payload: Dict[str, Any]) -> int:
+    """POST a JSON body straight into the ASGI app (no socket) and return the status code."""
+    body = json.dumps(payload).encode()
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+             "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+             "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 0)}
+    sent = False
+    status = 500
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def warm_up(app, requests: Iterable[Tuple[str, Dict[str, Any]]]) -> Tuple[float, List[Tuple[str, int]]]:
+    """Run `requests` through the full handler stack in order.
+
+    Returns the elapsed seconds and the (path, status) of every non-200 answer.
+    """
+    start = time.perf_counter()
+    failures = []
+    for path, payload in requests:
+        status = await asgi_post(app, path, payload)
+        if status != 200:
+            failures.append((path, status))
+    return time.perf_counter() - start, failures
@@ -0,0 +1,74 @@
+"""Throughput of /predict_batch for JSON vs Arrow IPC vs msgpack request bodies.
+
+Runs the app in-process (fastapi TestClient) with the configured model and
+times client-side encoding, the request (server decode, features, predict,
+encode) and client-side decoding of the response.
+
+    python -m benchmarks.bench_encodings --rows 1000 10000
+    python -m benchmarks.bench_encodings --raw   # raw trips instead of dist/hour
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import msgpack
+import pyarrow as pa
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+def make_columns(n: int, raw: bool):
+    rng = np.random.default_rng(0)
+    if not raw:
+        return {"dist": rng.uniform(0, 0.3, n), "hour": rng.integers(0, 24, n)}
+    ts = np.datetime64("2025-01-01T00:00:00") + rng.integers(0, 86400 * 30, n).astype("timedelta64[s]")
+    return {
+        "pickup_lat": 59.3 + rng.uniform(0, 0.1, n), "pickup_lon": 18.0 + rng.uniform(0, 0.1, n),
+        "dropoff_lat": 59.3 + rng.uniform(0, 0.1, n), "dropoff_lon": 18.0 + rng.uniform(0, 0.1, n),
+        "pickup_datetime": np.datetime_as_string(ts) + "Z",
+    }
+
+def call_json(c, cols):
+    n = len(next(iter(cols.values())))
+    trips = [{k: (v[i].item() if hasattr(v[i], "item") else v[i]) for k, v in cols.items()} for i in range(n)]
+    r = c.post("/predict_batch", content=json.dumps({"trips": trips}),
+               headers={"content-type": "application/json"})
+    return r.json()["fares"]
+
+def call_arrow(c, cols):
+    table = pa.table(cols)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as w:
+        w.write_table(table)
+    r = c.post("/predict_batch", content=sink.getvalue().to_pybytes(),
+               headers={"content-type": "application/vnd.apache.arrow.stream"})
+    return pa.ipc.open_stream(r.content).read_all().column("fare").to_numpy()
+
+def call_msgpack(c, cols):
+    body = {k: (v.astype("<f8").tobytes() if v.dtype.kind in "fi" else v.tolist()) for k, v in cols.items()}
+    r = c.post("/predict_batch", content=msgpack.packb(body), headers={"content-type": "application/msgpack"})
+    return np.frombuffer(msgpack.unpackb(r.content)["fare"], dtype="<f8")
+
+def main(sizes, raw, repeat):
+    with TestClient(app) as c:
+        for n in sizes:
+            cols = make_columns(n, raw)
+            ref = np.asarray(call_json(c, cols))
+            for name, fn in [("json", call_json), ("arrow", call_arrow), ("msgpack", call_msgpack)]:
+                assert np.allclose(fn(c, cols), ref)
+                best = min(_timed(fn, c, cols) for _ in range(repeat))
+                print(f"rows={n:>7} {name:>8}: {best * 1e3:9.2f} ms  {n / best:12.0f} rows/s")
+
+def _timed(fn, c, cols):
+    t = time.perf_counter()
+    fn(c, cols)
+    return time.perf_counter() - t
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    ap.add_argument("--raw", action="store_true")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    main(args.rows, args.raw, args.repeat)
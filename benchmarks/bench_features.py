@@ -0,0 +1,77 @@
+"""Peak memory and time of build_features versus row count (Linux).
+
+Each measurement runs in a fresh forked process: it builds a synthetic
+training frame (the four coordinates, an ISO timestamp string, the target
+and a few unrelated columns), resets the kernel's peak-RSS counter
+(VmHWM), runs the feature builder and reports how far the peak rose above
+the RSS before the call, plus the wall time. "legacy" is the
+previous rename + copy + pd.to_datetime implementation, kept here for
+comparison.
+
+    python benchmarks/bench_features.py --rows 100000 1000000 3000000
+"""
+import argparse
+import multiprocessing as mp
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from taxi_fare.features import build_features
+
+MAPPING = {k: k for k in ("pickup_lat", "pickup_lon", "dropoff_lat", "dropoff_lon")}
+
+def legacy_build_features(df, mapping, datetime_col):
+    df = df.rename(columns=mapping).copy()
+    df["dist"] = np.sqrt((df["dropoff_lat"]-df["pickup_lat"])**2 +
+                         (df["dropoff_lon"]-df["pickup_lon"])**2)
+    df["hour"] = pd.to_datetime(df[datetime_col]).dt.hour
+    return df[["dist","hour"]]
+
+def make_frame(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    ts = np.datetime64("2025-01-01T00:00:00") + rng.integers(0, 86400 * 365, n).astype("timedelta64[s]")
+    return pd.DataFrame({
+        "pickup_lat": 59.3 + rng.uniform(0, 0.1, n), "pickup_lon": 18.0 + rng.uniform(0, 0.1, n),
+        "dropoff_lat": 59.3 + rng.uniform(0, 0.1, n), "dropoff_lon": 18.0 + rng.uniform(0, 0.1, n),
+        "pickup_datetime": pd.Series(np.datetime_as_string(ts)) + "Z",
+        "fare_amount": rng.uniform(50, 500, n),
+        "passenger_count": rng.integers(1, 5, n),
+        "vendor": rng.choice(["a", "b", "c"], n),
+    })
+
+def _status_kb(field: str) -> int:
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith(field + ":"):
+            return int(line.split()[1])
+    raise KeyError(field)
+
+def _measure(fn, n, out):
+    df = make_frame(n)
+    Path("/proc/self/clear_refs").write_text("5")  # reset VmHWM to the current RSS
+    base = _status_kb("VmRSS")
+    start = time.perf_counter()
+    X = fn(df, MAPPING, "pickup_datetime")
+    seconds = time.perf_counter() - start
+    peak = _status_kb("VmHWM")
+    out.put((seconds, (peak - base) / 1024, df.memory_usage(deep=True).sum() / 1e6, X.memory_usage().sum() / 1e6))
+
+def measure(fn, n):
+    ctx = mp.get_context("fork")
+    out = ctx.Queue()
+    p = ctx.Process(target=_measure, args=(fn, n, out))
+    p.start()
+    result = out.get()
+    p.join()
+    return result
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 3_000_000])
+    args = ap.parse_args()
+    for n in args.rows:
+        for name, fn in (("legacy", legacy_build_features), ("current", build_features)):
+            seconds, peak_mb, input_mb, output_mb = measure(fn, n)
+            print(f"{n:>9} rows {name:>8}: {seconds:7.3f} s | peak +{peak_mb:8.1f} MB "
+                  f"| input {input_mb:7.1f} MB | features {output_mb:6.1f} MB")
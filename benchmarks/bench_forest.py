@@ -0,0 +1,61 @@
+"""Latency and memory of sklearn's RandomForestRegressor.predict vs CompiledForest.
+
+    python benchmarks/bench_forest.py                      # synthetic 200-tree forest
+    python benchmarks/bench_forest.py --model artifacts/models/model.joblib
+"""
+import argparse
+import pickle
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from taxi_fare.forest import CompiledForest
+from taxi_fare.model import load_model, train_model
+
+def synthetic_model(n_rows: int, n_estimators: int):
+    rng = np.random.default_rng(42)
+    X = pd.DataFrame({"dist": rng.uniform(0, 0.3, n_rows), "hour": rng.integers(0, 24, n_rows)})
+    y = 40 + 900 * X["dist"] + 2 * X["hour"] + rng.normal(0, 10, n_rows)
+    return train_model(X, y, n_estimators=n_estimators, random_state=42)
+
+def time_predict(fn, X, min_time: float = 0.5):
+    fn(X)
+    n, start = 0, time.perf_counter()
+    while time.perf_counter() - start < min_time:
+        fn(X)
+        n += 1
+    return (time.perf_counter() - start) / n
+
+def peak_alloc(fn, X):
+    tracemalloc.start()
+    fn(X)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def main(model_path, n_rows, n_estimators, batch_sizes):
+    rf = load_model(model_path) if model_path else synthetic_model(n_rows, n_estimators)
+    cf = CompiledForest.from_sklearn(rf)
+    print(f"trees={cf.n_estimators} nodes={len(cf.value)} max_depth={cf.max_depth}")
+    print(f"model size: sklearn pickle={len(pickle.dumps(rf)) / 1e6:.2f} MB | compiled arrays={cf.nbytes / 1e6:.2f} MB")
+    rng = np.random.default_rng(0)
+    print(f"{'batch':>7} {'sklearn ms':>11} {'compiled ms':>12} {'speedup':>8} {'sk peak MB':>11} {'cf peak MB':>11}")
+    for bs in batch_sizes:
+        X = pd.DataFrame({"dist": rng.uniform(0, 0.3, bs), "hour": rng.integers(0, 24, bs)})
+        Xa = X.to_numpy(dtype=np.float64)
+        assert np.allclose(rf.predict(X), cf.predict(Xa))
+        t_sk = time_predict(rf.predict, X)
+        t_cf = time_predict(cf.predict, Xa)
+        print(f"{bs:>7} {t_sk * 1e3:>11.3f} {t_cf * 1e3:>12.3f} {t_sk / t_cf:>7.1f}x "
+              f"{peak_alloc(rf.predict, X) / 1e6:>11.2f} {peak_alloc(cf.predict, Xa) / 1e6:>11.2f}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default=None, help="joblib model; default trains a synthetic forest")
+    ap.add_argument("--rows", type=int, default=20000)
+    ap.add_argument("--n-estimators", type=int, default=200)
+    ap.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 10000])
+    args = ap.parse_args()
+    main(args.model, args.rows, args.n_estimators, args.batch_sizes)
@@ -0,0 +1,237 @@
+"""HTTP load test of the inference API: throughput, tail latency and errors.
+
+Starts `uvicorn app.main:app` on a free local port with the given model
+artifact (default: a synthetic forest trained on synthetic trips, so it runs
+fully offline), waits for GET /ready, then keeps `--concurrency` keep-alive
+connections busy for `--duration` seconds with a weighted mix of /predict
+and /predict_features requests. Reports RPS, p50/p95/p99 and error rate per
+endpoint and writes them to a JSON file to compare across commits.
+
+    python -m benchmarks.bench_http --concurrency 32 --duration 20
+    python -m benchmarks.bench_http --model artifacts/models/model.joblib --workers 4
+    python -m benchmarks.bench_http --mix predict=1 --no-cache --out before.json
+    python -m benchmarks.bench_http --baseline before.json   # print deltas
+
+The client is a minimal asyncio HTTP/1.1 client in this process; check that
+it is not the bottleneck (client CPU near 100%) before reading the numbers.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+ENDPOINTS = ("/predict", "/predict_features")
+
+def synthetic_model(path: Path, n_rows: int, n_estimators: int) -> str:
+    import pandas as pd
+    from taxi_fare.features import FEATURE_COLUMNS
+    from taxi_fare.model import save_model, train_model
+    rng = np.random.default_rng(42)
+    # Fitted on a DataFrame like scripts/train.py, so feature names match predict_batch
+    X = pd.DataFrame({"dist": rng.uniform(0, 0.3, n_rows), "hour": rng.integers(0, 24, n_rows)})[FEATURE_COLUMNS]
+    y = 40 + 900 * X["dist"] + 2 * X["hour"] + rng.normal(0, 10, n_rows)
+    save_model(train_model(X, y, n_estimators=n_estimators, random_state=42), str(path))
+    return str(path)
+
+def make_bodies(endpoint: str, n: int, rng) -> list:
+    # Random trips around Stockholm; distinct enough that the prediction cache
+    # only hits when --pool makes requests repeat on purpose.
+    if endpoint == "/predict_features":
+        return [json.dumps({"dist": float(d), "hour": int(h)}).encode()
+                for d, h in zip(rng.uniform(0, 0.3, n), rng.integers(0, 24, n))]
+    lat, lon = rng.uniform(59.25, 59.40, (2, n)), rng.uniform(17.9, 18.2, (2, n))
+    hours, minutes = rng.integers(0, 24, n), rng.integers(0, 60, n)
+    return [json.dumps({"pickup_lat": float(lat[0, i]), "pickup_lon": float(lon[0, i]),
+                        "dropoff_lat": float(lat[1, i]), "dropoff_lon": float(lon[1, i]),
+                        "pickup_datetime": f"2025-01-01T{hours[i]:02d}:{minutes[i]:02d}:00Z"}).encode()
+            for i in range(n)]
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(args, port: int, tmp: Path) -> subprocess.Popen:
+    cfg = yaml.safe_load((ROOT / "configs" / "app.yaml").read_text())
+    cfg["model_path"] = str(Path(args.model).resolve())
+    cfg["compiled_model"] = args.compiled
+    cfg.setdefault("cache", {})["enabled"] = not args.no_cache
+    cfg.setdefault("batching", {})["enabled"] = not args.no_batching
+    cfg_path = tmp / "app.yaml"
+    cfg_path.write_text(yaml.safe_dump(cfg))
+    env = dict(os.environ, TAXI_FARE_APP_CONFIG=str(cfg_path),
+               PYTHONPATH=os.pathsep.join([str(ROOT), str(ROOT / "src")]))
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"]
+    return subprocess.Popen(cmd, cwd=ROOT, env=env)
+
+def wait_ready(base: str, proc: subprocess.Popen, timeout: float) -> dict:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        try:
+            with urllib.request.urlopen(f"{base}/ready", timeout=1) as r:
+                if r.status == 200:
+                    with urllib.request.urlopen(f"{base}/health", timeout=1) as h:
+                        return json.loads(h.read())
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"server not ready after {timeout} s")
+
+async def _request(reader, writer, path: str, body: bytes) -> int:
+    writer.write(b"POST %s HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+                 b"Content-Length: %d\r\n\r\n%s" % (path.encode(), len(body), body))
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    length = 0
+    for line in lines[1:]:
+        if line.lower().startswith("content-length:"):
+            length = int(line.split(":", 1)[1])
+    await reader.readexactly(length)
+    return status
+
+async def _user(port, paths, weights, bodies, stop_at, warm_until, samples, seed):
+    rng = np.random.default_rng(seed)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                break
+            path = paths[rng.choice(len(paths), p=weights)]
+            pool = bodies[path]
+            body = pool[rng.integers(len(pool))]
+            try:
+                status = await _request(reader, writer, path, body)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                status = 0  # connection dropped: count it and reconnect
+                writer.close()
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            if now >= warm_until:
+                samples.append((path, status, now, time.perf_counter() - now))
+    finally:
+        writer.close()
+
+def summarize(samples, duration: float) -> dict:
+    def stats(rows):
+        if not rows:
+            return {"requests": 0}
+        lat = np.array([r[3] for r in rows]) * 1000
+        errors = sum(1 for r in rows if r[1] != 200)
+        codes = {}
+        for r in rows:
+            codes[str(r[1])] = codes.get(str(r[1]), 0) + 1
+        return {"requests": len(rows), "rps": round(len(rows) / duration, 1),
+                "error_rate": round(errors / len(rows), 5), "status": codes,
+                "p50_ms": round(float(np.percentile(lat, 50)), 3),
+                "p95_ms": round(float(np.percentile(lat, 95)), 3),
+                "p99_ms": round(float(np.percentile(lat, 99)), 3),
+                "max_ms": round(float(lat.max()), 3)}
+    out = {"overall": stats(samples)}
+    for path in ENDPOINTS:
+        out[path] = stats([s for s in samples if s[0] == path])
+    return out
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def parse_mix(mix: str):
+    weights = {}
+    for part in mix.split(","):
+        name, _, w = part.partition("=")
+        path = "/" + name.strip().lstrip("/")
+        if path not in ENDPOINTS:
+            raise SystemExit(f"unknown endpoint in --mix: {name}")
+        weights[path] = float(w or 1)
+    paths = [p for p in weights if weights[p] > 0]
+    total = sum(weights[p] for p in paths)
+    return paths, [weights[p] / total for p in paths]
+
+def print_report(results: dict, baseline: dict = None):
+    for name, r in results.items():
+        if not r.get("requests"):
+            continue
+        line = (f"{name:>18}: {r['rps']:9.1f} req/s | p50 {r['p50_ms']:7.2f} ms | p95 {r['p95_ms']:7.2f} ms "
+                f"| p99 {r['p99_ms']:7.2f} ms | errors {r['error_rate']:.2%}")
+        b = (baseline or {}).get(name)
+        if b and b.get("requests"):
+            line += (f"  (vs baseline: rps {r['rps'] / b['rps'] - 1:+.1%}, "
+                     f"p99 {r['p99_ms'] / b['p99_ms'] - 1:+.1%})")
+        print(line)
+
+async def drive(args, port, bodies, paths, weights):
+    samples = []
+    start = time.perf_counter()
+    warm_until = start + args.warmup
+    stop_at = warm_until + args.duration
+    await asyncio.gather(*[_user(port, paths, weights, bodies, stop_at, warm_until, samples, seed)
+                           for seed in range(args.concurrency)])
+    return samples
+
+def main(args):
+    paths, weights = parse_mix(args.mix)
+    tmp = Path(tempfile.mkdtemp(prefix="taxi_fare_http_"))
+    if args.model is None:
+        args.model = synthetic_model(tmp / "model.joblib", args.rows, args.n_estimators)
+    rng = np.random.default_rng(0)
+    n_bodies = args.pool or 20000
+    bodies = {p: make_bodies(p, n_bodies, rng) for p in ENDPOINTS}
+    port = free_port()
+    proc = start_server(args, port, tmp)
+    try:
+        health = wait_ready(f"http://127.0.0.1:{port}", proc, args.startup_timeout)
+        samples = asyncio.run(drive(args, port, bodies, paths, weights))
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    results = summarize(samples, args.duration)
+    baseline = json.loads(Path(args.baseline).read_text())["results"] if args.baseline else None
+    print_report(results, baseline)
+    report = {"commit": git_commit(), "timestamp": datetime.now(timezone.utc).isoformat(),
+              "config": {k: v for k, v in vars(args).items() if k != "baseline"},
+              "server": {k: health.get(k) for k in ("serving_mode", "threads", "model_version")},
+              "results": results}
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.out).write_text(json.dumps(report, indent=2))
+    print(f"wrote {args.out}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default=None, help="model artifact; default trains a synthetic forest")
+    ap.add_argument("--rows", type=int, default=20000, help="training rows of the synthetic model")
+    ap.add_argument("--n-estimators", type=int, default=100)
+    ap.add_argument("--compiled", action="store_true", help="serve with compiled_model: true")
+    ap.add_argument("--no-cache", action="store_true", help="disable the prediction cache")
+    ap.add_argument("--no-batching", action="store_true", help="disable /predict micro-batching")
+    ap.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    ap.add_argument("--concurrency", type=int, default=16, help="concurrent keep-alive connections")
+    ap.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+    ap.add_argument("--warmup", type=float, default=2.0, help="seconds of load before measuring")
+    ap.add_argument("--mix", default="predict=0.5,predict_features=0.5", help="endpoint weights")
+    ap.add_argument("--pool", type=int, default=0,
+                    help="distinct bodies per endpoint (small values exercise the cache)")
+    ap.add_argument("--startup-timeout", type=float, default=120.0)
+    ap.add_argument("--out", default="benchmarks/results/bench_http.json")
+    ap.add_argument("--baseline", default=None, help="earlier --out file to compare against")
+    main(ap.parse_args())
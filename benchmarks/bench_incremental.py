@@ -0,0 +1,106 @@
+"""In-memory vs streaming (chunk-by-chunk, warm_start) training: MAE, wall time, peak memory (Linux).
+
+For every row count a synthetic trip CSV is written once, plus a separate
+test CSV. Each mode runs in a fresh forked process that resets the
+kernel's peak-RSS counter (VmHWM) and reports how far the peak rose:
+
+- in-memory: load_training_data + build_features on the whole file, one
+  train_model fit with --trees trees;
+- streaming: load_training_data chunks -> training_chunks ->
+  train_model_streaming, with trees_per_chunk chosen so the forest also
+  ends up with about --trees trees.
+
+Both are scored on the same test rows.
+
+    python benchmarks/bench_incremental.py --rows 250000 1000000 2000000 --chunksize 250000
+"""
+import argparse
+import math
+import multiprocessing as mp
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from taxi_fare.data import load_training_data, training_schema
+from taxi_fare.features import build_features
+from taxi_fare.model import train_model, train_model_streaming
+from taxi_fare.streaming import training_chunks
+
+MAPPING = {k: k for k in ("pickup_lat", "pickup_lon", "dropoff_lat", "dropoff_lon")}
+SCHEMA = training_schema(MAPPING, "fare_amount", "pickup_datetime")
+
+def write_trips(path: Path, n: int, seed: int):
+    rng = np.random.default_rng(seed)
+    ts = np.datetime64("2025-01-01T00:00:00") + rng.integers(0, 86400 * 365, n).astype("timedelta64[s]")
+    df = pd.DataFrame({
+        "pickup_lat": 59.3 + rng.uniform(0, 0.1, n), "pickup_lon": 18.0 + rng.uniform(0, 0.1, n),
+        "dropoff_lat": 59.3 + rng.uniform(0, 0.1, n), "dropoff_lon": 18.0 + rng.uniform(0, 0.1, n),
+        "pickup_datetime": pd.Series(np.datetime_as_string(ts)) + "Z",
+        "vendor": rng.choice(["a", "b", "c"], n),
+    })
+    dist = np.hypot(df["dropoff_lat"] - df["pickup_lat"], df["dropoff_lon"] - df["pickup_lon"])
+    hour = ts.astype("datetime64[h]").astype(np.int64) % 24
+    rush = np.isin(hour, [7, 8, 16, 17]).astype(float)
+    df["fare_amount"] = 45 + 1500 * dist * (1 + 0.3 * rush) + rng.normal(0, 10, n)
+    df.to_csv(path, index=False)
+
+def _status_kb(field: str) -> int:
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith(field + ":"):
+            return int(line.split()[1])
+    raise KeyError(field)
+
+def _run(mode, train_path, n, test, args, out):
+    Path("/proc/self/clear_refs").write_text("5")  # reset VmHWM to the current RSS
+    base = _status_kb("VmRSS")
+    start = time.perf_counter()
+    params = {"min_samples_leaf": args.min_samples_leaf, "random_state": 0, "n_jobs": args.n_jobs}
+    if mode == "in-memory":
+        df = load_training_data(str(train_path), SCHEMA)
+        model = train_model(build_features(df, MAPPING, "pickup_datetime"), df["fare_amount"],
+                            n_estimators=args.trees, **params)
+        del df
+    else:
+        n_chunks = max(1, n // args.chunksize)
+        frames = load_training_data(str(train_path), SCHEMA, chunksize=args.chunksize)
+        chunks = training_chunks(frames, MAPPING, "fare_amount", "pickup_datetime", test_size=0.0)
+        model = train_model_streaming(chunks, max(1, math.ceil(args.trees / n_chunks)), **params)
+    seconds = time.perf_counter() - start
+    peak = _status_kb("VmHWM")
+    X_test, y_test = test
+    mae = float(np.mean(np.abs(model.predict(X_test) - y_test)))
+    out.put((seconds, (peak - base) / 1024, mae, len(model.estimators_)))
+
+def measure(mode, train_path, n, test, args):
+    ctx = mp.get_context("fork")
+    out = ctx.Queue()
+    p = ctx.Process(target=_run, args=(mode, train_path, n, test, args, out))
+    p.start()
+    result = out.get()
+    p.join()
+    return result
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[250_000, 1_000_000, 2_000_000])
+    ap.add_argument("--chunksize", type=int, default=250_000)
+    ap.add_argument("--trees", type=int, default=16)
+    ap.add_argument("--min-samples-leaf", type=int, default=20)
+    ap.add_argument("--n-jobs", type=int, default=None)
+    ap.add_argument("--test-rows", type=int, default=50_000)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        write_trips(Path(tmp) / "test.csv", args.test_rows, seed=99)
+        test_df = load_training_data(str(Path(tmp) / "test.csv"), SCHEMA)
+        test = (build_features(test_df, MAPPING, "pickup_datetime"), test_df["fare_amount"].to_numpy())
+        for n in args.rows:
+            train_path = Path(tmp) / f"train_{n}.csv"
+            write_trips(train_path, n, seed=n)
+            for mode in ("in-memory", "streaming"):
+                seconds, peak_mb, mae, trees = measure(mode, train_path, n, test, args)
+                print(f"{n:>9} rows {mode:>10}: MAE {mae:7.3f} | {seconds:7.2f} s | peak +{peak_mb:7.1f} MB "
+                      f"| {trees} trees", flush=True)
+            train_path.unlink()
@@ -0,0 +1,75 @@
+"""Nearest-POI feature timings: batches and single trips.
+
+Batch: PoiIndex.nearest_km (KD-tree per category) vs the chunked brute-force
+scan over all POIs, for pickup points around Stockholm. Single trip:
+nearest_km_one with a cold and a warm memo grid vs one KD-tree query.
+
+    python benchmarks/bench_poi.py --rows 1000000
+    python benchmarks/bench_poi.py --poi data/poi.csv --extra-pois 5000   # denser POI set
+"""
+import argparse
+import time
+
+import numpy as np
+
+from taxi_fare.poi import PoiIndex
+
+def make_index(path: str, extra: int, grid_step: float) -> PoiIndex:
+    base = PoiIndex.from_csv(path, grid_step)
+    if not extra:
+        return base
+    rng = np.random.default_rng(1)
+    cats = [c for c, m in zip(base.categories, base._members) for _ in m]
+    lat = np.concatenate([base.lat, rng.uniform(59.0, 59.8, extra)])
+    lon = np.concatenate([base.lon, rng.uniform(17.5, 18.5, extra)])
+    cats = cats + list(rng.choice(base.categories, extra))
+    index = PoiIndex([f"poi{i}" for i in range(len(lat))], cats, lat, lon, grid_step)
+    index.build_trees()
+    return index
+
+def main(args):
+    poi = make_index(args.poi, args.extra_pois, args.grid_step)
+    rng = np.random.default_rng(0)
+    lat, lon = rng.uniform(59.2, 59.5, args.rows), rng.uniform(17.8, 18.3, args.rows)
+    print(f"{len(poi.lat)} POIs in {len(poi.categories)} categories, {args.rows} rows")
+
+    t = time.perf_counter()
+    tree = poi.nearest_km(lat, lon)
+    print(f"batch KD-tree      : {time.perf_counter() - t:8.3f} s")
+    trees, poi._trees = poi._trees, None
+    poi.build_trees = lambda: None  # force the brute-force path
+    n = min(args.rows, args.brute_rows)
+    t = time.perf_counter()
+    brute = poi.nearest_km(lat[:n], lon[:n])
+    elapsed = time.perf_counter() - t
+    print(f"batch brute force  : {elapsed * args.rows / n:8.3f} s (extrapolated from {n} rows)")
+    assert np.allclose(brute, tree[:n], atol=1e-3)
+    poi._trees = trees
+
+    q_lat, q_lon = lat[:args.single], lon[:args.single]
+    poi._cells.clear()
+    t = time.perf_counter()
+    for a, b in zip(q_lat, q_lon):
+        poi.nearest_km_one(a, b)
+    cold = (time.perf_counter() - t) / len(q_lat)
+    t = time.perf_counter()
+    for a, b in zip(q_lat, q_lon):
+        poi.nearest_km_one(a, b)
+    warm = (time.perf_counter() - t) / len(q_lat)
+    t = time.perf_counter()
+    for a, b in zip(q_lat[:1000], q_lon[:1000]):
+        poi.nearest_km(np.array([a]), np.array([b]))
+    tree_one = (time.perf_counter() - t) / min(1000, len(q_lat))
+    print(f"single memo (cold) : {cold * 1e6:8.1f} us   ({len(poi._cells)} cells)")
+    print(f"single memo (warm) : {warm * 1e6:8.1f} us")
+    print(f"single KD-tree     : {tree_one * 1e6:8.1f} us")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--poi", default="data/poi.csv")
+    ap.add_argument("--extra-pois", type=int, default=0, help="random POIs added to the file's")
+    ap.add_argument("--grid-step", type=float, default=0.01)
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--brute-rows", type=int, default=200_000, help="rows actually run through brute force")
+    ap.add_argument("--single", type=int, default=20_000, help="single-trip lookups")
+    main(ap.parse_args())
@@ -0,0 +1,42 @@
+"""Microbenchmark: DataFrame-based single-row scoring vs the features_row fast path.
+
+    python benchmarks/bench_predict_single.py --model artifacts/models/model.joblib
+"""
+import argparse
+import timeit
+
+import pandas as pd
+
+from taxi_fare.features import build_features
+from taxi_fare.predict import RAW_MAPPING, load_model_from_path, predict_single
+
+PAYLOAD = {
+    "pickup_lat": 59.33, "pickup_lon": 18.06,
+    "dropoff_lat": 59.36, "dropoff_lon": 18.01,
+    "pickup_datetime": "2025-01-01T10:00:00Z",
+}
+
+def predict_single_dataframe(model, payload):
+    # The pre-fast-path implementation, kept here as the baseline
+    df = pd.DataFrame([payload])
+    df["pickup_datetime"] = pd.to_datetime(df["pickup_datetime"])
+    X = build_features(df, RAW_MAPPING, "pickup_datetime")
+    return float(model.predict(X)[0])
+
+def main(model_path: str, number: int, repeat: int):
+    model = load_model_from_path(model_path)
+    assert predict_single(model, PAYLOAD) == predict_single_dataframe(model, PAYLOAD)
+    results = {}
+    for name, fn in [("dataframe", predict_single_dataframe), ("fast_path", predict_single)]:
+        best = min(timeit.repeat(lambda: fn(model, PAYLOAD), number=number, repeat=repeat))
+        results[name] = best / number
+        print(f"{name:>10}: {results[name] * 1e6:9.1f} us/call")
+    print(f"speedup: {results['dataframe'] / results['fast_path']:.2f}x")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default="artifacts/models/model.joblib")
+    ap.add_argument("--number", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    main(args.model, args.number, args.repeat)
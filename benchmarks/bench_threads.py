@@ -0,0 +1,81 @@
+"""Tail latency of single-trip scoring under different thread budgets.
+
+Forks `workers` processes (like gunicorn), each running `threads` concurrent
+callers of model.predict on one row for --duration seconds with the given
+sklearn n_jobs and native (BLAS/OpenMP) limit. Reports p50/p99 latency and
+total throughput per setting, starting with the plan from
+configs/concurrency.yaml.
+
+    python benchmarks/bench_threads.py --duration 5
+"""
+import argparse
+import multiprocessing as mp
+import threading
+import time
+
+import numpy as np
+
+from taxi_fare.concurrency import ThreadBudget, apply_thread_limits, available_cpus, plan_threads
+from taxi_fare.model import train_model
+
+def _worker(model, budget: ThreadBudget, duration: float, out):
+    apply_thread_limits(budget)
+    model.n_jobs = budget.n_jobs
+    X = np.array([[0.05, 10.0]])
+    latencies = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def caller():
+        local = []
+        while time.perf_counter() < stop_at:
+            t = time.perf_counter()
+            model.predict(X)
+            local.append(time.perf_counter() - t)
+        with lock:
+            latencies.extend(local)
+
+    callers = [threading.Thread(target=caller) for _ in range(budget.inference_threads)]
+    for t in callers:
+        t.start()
+    for t in callers:
+        t.join()
+    out.put(latencies)
+
+def run_setting(name, model, budget: ThreadBudget, duration: float):
+    ctx = mp.get_context("fork")
+    out = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(model, budget, duration, out)) for _ in range(budget.workers)]
+    for p in procs:
+        p.start()
+    lat = np.concatenate([np.asarray(out.get()) for _ in procs]) * 1e3
+    for p in procs:
+        p.join()
+    print(f"{name:>16} workers={budget.workers:<3} threads={budget.inference_threads:<3} "
+          f"n_jobs={budget.n_jobs:<3} native={budget.native_threads:<3} | "
+          f"p50={np.percentile(lat, 50):7.2f} ms p99={np.percentile(lat, 99):7.2f} ms "
+          f"rps={len(lat) / duration:8.1f}")
+
+def main(duration, n_rows, n_estimators):
+    cpus = available_cpus()
+    rng = np.random.default_rng(42)
+    X = np.column_stack([rng.uniform(0, 0.3, n_rows), rng.integers(0, 24, n_rows)])
+    y = 40 + 900 * X[:, 0] + 2 * X[:, 1] + rng.normal(0, 10, n_rows)
+    model = train_model(X, y, n_estimators=n_estimators, random_state=42)
+    print(f"available cpus={cpus}")
+    settings = [
+        ("planned", plan_threads("serving")),
+        ("n_jobs=-1", ThreadBudget(cpus, cpus, 1, -1, cpus)),
+        ("oversubscribed", ThreadBudget(cpus, 2 * cpus, 4, -1, cpus)),
+        ("threads/worker", ThreadBudget(cpus, 1, 2 * cpus, 1, 1)),
+    ]
+    for name, budget in settings:
+        run_setting(name, model, budget, duration)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--duration", type=float, default=5.0)
+    ap.add_argument("--rows", type=int, default=5000)
+    ap.add_argument("--n-estimators", type=int, default=200)
+    args = ap.parse_args()
+    main(args.duration, args.rows, args.n_estimators)
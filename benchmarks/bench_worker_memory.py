@@ -0,0 +1,82 @@
+"""Per-worker memory for N forked "workers" under different model loading modes (Linux).
+
+Each worker loads the model the way app/main.py would, scores a batch to
+touch every tree, then reports RSS and PSS from /proc/<pid>/smaps_rollup.
+PSS splits shared pages between the processes mapping them, so its sum is
+the real footprint of the worker pool.
+
+    python benchmarks/bench_worker_memory.py --workers 4
+    python benchmarks/bench_worker_memory.py --model artifacts/models/model.joblib
+
+Modes:
+  private  each worker joblib.loads the sklearn forest (today's behaviour)
+  preload  the parent loads it once and forks (gunicorn preload_app)
+  mmap     each worker memory-maps a CompiledForest export (mmap_model: true)
+"""
+import argparse
+import multiprocessing as mp
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from taxi_fare.forest import CompiledForest
+from taxi_fare.model import load_model, save_model, train_model
+from taxi_fare.predict import load_model_from_path
+
+def smaps_rollup(pid: int) -> dict:
+    out = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        key, value = line.split(":", 1)
+        out[key] = int(value.split()[0]) * 1024
+    return out
+
+def _worker(loader, X, ready, done):
+    model = loader()
+    model.predict(X)
+    ready.put(mp.current_process().pid)
+    done.wait()
+
+def run_mode(name, loader, X, n_workers):
+    ctx = mp.get_context("fork")
+    ready, done = ctx.Queue(), ctx.Event()
+    procs = [ctx.Process(target=_worker, args=(loader, X, ready, done)) for _ in range(n_workers)]
+    for p in procs:
+        p.start()
+    pids = [ready.get() for _ in procs]
+    stats = [smaps_rollup(pid) for pid in pids]
+    done.set()
+    for p in procs:
+        p.join()
+    rss = [s["Rss"] / 1e6 for s in stats]
+    pss = [s["Pss"] / 1e6 for s in stats]
+    print(f"{name:>8}: RSS/worker {np.mean(rss):8.1f} MB | PSS/worker {np.mean(pss):8.1f} MB "
+          f"| total PSS {sum(pss):8.1f} MB")
+
+def main(model_path, n_workers, n_rows, n_estimators):
+    tmp = Path(tempfile.mkdtemp(prefix="taxi_fare_mem_"))
+    if model_path is None:
+        rng = np.random.default_rng(42)
+        Xs = np.column_stack([rng.uniform(0, 0.3, n_rows), rng.integers(0, 24, n_rows)])
+        y = 40 + 900 * Xs[:, 0] + 2 * Xs[:, 1] + rng.normal(0, 10, n_rows)
+        model_path = str(tmp / "model.joblib")
+        save_model(train_model(Xs, y, n_estimators=n_estimators, random_state=42), model_path)
+    compiled_path = str(tmp / "model_compiled.joblib")
+    save_model(CompiledForest.from_sklearn(load_model(model_path)), compiled_path)
+    X = np.column_stack([np.linspace(0, 0.3, 256), np.arange(256) % 24])
+    print(f"workers={n_workers} model={model_path} ({Path(model_path).stat().st_size / 1e6:.1f} MB on disk)")
+
+    run_mode("private", lambda: load_model_from_path(model_path), X, n_workers)
+    shared = load_model_from_path(model_path)
+    run_mode("preload", lambda: shared, X, n_workers)
+    del shared
+    run_mode("mmap", lambda: load_model_from_path(compiled_path, mmap=True), X, n_workers)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default=None, help="joblib model; default trains a synthetic forest")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--rows", type=int, default=20000)
+    ap.add_argument("--n-estimators", type=int, default=200)
+    args = ap.parse_args()
+    main(args.model, args.workers, args.rows, args.n_estimators)
@@ -1,4 +1,40 @@
-workers = 2
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+from taxi_fare.concurrency import PROCESSES_ENV_VAR, plan_threads, export_native_thread_env
+
+# Workers and native thread pools follow configs/concurrency.yaml. The env
+# vars must be set here, before any worker (or the preloading master) imports numpy.
+threads = plan_threads("serving")
+export_native_thread_env(threads)
+
+workers = threads.workers
+# Each worker sizes its inference pool from the real process count (serving_processes)
+os.environ[PROCESSES_ENV_VAR] = str(workers)
 worker_class = "uvicorn.workers.UvicornWorker"
 timeout = 60
 graceful_timeout = 30
+
+# Load the model once in the master before forking so workers share its
+# memory copy-on-write instead of each unpickling their own copy.
+preload_app = os.getenv("GUNICORN_PRELOAD_MODEL", "1") == "1"
+if preload_app:
+    os.environ["TAXI_FARE_PRELOAD_MODEL"] = "1"
+
+# prometheus_client keeps per-process metric files here so /metrics can sum
+# all workers; must exist before app.main (and prometheus_client) is imported,
+# which with preload_app happens in the master before on_starting runs.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "taxi_fare_prometheus"))
+# Stale files from a previous run would be summed into the new counters. Wipe
+# once per master: a config reload (HUP) must not delete live files.
+if os.environ.get("TAXI_FARE_PROMETHEUS_MASTER") != str(os.getpid()):
+    os.environ["TAXI_FARE_PROMETHEUS_MASTER"] = str(os.getpid())
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,18 @@
+# Exportera en tränad skog som CompiledForest (joblib, okomprimerad) så att
+# gunicorn-workers kan memory-mappa samma fil (mmap_model: true i configs/app.yaml).
+import argparse
+from taxi_fare.forest import CompiledForest
+from taxi_fare.model import load_model, save_model
+
+def main(src: str, dst: str):
+    compiled = CompiledForest.from_sklearn(load_model(src))
+    save_model(compiled, dst)
+    print(f"Saved compiled forest → {dst} | trees={compiled.n_estimators} "
+          f"nodes={compiled.n_nodes} size={compiled.nbytes / 1e6:.1f} MB")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default="artifacts/models/model.joblib")
+    ap.add_argument("--out", default="artifacts/models/model_compiled.joblib")
+    args = ap.parse_args()
+    main(args.model, args.out)
@@ -1,25 +1,37 @@
 import argparse, yaml
 from pathlib import Path
-import pandas as pd
 from sklearn.metrics import mean_absolute_error
-from taxi_fare.predict import load_model_from_path, predict_single
+from taxi_fare.feature_cache import FeatureCache, training_features
+from taxi_fare.features import build_features
+from taxi_fare.predict import load_model_from_path
 
-def main(config_path: str):
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+def main(config_path: str, feature_cache: bool = True):
     cfg = yaml.safe_load(Path(config_path).read_text())
     model_path = cfg.get("artifacts_dir", "artifacts/models") + "/model.joblib"
+    mapping, datetime_col = cfg["feature_mapping"], cfg.get("datetime_col", "pickup_datetime")
 
     # Simple holdout based on the same sample CSV (just demo)
-    df = pd.read_csv("data/sample.csv")
     model = load_model_from_path(model_path)
+    zones, poi = getattr(model, "zone_stats_", None), getattr(model, "poi_index_", None)
+    # Samma featurecache som träningen; zon-/POI-modeller behöver råa koordinater, då byggs allt om
+    f_cfg = cfg.get("feature_cache") or {}
+    cache = None
+    if feature_cache and f_cfg.get("enabled", True) and zones is None and poi is None:
+        cache = FeatureCache.from_config(f_cfg, REPO_ROOT)  # samma katalog som train.py, oavsett cwd
+    X, y, df = training_features("data/sample.csv", mapping, cfg.get("target_col", "fare_amount"), datetime_col,
+                                 cfg.get("data"), cache=cache)
+    if zones is not None or poi is not None:
+        X = build_features(df, mapping, datetime_col, zones, poi)
 
-    preds = []
-    for _, r in df.iterrows():
-        preds.append(predict_single(model, r.to_dict()))
-    mae = mean_absolute_error(df["fare_amount"], preds)
+    preds = model.predict(X)
+    mae = mean_absolute_error(y, preds)
     print(f"Holdout MAE: {mae:.4f}")
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--config", default="configs/training.yaml")
+    ap.add_argument("--no-feature-cache", action="store_true", help="read and featurize the data even if cached")
     args = ap.parse_args()
-    main(args.config)
+    main(args.config, not args.no_feature_cache)
@@ -0,0 +1,33 @@
+# Konvertera en CSV (t.ex. data/sample.csv) till ett Parquet-dataset partitionerat per
+# upphämtningsdatum: <out>/pickup_date=YYYY-MM-DD/part-*.parquet. Peka sedan data_path
+# i configs/training.yaml på katalogen och välj träningsfönster under window:.
+import argparse
+import shutil
+from pathlib import Path
+import pandas as pd
+from taxi_fare.data import load_training_data, partition_dates, write_partitioned
+
+def main(src: str, out: str, datetime_col: str, chunksize: int, overwrite: bool):
+    out_path = Path(out)
+    if out_path.exists() and any(out_path.iterdir()):
+        if not overwrite:
+            raise SystemExit(f"{out_path} is not empty (use --overwrite)")
+        shutil.rmtree(out_path)
+    # Alla kolumner med sina typer, men tidsstämpeln som text så att dess offset (och datum) behålls;
+    # läs i chunkar så att stora filer inte behöver få plats i minnet
+    columns = {c: None for c in pd.read_csv(src, nrows=0).columns}
+    columns[datetime_col] = "str"
+    rows = write_partitioned(load_training_data(src, columns, "csv", chunksize), out_path, datetime_col)
+    dates = partition_dates(out_path)
+    print(f"Wrote {rows} rows → {out_path} | {len(dates)} partitions"
+          + (f" ({dates[0]} .. {dates[-1]})" if dates else ""))
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--src", default="data/sample.csv")
+    ap.add_argument("--out", default="data/trips")
+    ap.add_argument("--datetime-col", default="pickup_datetime")
+    ap.add_argument("--chunksize", type=int, default=1_000_000)
+    ap.add_argument("--overwrite", action="store_true")
+    args = ap.parse_args()
+    main(args.src, args.out, args.datetime_col, args.chunksize, args.overwrite)
@@ -18,7 +18,6 @@ import os, sys, subprocess
 
 import mlflow
 import mlflow.sklearn
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error
 from mlflow.models.signature import infer_signature
 
@@ -50,9 +49,7 @@ if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
 # Nu kan vi importera vårt paket
-from taxi_fare.data import load_training_data
-from taxi_fare.features import build_features
-from taxi_fare.model import train_model, save_model  # save_model används ej, men låter den vara kvar
+from taxi_fare.training import prepare_training, fit_model, training_artifacts
 
 # Evidently (valfritt)
 EVIDENTLY_OK = False
@@ -64,7 +61,7 @@ except Exception:
     EVIDENTLY_OK = False
 
 
-def main(config_path: str):
+def main(config_path: str, feature_cache: bool = True):
     # Resolva config-path (absolut eller relativt repo-roten)
     cfg_path = Path(config_path)
     if not cfg_path.is_file():
@@ -73,11 +70,6 @@ def main(config_path: str):
         raise FileNotFoundError(f"Config not found. Tried: {config_path} and {repo_root / config_path}")
 
     cfg = yaml.safe_load(cfg_path.read_text())
-    data_path = cfg["data_path"]
-    target_col = cfg.get("target_col", "fare_amount")
-    datetime_col = cfg.get("datetime_col", "pickup_datetime")
-    mapping = cfg["feature_mapping"]
-    model_params = cfg["model_params"]
 
     # --- path helpers (snabbfix) ---
     def dbfs_to_os(p: str) -> str:
@@ -95,17 +87,10 @@ def main(config_path: str):
             return cand2
         return cand                        # returnera under repo-root (låter ev. fel bubbla)
 
-    # Data & features (använd resolvad väg)
-    data_path_resolved = resolve_under_repo(data_path)
-    print(f"[debug] repo_root={repo_root} | cwd={Path.cwd()} | data={data_path_resolved}", flush=True)
-
-    df = load_training_data(str(data_path_resolved))
-    X = build_features(df, mapping, datetime_col)
-    y = df[target_col]
-
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=cfg.get("test_size", 0.2), random_state=cfg.get("random_state", 42)
-    )
+    # Data & features enligt training.yaml (fönster, strömning, featurecache, zoner/POI), samma steg
+    # som train_local.py via taxi_fare.training; relativa vägar resolvas under repo-roten
+    print(f"[debug] repo_root={repo_root} | cwd={Path.cwd()} | data={resolve_under_repo(cfg['data_path'])}", flush=True)
+    ts = prepare_training(cfg, feature_cache, resolve_under_repo)
 
     # MLflow setup — logga direkt till Databricks MLflow
     mlflow.set_tracking_uri(cfg.get("mlflow_uri", "databricks"))
@@ -123,13 +108,15 @@ def main(config_path: str):
     # Viktigt: använd keyword-arg så vi inte råkar tolka värdet som experiment_id
     mlflow.set_experiment(experiment_name=exp_path)
 
-    mlflow.sklearn.autolog(log_models=False, log_input_examples=True, log_model_signatures=True)
+    mlflow.sklearn.autolog(log_models=False, log_input_examples=True, log_model_signatures=True,
+                           disable=ts.streaming)
 
 
     with mlflow.start_run(run_name="rf_regressor"):
-        model = train_model(X_train, y_train, **model_params)
+        model = fit_model(ts, cfg)
+        X_train, X_test = ts.X_train, ts.X_test
         y_pred = model.predict(X_test)
-        mae = mean_absolute_error(y_test, y_pred)
+        mae = mean_absolute_error(ts.y_test, y_pred)
         mlflow.log_metric("mae_holdout", float(mae))
 
         # Logga modellen direkt till MLflow (ingen lokal mapp)
@@ -150,13 +137,23 @@ def main(config_path: str):
             input_example=input_example,
         )
 
+        # Uppslagstabell (dist x timme) och komprimerad skog: /tmp och MLflow. Hela modellen sparas
+        # där bara för storlek/laddtid vid komprimeringen och loggas inte (den registreras ovan)
+        tmp_dir = Path(tempfile.mkdtemp(prefix="taxi_fare_"))
+        for name, path in training_artifacts(model, ts, cfg, tmp_dir).items():
+            mlflow.log_artifact(str(path), artifact_path="model")
+            print(f"Logged {name}: {path.name}")
+        if ts.params:
+            mlflow.log_params(ts.params)
+        mlflow.log_metrics(ts.metrics)
+
         # Evidently-rapport (om Evidently finns): skriv till /tmp och logga till MLflow
         report_path = None
         if EVIDENTLY_OK:
             try:
                 from pandas import DataFrame
-                df_train = DataFrame(X_train, columns=X.columns)
-                df_test = DataFrame(X_test, columns=X.columns)
+                df_train = DataFrame(X_train, columns=X_train.columns)
+                df_test = DataFrame(X_test, columns=X_train.columns)
                 report = Report(metrics=[DataDriftPreset()])
                 report.run(reference_data=df_train, current_data=df_test)
                 tmp_dir = Path(tempfile.mkdtemp(prefix="taxi_fare_"))
@@ -176,5 +173,6 @@ def main(config_path: str):
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--config", default="configs/training.yaml")
+    ap.add_argument("--no-feature-cache", action="store_true", help="read and featurize the data even if cached")
     args = ap.parse_args()
-    main(args.config)
+    main(args.config, not args.no_feature_cache)
@@ -41,8 +41,7 @@ if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
 # Nu kan vi importera vårt paket
-from taxi_fare.data import load_training_data
-from taxi_fare.features import build_features
+from taxi_fare.feature_cache import FeatureCache, training_features
 from taxi_fare.model import train_model, save_model  # save_model används ej, men låter den vara kvar
 
 # Evidently (valfritt)
@@ -55,7 +54,7 @@ except Exception:
     EVIDENTLY_OK = False
 
 
-def main(config_path: str):
+def main(config_path: str, feature_cache: bool = True):
     # Resolva config-path (absolut eller relativt repo-roten)
     cfg_path = Path(config_path)
     if not cfg_path.is_file():
@@ -70,10 +69,11 @@ def main(config_path: str):
     mapping = cfg["feature_mapping"]
     model_params = cfg["model_params"]
 
-    # Data & features
-    df = load_training_data(data_path)
-    X = build_features(df, mapping, datetime_col)
-    y = df[target_col]
+    # Data & features (featurecachen memory-mappar X/y om data och featurekonfig är oförändrade)
+    cache = None
+    if feature_cache and (cfg.get("feature_cache") or {}).get("enabled", True):
+        cache = FeatureCache.from_config(cfg.get("feature_cache") or {}, repo_root)
+    X, y, _ = training_features(data_path, mapping, target_col, datetime_col, cfg.get("data"), cache=cache)
 
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=cfg.get("test_size", 0.2), random_state=cfg.get("random_state", 42)
@@ -119,5 +119,6 @@ def main(config_path: str):
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--config", default="configs/training.yaml")
+    ap.add_argument("--no-feature-cache", action="store_true", help="read and featurize the data even if cached")
     args = ap.parse_args()
-    main(args.config)
+    main(args.config, not args.no_feature_cache)
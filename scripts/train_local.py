@@ -1,12 +1,18 @@
 import argparse
+import sys
 import yaml
 from pathlib import Path
 import mlflow
 import mlflow.sklearn
-from src.taxi_fare.data import load_training_data
-from src.taxi_fare.features import build_features
-from src.taxi_fare.model import train_model, save_model
-from sklearn.model_selection import train_test_split
+
+# Importera paketet som taxi_fare (via src/ på sys.path, som train.py), inte src.taxi_fare:
+# objekt som pickles in i modellen (zoner, POI-index) ska peka på samma moduler som API:t laddar
+src_path = Path(__file__).resolve().parents[1] / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from taxi_fare.model import save_model
+from taxi_fare.training import prepare_training, fit_model, training_artifacts
 from sklearn.metrics import mean_absolute_error
 #from evidently.report import Report
 #from evidently.metric_preset import DataDriftPreset
@@ -20,36 +26,39 @@ except Exception:
     EVIDENTLY_OK = False
 
 
-def main(config_path: str):
+def main(config_path: str, feature_cache: bool = True):
     cfg = yaml.safe_load(Path(config_path).read_text())
-    data_path = cfg["data_path"]
-    target_col = cfg["target_col"]
-    datetime_col = cfg["datetime_col"]
-    mapping = cfg["feature_mapping"]
-    model_params = cfg["model_params"]
     artifacts_dir = Path(cfg.get("artifacts_dir", "artifacts/models"))
     artifacts_dir.mkdir(parents=True, exist_ok=True)
 
-    df = load_training_data(data_path)
-    X = build_features(df, mapping, datetime_col)
-    y = df[target_col]
-
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    # Data och features enligt training.yaml (fönster, strömning, featurecache, zoner/POI),
+    # samma steg som train.py via taxi_fare.training
+    ts = prepare_training(cfg, feature_cache)
 
     mlflow.set_tracking_uri(cfg.get("mlflow_uri", "file:./mlruns"))
     mlflow.set_experiment(cfg.get("experiment_name", "taxi_fare_experiment"))
-    mlflow.sklearn.autolog(log_input_examples=True, log_model_signatures=True)
+    mlflow.sklearn.autolog(log_input_examples=True, log_model_signatures=True,
+                           disable=ts.streaming)
 
     with mlflow.start_run(run_name="rf_regressor"):
-        model = train_model(X_train, y_train, **model_params)
+        model = fit_model(ts, cfg)
+        X_train, X_test = ts.X_train, ts.X_test
         y_pred = model.predict(X_test)
-        mae = mean_absolute_error(y_test, y_pred)
+        mae = mean_absolute_error(ts.y_test, y_pred)
         mlflow.log_metric("mae_holdout", mae)
 
         model_path = artifacts_dir / "model.joblib"
         save_model(model, str(model_path))
         mlflow.log_artifact(str(model_path))
 
+        # Uppslagstabell (dist x timme) och komprimerad skog bredvid modellen, med mått mot holdout
+        for name, path in training_artifacts(model, ts, cfg, artifacts_dir, model_path).items():
+            mlflow.log_artifact(str(path))
+            print(f"Saved {name} → {path}")
+        if ts.params:
+            mlflow.log_params(ts.params)
+        mlflow.log_metrics(ts.metrics)
+
         # ---- Monitoring hook: generate Evidently data drift report (train vs test) ----
         #report = Report(metrics=[DataDriftPreset()])
         # Build small dataframes to compare distributional drift on the features
@@ -63,8 +72,8 @@ def main(config_path: str):
 
         if EVIDENTLY_OK:
             from pandas import DataFrame
-            df_train = DataFrame(X_train, columns=X.columns)
-            df_test = DataFrame(X_test, columns=X.columns)
+            df_train = DataFrame(X_train, columns=X_train.columns)
+            df_test = DataFrame(X_test, columns=X_train.columns)
             report = Report(metrics=[DataDriftPreset()])
             report.run(reference_data=df_train, current_data=df_test)
             report_path = artifacts_dir.parent / "evidently_data_drift_report.html"
@@ -78,5 +87,6 @@ def main(config_path: str):
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--config", default="configs/training.yaml")
+    ap.add_argument("--no-feature-cache", action="store_true", help="read and featurize the data even if cached")
     args = ap.parse_args()
-    main(args.config)
+    main(args.config, not args.no_feature_cache)
@@ -0,0 +1,88 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .timeparse import hour_from_iso
+
+class PredictionCache:
+    """Thread-safe LRU + TTL cache of predictions keyed on quantized trips.
+
+    Raw trips are keyed on pickup/dropoff coordinates rounded to `precision`
+    decimals (4 is roughly 11 m) plus the pickup hour; featurized requests on
+    (dist, hour). Entries belong to one model object: the first lookup with a
+    different model drops everything. The optional hooks let callers export
+    hit/miss/eviction counts; on_evict gets (reason, count) with reason one of
+    "lru", "ttl" or "model_changed".
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 300.0, precision: int = 4,
+                 on_hit: Optional[Callable[[], Any]] = None,
+                 on_miss: Optional[Callable[[], Any]] = None,
+                 on_evict: Optional[Callable[[str, int], Any]] = None):
+        self.max_size = max(1, int(max_size))
+        self.ttl = float(ttl_seconds)
+        self.precision = int(precision)
+        self._on_hit = on_hit
+        self._on_miss = on_miss
+        self._on_evict = on_evict
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._model_ref = None
+        self._lock = threading.Lock()
+
+    def key(self, payload: Dict[str, Any]) -> Hashable:
+        if "dist" in payload and "hour" in payload:
+            return ("f", round(float(payload["dist"]), self.precision + 2), int(payload["hour"]))
+        ts = payload["pickup_datetime"]
+        return (round(payload["pickup_lat"], self.precision), round(payload["pickup_lon"], self.precision),
+                round(payload["dropoff_lat"], self.precision), round(payload["dropoff_lon"], self.precision),
+                hour_from_iso(ts) if isinstance(ts, str) else ts.hour)
+
+    def _evicted(self, reason: str, count: int = 1):
+        if self._on_evict is not None and count:
+            self._on_evict(reason, count)
+
+    def _bind(self, model):
+        # Called with the lock held
+        if self._model_ref is None or self._model_ref() is not model:
+            self._evicted("model_changed", len(self._data))
+            self._data.clear()
+            self._model_ref = weakref.ref(model)
+
+    def get(self, model, payload: Dict[str, Any]) -> Optional[float]:
+        k = self.key(payload)
+        with self._lock:
+            self._bind(model)
+            entry = self._data.get(k)
+            if entry is not None and entry[1] < time.monotonic():
+                del self._data[k]
+                self._evicted("ttl")
+                entry = None
+            if entry is not None:
+                self._data.move_to_end(k)
+        if entry is None:
+            if self._on_miss is not None:
+                self._on_miss()
+            return None
+        if self._on_hit is not None:
+            self._on_hit()
+        return entry[0]
+
+    def put(self, model, payload: Dict[str, Any], value: float):
+        k = self.key(payload)
+        with self._lock:
+            self._bind(model)
+            self._data[k] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(k)
+            if len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self._evicted("lru")
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._model_ref = None
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,117 @@
+# Thread budget shared by serving and training: sizes gunicorn workers, sklearn
+# n_jobs, the per-worker inference pool and native (BLAS/OpenMP) pools from the
+# CPUs the container may use, so the layers don't multiply past the core count.
+# Standard library only at import time: docker/gunicorn_conf.py loads it before numpy.
+import math
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+CONCURRENCY_CONFIG = "configs/concurrency.yaml"
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+# Number of serving processes, exported by docker/gunicorn_conf.py (gunicorn reads it too)
+PROCESSES_ENV_VAR = "WEB_CONCURRENCY"
+NATIVE_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                          "BLIS_NUM_THREADS", "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+@dataclass(frozen=True)
+class ThreadBudget:
+    cpus: int
+    workers: int            # processes (gunicorn workers; 1 for training)
+    inference_threads: int  # per-process threads calling model.predict
+    n_jobs: int             # sklearn n_jobs inside one call
+    native_threads: int     # BLAS/OpenMP threads per process
+
+def _cgroup_cpu_limit(root: Path = CGROUP_ROOT) -> Optional[float]:
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    try:
+        quota, period = (root / "cpu.max").read_text().split()
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    # cgroup v1
+    try:
+        quota = int((root / "cpu" / "cpu.cfs_quota_us").read_text())
+        period = int((root / "cpu" / "cpu.cfs_period_us").read_text())
+        return None if quota <= 0 else quota / period
+    except (OSError, ValueError):
+        return None
+
+def available_cpus(root: Path = CGROUP_ROOT) -> int:
+    """CPUs this process may use: affinity mask capped by the cgroup CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit(root)
+    if limit is not None:
+        cpus = min(cpus, max(1, math.ceil(limit)))
+    return max(1, cpus)
+
+def load_concurrency_config(path: str = CONCURRENCY_CONFIG) -> Dict[str, Any]:
+    p = Path(path)
+    if not p.exists():
+        return {}
+    import yaml
+    return yaml.safe_load(p.read_text()) or {}
+
+def _value(v, auto: int) -> int:
+    return auto if v is None or v == "auto" else int(v)
+
+def serving_processes() -> int:
+    """Serving processes actually running: what gunicorn_conf exported, else 1 (plain uvicorn)."""
+    try:
+        return max(1, int(os.environ.get(PROCESSES_ENV_VAR, 1)))
+    except ValueError:
+        return 1
+
+def plan_threads(role: str, cfg: Optional[Dict[str, Any]] = None,
+                 processes: Optional[int] = None) -> ThreadBudget:
+    """Resolve the "auto" entries of the `role` section ("serving" or "training").
+
+    Serving defaults to one worker per CPU, each scoring with one thread and
+    single-threaded native pools; training to one process using every CPU
+    through sklearn n_jobs, again with native pools pinned to one thread so
+    joblib's workers do not each start a full BLAS pool. A serving process
+    passes `processes` (serving_processes()) so the CPUs are split over the
+    workers that really exist rather than the configured count.
+    """
+    cfg = load_concurrency_config() if cfg is None else cfg
+    cpus = max(1, _value(cfg.get("cpus"), available_cpus()))
+    section = cfg.get(role, {}) or {}
+    if role == "serving":
+        workers = max(1, processes if processes is not None else _value(section.get("workers"), cpus))
+        return ThreadBudget(
+            cpus=cpus,
+            workers=workers,
+            inference_threads=max(1, _value(section.get("inference_threads"), cpus // workers)),
+            n_jobs=_value(section.get("n_jobs"), 1),
+            native_threads=max(1, _value(section.get("native_threads"), 1)),
+        )
+    if role == "training":
+        return ThreadBudget(
+            cpus=cpus,
+            workers=1,
+            inference_threads=1,
+            n_jobs=_value(section.get("n_jobs"), cpus),
+            native_threads=max(1, _value(section.get("native_threads"), 1)),
+        )
+    raise ValueError(f"Unknown concurrency role: {role!r}")
+
+def export_native_thread_env(budget: ThreadBudget):
+    """Set the *_NUM_THREADS variables; only effective before numpy is imported."""
+    for var in NATIVE_THREAD_ENV_VARS:
+        os.environ[var] = str(budget.native_threads)
+
+def apply_thread_limits(budget: ThreadBudget):
+    """Cap already-loaded native thread pools via threadpoolctl, if installed.
+
+    Returns the threadpoolctl limiter (call restore_original_limits() to undo)
+    or None.
+    """
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return None
+    return threadpool_limits(limits=budget.native_threads)
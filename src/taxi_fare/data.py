@@ -1,9 +1,203 @@
+import datetime as dt
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 import pandas as pd
 
-def load_training_data(path: str) -> pd.DataFrame:
+FORMATS = ("csv", "parquet", "dataset")
+# Directory datasets: <root>/pickup_date=YYYY-MM-DD/*.parquet (hive layout)
+PARTITION_COL = "pickup_date"
+
+def training_schema(mapping: dict, target_col: str, datetime_col: str,
+                    float32: bool = True) -> Dict[str, str]:
+    """Columns training needs and their compact dtypes: the mapped coordinates
+    and the target as float32 (float64 with float32=False), the timestamp as
+    str so its written offset survives for timeparse."""
+    num = "float32" if float32 else "float64"
+    schema = {src: num for src in mapping}
+    schema[target_col] = num
+    schema[datetime_col] = "str"
+    return schema
+
+def detect_format(path: Union[str, Path]) -> str:
+    if Path(path).is_dir():
+        return "dataset"
+    suffixes = [s.lower() for s in Path(path).suffixes]
+    if ".parquet" in suffixes or ".pq" in suffixes:
+        return "parquet"
+    return "csv"
+
+def load_training_data(path: str, columns: Optional[Dict[str, str]] = None, fmt: Optional[str] = None,
+                       chunksize: Optional[int] = None, start: Optional[str] = None,
+                       end: Optional[str] = None) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """Read a CSV or Parquet file or a date-partitioned directory, optionally only
+    `columns` (name -> dtype, see training_schema; None keeps the inferred type).
+
+    The format follows the path (directory, suffix) unless `fmt` is given.
+    CSV is parsed by pyarrow (the pandas C parser is the fallback when
+    pyarrow is missing); its timestamp columns stay strings as written. For a directory, `start`/`end` (inclusive
+    YYYY-MM-DD) select the pickup dates: partitions outside the window are
+    never opened and the filter is pushed into the Parquet scan. With
+    `chunksize` an iterator of frames of that many rows is returned
+    instead; their indexes continue from chunk to chunk.
+    """
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(f"Data file not found: {p}")
-    df = pd.read_csv(p)
+    fmt = fmt or detect_format(p)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown data format {fmt!r}; expected one of {FORMATS}")
+    if (start or end) and fmt != "dataset":
+        raise ValueError("A training window needs a date-partitioned dataset directory")
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        if fmt != "csv":
+            raise
+        return _read_csv_pandas(p, columns, chunksize)
+    if fmt == "dataset":
+        scanner = _scanner(p, columns, start, end, chunksize)
+        if chunksize:
+            return _frames((_cast(b, columns) for b in scanner.to_batches()), chunksize)
+        return _to_pandas(_cast(scanner.to_table(), columns))
+    if chunksize:
+        return _frames(_batches(p, fmt, columns, chunksize), chunksize)
+    return _to_pandas(_read_table(p, fmt, columns))
+
+def partition_dates(root: Union[str, Path]) -> List[str]:
+    """Sorted pickup dates present in a partitioned dataset directory."""
+    if not Path(root).exists():
+        raise FileNotFoundError(f"Data file not found: {root}")
+    if not Path(root).is_dir():
+        raise ValueError(f"A training window needs a date-partitioned dataset directory, not {root} "
+                         "(see scripts/partition_data.py)")
+    prefix = PARTITION_COL + "="
+    return sorted(d.name[len(prefix):] for d in Path(root).iterdir() if d.is_dir() and d.name.startswith(prefix))
+
+def training_window(root: Union[str, Path], days: Optional[int] = None, start: Optional[str] = None,
+                    end: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+    """(start, end) dates for load_training_data; `days` counts back from `end`,
+    which defaults to the newest partition."""
+    if days:
+        if end is None:
+            dates = partition_dates(root)
+            if not dates:
+                raise ValueError(f"No {PARTITION_COL}= partitions under {root}")
+            end = dates[-1]
+        start = (dt.date.fromisoformat(str(end)) - dt.timedelta(days=int(days) - 1)).isoformat()
+    return (str(start) if start else None), (str(end) if end else None)
+
+def _partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    return ds.partitioning(pa.schema([(PARTITION_COL, pa.string())]), flavor="hive")
+
+def _scanner(root: Path, columns, start, end, chunksize):
+    import pyarrow.dataset as ds
+    dataset = ds.dataset(root, format="parquet", partitioning=_partitioning())
+    expr = None
+    # ISO dates compare correctly as strings
+    if start:
+        expr = ds.field(PARTITION_COL) >= str(start)
+    if end:
+        expr = ds.field(PARTITION_COL) <= str(end) if expr is None else expr & (ds.field(PARTITION_COL) <= str(end))
+    kwargs = {"batch_size": chunksize} if chunksize else {}
+    return dataset.scanner(columns=list(columns) if columns else None, filter=expr, **kwargs)
+
+def write_partitioned(frames, root: Union[str, Path], datetime_col: str) -> int:
+    """Write frames (e.g. load_training_data chunks) as a pickup-date partitioned
+    Parquet dataset under `root`; returns the row count. The date is the one
+    written in the timestamp, like the hour feature (see timeparse)."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    rows = 0
+    for i, df in enumerate(frames):
+        df = df.assign(**{PARTITION_COL: pickup_dates(df[datetime_col])})
+        ds.write_dataset(pa.Table.from_pandas(df, preserve_index=False), root, format="parquet",
+                         partitioning=_partitioning(), basename_template=f"part-{i}-{{i}}.parquet",
+                         existing_data_behavior="overwrite_or_ignore")
+        rows += len(df)
+    return rows
+
+def pickup_dates(col: pd.Series) -> pd.Series:
+    """YYYY-MM-DD of every timestamp (ISO strings are sliced, not parsed)."""
+    from .timeparse import ISO, detect_format as detect_ts_format
+    if not hasattr(col, "dt") and len(col) and detect_ts_format(col.iloc[0]) == ISO:
+        return col.str.slice(0, 10)
+    ts = col if hasattr(col, "dt") else pd.to_datetime(col, format="mixed")
+    return ts.dt.strftime("%Y-%m-%d")
+
+def _arrow_type(dtype: str):
+    import pyarrow as pa
+    return pa.string() if dtype == "str" else pa.from_numpy_dtype(dtype)
+
+def _csv_options(p: Path, columns):
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    if columns is None:
+        # pyarrow would turn ISO timestamps into UTC; keep every one as written (str), like training_schema
+        with pacsv.open_csv(p) as reader:
+            inferred = reader.schema
+        return pacsv.ConvertOptions(column_types={f.name: pa.string() for f in inferred
+                                                  if pa.types.is_timestamp(f.type)})
+    return pacsv.ConvertOptions(include_columns=list(columns),
+                                column_types={c: _arrow_type(d) for c, d in columns.items() if d})
+
+def _cast(table, columns):
+    # Parquet carries its own types: narrow the numeric ones, leave timestamps as they are
+    if columns is None:
+        return table
+    import pyarrow as pa
+    fields = []
+    for field in table.schema:
+        dtype = columns.get(field.name)
+        if dtype and dtype != "str" and (pa.types.is_integer(field.type) or pa.types.is_floating(field.type)):
+            field = field.with_type(_arrow_type(dtype))
+        fields.append(field)
+    return table.cast(pa.schema(fields))
+
+def _read_table(p: Path, fmt: str, columns):
+    if fmt == "csv":
+        import pyarrow.csv as pacsv
+        return pacsv.read_csv(p, convert_options=_csv_options(p, columns))
+    import pyarrow.parquet as pq
+    return _cast(pq.read_table(p, columns=list(columns) if columns else None), columns)
+
+def _batches(p: Path, fmt: str, columns, chunksize: int):
+    if fmt == "csv":
+        import pyarrow.csv as pacsv
+        with pacsv.open_csv(p, convert_options=_csv_options(p, columns)) as reader:
+            yield from reader
+        return
+    import pyarrow.parquet as pq
+    with pq.ParquetFile(p) as f:
+        for batch in f.iter_batches(batch_size=chunksize, columns=list(columns) if columns else None):
+            yield _cast(batch, columns) if columns else batch
+
+def _frames(batches, chunksize: int) -> Iterator[pd.DataFrame]:
+    # Re-cut the reader's record batches into frames of exactly `chunksize` rows (the last may be short)
+    import pyarrow as pa
+    buf: List = []
+    n = start = 0
+    for batch in batches:
+        buf.append(batch)
+        n += batch.num_rows
+        while n >= chunksize:
+            table = pa.Table.from_batches(buf)
+            yield _to_pandas(table.slice(0, chunksize), start)
+            start += chunksize
+            rest = table.slice(chunksize)
+            buf, n = rest.to_batches(), rest.num_rows
+    if n:
+        yield _to_pandas(pa.Table.from_batches(buf), start)
+
+def _to_pandas(table, start: int = 0) -> pd.DataFrame:
+    df = table.to_pandas()
+    if start:
+        df.index = pd.RangeIndex(start, start + len(df))
     return df
+
+def _read_csv_pandas(p: Path, columns, chunksize):
+    dtype = None if columns is None else {c: (str if d == "str" else d) for c, d in columns.items() if d}
+    return pd.read_csv(p, usecols=list(columns) if columns else None, dtype=dtype, chunksize=chunksize)
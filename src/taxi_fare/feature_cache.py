@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+from . import __version__
+from .data import load_training_data, training_schema
+from .features import build_features
+
+# Modules whose code decides what build_features / load_training_data return
+_CODE = ("data.py", "features.py", "timeparse.py")
+_CHUNK = 1 << 20
+
+def code_version() -> str:
+    h = hashlib.blake2b(__version__.encode(), digest_size=16)
+    for name in _CODE:
+        h.update((Path(__file__).parent / name).read_bytes())
+    return h.hexdigest()
+
+class FeatureCache:
+    """Feature matrices (X) and targets (y) on disk, keyed by a hash of the source data,
+    the feature configuration and the feature code.
+
+    Each entry is a directory of .npy files, one per column, that `get`
+    memory-maps: a hit costs no parsing and no copy, and the pages are only
+    read as training touches them. Content hashes of source files are
+    remembered per (path, size, mtime), so an unchanged file is hashed
+    once. After every `put`, entries older than `max_age_seconds` go first,
+    then the least recently used ones until the cache fits in `max_bytes`.
+    """
+
+    def __init__(self, root: Union[str, Path], max_bytes: Optional[int] = None,
+                 max_age_seconds: Optional[float] = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+
+    @classmethod
+    def from_config(cls, cfg: dict, base: Union[str, Path, None] = None) -> "FeatureCache":
+        root = Path(cfg.get("dir", "artifacts/feature_cache"))
+        if base is not None and not root.is_absolute():
+            root = Path(base) / root
+        max_gb, max_days = cfg.get("max_gb"), cfg.get("max_age_days")
+        return cls(root, int(max_gb * 1e9) if max_gb else None, max_days * 86400 if max_days else None)
+
+    def fingerprint(self, path: Union[str, Path]) -> str:
+        """Content hash of a file, or of every file under a directory."""
+        p = Path(path)
+        files = sorted(f for f in p.rglob("*") if f.is_file()) if p.is_dir() else [p]
+        memo_path = self.root / "fingerprints.json"
+        try:
+            memo = json.loads(memo_path.read_text())
+        except (OSError, ValueError):
+            memo = {}
+        h = hashlib.blake2b(digest_size=16)
+        changed = False
+        for f in files:
+            st = f.stat()
+            stamp = f"{f.resolve()}:{st.st_size}:{st.st_mtime_ns}"
+            if stamp not in memo:
+                # Forget hashes of earlier versions of the same file
+                memo = {k: v for k, v in memo.items() if k.rsplit(":", 2)[0] != str(f.resolve())}
+                fh = hashlib.blake2b(digest_size=16)
+                with open(f, "rb") as fp:
+                    while chunk := fp.read(_CHUNK):
+                        fh.update(chunk)
+                memo[stamp] = fh.hexdigest()
+                changed = True
+            h.update(str(f.relative_to(p) if p.is_dir() else "").encode())
+            h.update(memo[stamp].encode())
+        if changed:
+            _write_atomic(memo_path, json.dumps(memo))
+        return h.hexdigest()
+
+    def key(self, data_path: Union[str, Path], **config) -> str:
+        """Entry name for `data_path` read and featurized with `config` (any JSON-able values)."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(self.fingerprint(data_path).encode())
+        h.update(json.dumps(config, sort_keys=True, default=str).encode())
+        h.update(code_version().encode())
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[pd.DataFrame, pd.Series]]:
+        entry = self.root / key
+        try:
+            meta = json.loads((entry / "meta.json").read_text())
+        except (OSError, ValueError):
+            return None
+        X = pd.DataFrame({c: np.load(entry / f"X{i}.npy", mmap_mode="r") for i, c in enumerate(meta["columns"])},
+                         copy=False)
+        y = pd.Series(np.load(entry / "y.npy", mmap_mode="r"), name=meta["target"], copy=False)
+        os.utime(entry / "meta.json")  # recency for eviction
+        return X, y
+
+    def put(self, key: str, X: pd.DataFrame, y: pd.Series) -> Path:
+        # Written under a temporary name and renamed, so concurrent runs never see half an entry
+        tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.root))
+        for i, c in enumerate(X.columns):
+            np.save(tmp / f"X{i}.npy", np.ascontiguousarray(X[c].to_numpy()))
+        np.save(tmp / "y.npy", np.ascontiguousarray(np.asarray(y)))
+        (tmp / "meta.json").write_text(json.dumps({"columns": list(X.columns), "target": y.name,
+                                                   "rows": len(X), "created": time.time()}))
+        entry = self.root / key
+        try:
+            tmp.rename(entry)
+        except OSError:  # another run stored it first
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict(keep=key)
+        return entry
+
+    def entries(self):
+        """(key, bytes, last used) for every complete entry, least recently used first."""
+        out = []
+        for entry in self.root.iterdir():
+            meta = entry / "meta.json"
+            if entry.is_dir() and meta.exists():
+                out.append((entry.name, sum(f.stat().st_size for f in entry.iterdir()), meta.stat().st_mtime))
+        return sorted(out, key=lambda e: e[2])
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        entries = self.entries()
+        total = sum(e[1] for e in entries)
+        now = time.time()
+        removed = 0
+        for name, size, used in entries:
+            if name == keep:
+                continue
+            too_old = self.max_age_seconds is not None and now - used > self.max_age_seconds
+            too_big = self.max_bytes is not None and total > self.max_bytes
+            if not (too_old or too_big):
+                continue
+            shutil.rmtree(self.root / name, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for name, _, _ in self.entries():
+            shutil.rmtree(self.root / name, ignore_errors=True)
+
+def training_features(data_path: Union[str, Path], mapping: dict, target_col: str, datetime_col: str,
+                      data_cfg: Optional[dict] = None, start: Optional[str] = None, end: Optional[str] = None,
+                      cache: Optional[FeatureCache] = None):
+    """(X, y, df) for training: from `cache` when it holds this data and configuration,
+    else loaded (see load_training_data; `data_cfg` is the training.yaml `data:`
+    block), featurized and stored. df is None on a cache hit, nothing was read."""
+    d = data_cfg or {}
+    schema = training_schema(mapping, target_col, datetime_col, d.get("float32", True))
+    key = None
+    if cache is not None:
+        key = cache.key(data_path, schema=schema, mapping=mapping, datetime_col=datetime_col,
+                        target_col=target_col, fmt=d.get("format"), start=start, end=end)
+        hit = cache.get(key)
+        if hit is not None:
+            return hit[0], hit[1], None
+    df = load_training_data(str(data_path), schema, d.get("format"), d.get("chunksize"), start, end)
+    if d.get("chunksize"):
+        df = pd.concat(df)
+    X = build_features(df, mapping, datetime_col)
+    y = df[target_col]
+    if cache is not None:
+        cache.put(key, X, y)
+    return X, y, df
+
+def _write_atomic(path: Path, text: str):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
@@ -1,13 +1,99 @@
-import pandas as pd
+import math
+from typing import TYPE_CHECKING, Any, Dict, Optional
 import numpy as np
+from .timeparse import hour_from_iso, hours_from_column
+from .zones import ZONE_FEATURES
 
-def build_features(df: pd.DataFrame,
+if TYPE_CHECKING:
+    import pandas as pd
+    from .poi import PoiIndex
+    from .zones import ZonePairStats
+
+FEATURE_COLUMNS = ["dist", "hour"]
+
+# Rows per block in build_features: bounds the float64 temporaries
+BLOCK_ROWS = 1 << 18
+
+def feature_columns(zones: Optional["ZonePairStats"] = None, poi: Optional["PoiIndex"] = None):
+    return (FEATURE_COLUMNS + (ZONE_FEATURES if zones is not None else [])
+            + (poi.feature_names if poi is not None else []))
+
+def build_features(df: "pd.DataFrame",
                    mapping: dict,
-                   datetime_col: str) -> pd.DataFrame:
-    # Rename to canonical names using mapping
-    df = df.rename(columns=mapping).copy()
-    # Basic engineered features
-    df["dist"] = np.sqrt((df["dropoff_lat"]-df["pickup_lat"])**2 +
-                         (df["dropoff_lon"]-df["pickup_lon"])**2)
-    df["hour"] = pd.to_datetime(df[datetime_col]).dt.hour
-    return df[["dist","hour"]]
+                   datetime_col: str,
+                   zones: Optional["ZonePairStats"] = None,
+                   poi: Optional["PoiIndex"] = None) -> "pd.DataFrame":
+    """dist (float32) and hour (int8; float32 with NaN where the timestamp is missing)
+    for every row of `df`, keeping its index.
+
+    With `zones`, the zone-pair median fare and distance (float32) follow as
+    zone_fare / zone_dist; with `poi`, the km from pickup and dropoff to the
+    nearest POI of each category (poi.feature_names).
+
+    `mapping` maps source column names to the canonical pickup/dropoff names.
+    Only those columns and `datetime_col` are read; nothing else in `df` is
+    copied. Distances are computed in float64 block by block and stored as
+    float32, which is what the tree models compare against anyway.
+    """
+    # pandas is imported on first use so the single-trip serving path never loads it
+    import pandas as pd
+    source = {canonical: src for src, canonical in mapping.items()}
+    # Raw column views; each block is upcast to float64 on its own, never the whole column
+    coords = [df[source.get(c, c)].to_numpy()
+              for c in ("pickup_lat", "pickup_lon", "dropoff_lat", "dropoff_lon")]
+    n = len(df)
+    dist = np.empty(n, dtype=np.float32)
+    zone = np.empty((n, len(ZONE_FEATURES)), dtype=np.float32) if zones is not None else None
+    near = np.empty((n, len(poi.feature_names)), dtype=np.float32) if poi is not None else None
+    for s in range(0, n, BLOCK_ROWS):
+        e = min(s + BLOCK_ROWS, n)
+        block = [np.asarray(c[s:e], dtype=np.float64) for c in coords]
+        plat, plon, dlat, dlon = block
+        dist[s:e] = np.sqrt((dlat - plat)**2 + (dlon - plon)**2)
+        if zone is not None:
+            zone[s:e] = zones.features(*block)
+        if near is not None:
+            near[s:e] = poi.features(*block)
+    hour = hours_from_column(df[source.get(datetime_col, datetime_col)])
+    columns = {"dist": dist, "hour": hour}
+    if zone is not None:
+        columns.update(zone_fare=zone[:, 0], zone_dist=zone[:, 1])
+    if near is not None:
+        columns.update(zip(poi.feature_names, near.T))
+    return pd.DataFrame(columns, index=df.index, copy=False)[feature_columns(zones, poi)]
+
+class RawCoordinatesRequired(ValueError):
+    """A featurized {dist, hour} trip was given to a model that has zone/POI features."""
+
+    def __init__(self):
+        super().__init__("This model uses spatial features and needs raw pickup/dropoff coordinates")
+
+def features_row(payload: Dict[str, Any], out: Optional[np.ndarray] = None,
+                 zones: Optional["ZonePairStats"] = None, poi: Optional["PoiIndex"] = None) -> np.ndarray:
+    """Single-trip equivalent of build_features without building a DataFrame.
+
+    Accepts either a raw trip or an already featurized {dist, hour} payload and
+    fills a (1, 2) float64 row, optionally into a caller-provided buffer.
+    With `zones` / `poi` the row has their columns as well, which needs the
+    raw coordinates.
+    """
+    if out is None:
+        out = np.empty((1, len(feature_columns(zones, poi))), dtype=np.float64)
+    if "dist" in payload and "hour" in payload:
+        if zones is not None or poi is not None:
+            raise RawCoordinatesRequired()
+        out[0, 0] = payload["dist"]
+        out[0, 1] = payload["hour"]
+        return out
+    out[0, 0] = math.sqrt((payload["dropoff_lat"]-payload["pickup_lat"])**2 +
+                          (payload["dropoff_lon"]-payload["pickup_lon"])**2)
+    ts = payload["pickup_datetime"]
+    out[0, 1] = hour_from_iso(ts) if isinstance(ts, str) else ts.hour
+    coords = (payload["pickup_lat"], payload["pickup_lon"], payload["dropoff_lat"], payload["dropoff_lon"])
+    col = len(FEATURE_COLUMNS)
+    if zones is not None:
+        out[0, col], out[0, col + 1] = zones.features_one(*coords)
+        col += len(ZONE_FEATURES)
+    if poi is not None:
+        out[0, col:] = poi.features_one(*coords)
+    return out
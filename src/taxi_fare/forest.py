@@ -0,0 +1,203 @@
+from typing import Optional, Sequence
+import numpy as np
+
+def _flatten_tree(t, max_depth: Optional[int] = None):
+    """One sklearn tree as (feature, threshold, children, value, depth, missing_left), nodes renumbered from 0.
+
+    Nodes deeper than `max_depth` are dropped and the ones at `max_depth` turned
+    into leaves. Leaves point at themselves (see CompiledForest).
+    """
+    left, right = t.children_left, t.children_right
+    depth = np.zeros(t.node_count, dtype=np.int64)
+    frontier = np.zeros(1, dtype=np.int64)
+    while frontier.size:
+        parents = frontier[left[frontier] != -1]
+        frontier = np.concatenate([left[parents], right[parents]])
+        depth[frontier] = np.tile(depth[parents] + 1, 2)
+    limit = t.max_depth if max_depth is None else min(max_depth, t.max_depth)
+    kept = depth <= limit
+    leaf = (left == -1) | (depth == limit)
+    keep = np.flatnonzero(kept)
+    new = np.cumsum(kept) - 1
+    is_leaf = leaf[keep]
+    own = np.arange(len(keep), dtype=np.int64)
+    children = np.column_stack([np.where(is_leaf, own, new[left[keep]]),
+                                np.where(is_leaf, own, new[right[keep]])])
+    # Where sklearn sends NaN at each split (older trees have no such array: left)
+    missing = getattr(t, "missing_go_to_left", None)
+    missing_left = np.ones(len(keep), dtype=bool) if missing is None else np.asarray(missing)[keep].astype(bool)
+    return (np.where(is_leaf, 0, t.feature[keep]), np.where(is_leaf, 0.0, t.threshold[keep]),
+            children, t.value[keep, 0, 0], int(depth[keep].max()), missing_left)
+
+class CompiledForest:
+    """A tree-averaging ensemble flattened into contiguous NumPy arrays.
+
+    All trees share one node table: `feature`, `threshold`, `value` and
+    `children` (interleaved left/right, so the next node is
+    children[2 * node + (x > threshold)], or by `missing_left` for a NaN x,
+    as in sklearn). `roots` and `depths` give each
+    tree's root node and depth. Leaves point at themselves, which lets a
+    cursor step `depth` times without checking for leaves. Small batches
+    step all trees at once; large ones go tree by tree so each tree's nodes
+    stay in cache. Only NumPy is needed to load and evaluate it.
+
+    `threshold` and `value` are float64 unless given as float32 (see
+    astype), which halves their size; thresholds are rounded down so float32
+    inputs take the same branches as with the float64 originals.
+    """
+
+    # Above this many rows, per-tree traversal beats the all-trees gather
+    TREE_MAJOR_MIN_ROWS = 256
+
+    def __init__(self, feature, threshold, children, value, roots, depths,
+                 feature_names: Optional[Sequence[str]] = None, missing_left=None):
+        dtype = np.float32 if np.asarray(threshold).dtype == np.float32 else np.float64
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=dtype)
+        self.children = np.ascontiguousarray(children, dtype=np.int32).reshape(-1)
+        self.value = np.ascontiguousarray(value, dtype=dtype)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.depths = np.ascontiguousarray(depths, dtype=np.int32)
+        self.missing_left = np.ascontiguousarray(
+            np.ones(len(self.value), dtype=bool) if missing_left is None else missing_left, dtype=bool)
+        self.max_depth = int(self.depths.max())
+        self.feature_names_in_ = None if feature_names is None else np.asarray(feature_names, dtype=object)
+        self.n_features_in_ = int(self.feature.max()) + 1 if feature_names is None else len(feature_names)
+        self.zone_stats_ = None  # ZonePairStats when trained with zone features
+        self.poi_index_ = None   # PoiIndex when trained with POI distance features
+
+    @classmethod
+    def from_sklearn(cls, model, n_estimators: Optional[int] = None,
+                     max_depth: Optional[int] = None) -> "CompiledForest":
+        """Flatten a fitted tree regressor.
+
+        Keeps only the first `n_estimators` trees and cuts every tree at
+        `max_depth`; a cut node becomes a leaf predicting its own value,
+        which for sklearn regressors is the mean target of its samples.
+        """
+        # RandomForestRegressor / ExtraTreesRegressor average their trees;
+        # a lone DecisionTreeRegressor is a forest of one.
+        estimators = getattr(model, "estimators_", None)
+        if estimators is None:
+            estimators = [model]
+        if not hasattr(estimators[0], "tree_") or getattr(model, "n_outputs_", 1) != 1:
+            raise TypeError(f"Cannot compile {type(model).__name__}: expected a single-output tree regressor")
+        feats, thrs, children, vals, roots, depths, missing = [], [], [], [], [], [], []
+        offset = 0
+        for est in estimators[:n_estimators]:
+            f, thr, ch, v, depth, miss = _flatten_tree(est.tree_, max_depth)
+            missing.append(miss)
+            feats.append(f)
+            thrs.append(thr)
+            children.append(ch + offset)
+            vals.append(v)
+            roots.append(offset)
+            depths.append(depth)
+            offset += len(v)
+        forest = cls(np.concatenate(feats), np.concatenate(thrs), np.concatenate(children),
+                     np.concatenate(vals), roots, depths, getattr(model, "feature_names_in_", None),
+                     np.concatenate(missing))
+        forest.zone_stats_ = getattr(model, "zone_stats_", None)
+        forest.poi_index_ = getattr(model, "poi_index_", None)
+        return forest
+
+    def astype(self, dtype) -> "CompiledForest":
+        """Copy with thresholds and values stored as `dtype` (float32 or float64)."""
+        threshold = self.threshold
+        if np.dtype(dtype) == np.float32 and threshold.dtype != np.float32:
+            # Largest float32 <= threshold: for float32 x, x > t32 exactly when x > t64
+            t32 = threshold.astype(np.float32)
+            threshold = np.where(t32 > threshold, np.nextafter(t32, np.float32(-np.inf)), t32)
+        forest = CompiledForest(self.feature, np.asarray(threshold, dtype=dtype), self.children,
+                                self.value.astype(dtype), self.roots, self.depths,
+                                None if self.feature_names_in_ is None else list(self.feature_names_in_),
+                                self.missing_left)
+        forest.zone_stats_ = getattr(self, "zone_stats_", None)
+        forest.poi_index_ = getattr(self, "poi_index_", None)
+        return forest
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.value)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.children,
+                                      self.value, self.roots, self.depths, self.missing_left))
+
+    def _prepare(self, X):
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n = X.shape[0]
+        # Column-major flat copy: value of feature f for row r is Xt[f * n + r]
+        Xt = np.ascontiguousarray(X.T).reshape(-1)
+        # Forests pickled before missing_left existed keep sending NaN left
+        step = self._step_nan if getattr(self, "missing_left", None) is not None and np.isnan(Xt).any() else self._step
+        return Xt, n, step
+
+    def _tree_leaves(self, Xt, n, step):
+        rows = np.arange(n)
+        for root, depth in zip(self.roots, self.depths):
+            node = np.full(n, root, dtype=np.int64)
+            for _ in range(depth):
+                node = step(node, Xt[self.feature[node] * n + rows])
+            yield node
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf node index per (row, tree)."""
+        Xt, n, step = self._prepare(X)
+        if n >= self.TREE_MAJOR_MIN_ROWS:
+            out = np.empty((n, self.n_estimators), dtype=np.int32)
+            for t, node in enumerate(self._tree_leaves(Xt, n, step)):
+                out[:, t] = node
+            return out
+        rows = np.arange(n)[:, None]
+        node = np.broadcast_to(self.roots.astype(np.int64), (n, self.n_estimators))
+        for _ in range(self.max_depth):
+            node = step(node, Xt[self.feature[node] * n + rows])
+        return node
+
+    def iter_tree_values(self, X):
+        """Each tree's prediction for every row, one tree at a time (n values per tree)."""
+        Xt, n, step = self._prepare(X)
+        for node in self._tree_leaves(Xt, n, step):
+            yield self.value[node]
+
+    def _step(self, node, x):
+        return self.children[2 * node + (x > self.threshold[node])]
+
+    def _step_nan(self, node, x):
+        # NaN compares False, so it would always go left; follow the training-time direction instead
+        return self.children[2 * node + ((x > self.threshold[node]) | (np.isnan(x) & ~self.missing_left[node]))]
+
+    def predict(self, X) -> np.ndarray:
+        return self.value[self.apply(X)].mean(axis=1, dtype=np.float64)
+
+    def save(self, path: str):
+        zone_stats = getattr(self, "zone_stats_", None)
+        extra = {} if zone_stats is None else zone_stats.arrays(prefix="zones_")
+        poi_index = getattr(self, "poi_index_", None)
+        if poi_index is not None:
+            extra.update(poi_index.arrays(prefix="poi_"))
+        np.savez(path, feature=self.feature, threshold=self.threshold, children=self.children,
+                 value=self.value, roots=self.roots, depths=self.depths, missing_left=self.missing_left,
+                 feature_names=np.asarray([] if self.feature_names_in_ is None
+                                          else [str(c) for c in self.feature_names_in_]), **extra)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledForest":
+        from .poi import PoiIndex
+        from .zones import ZonePairStats
+        with np.load(path) as z:
+            names = [str(c) for c in z["feature_names"]] or None
+            forest = cls(z["feature"], z["threshold"], z["children"], z["value"],
+                         z["roots"], z["depths"], names, z["missing_left"] if "missing_left" in z else None)
+            forest.zone_stats_ = ZonePairStats.from_arrays(z, prefix="zones_")
+            forest.poi_index_ = PoiIndex.from_arrays(z, prefix="poi_")
+            return forest
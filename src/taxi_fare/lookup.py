@@ -0,0 +1,81 @@
+from typing import Dict, Optional
+import numpy as np
+
+HOURS = 24
+
+class FareLookupTable:
+    """Model output tabulated on a dense (distance bucket x hour) grid.
+
+    `table[i, h]` is the model's fare at distance dist_min + i * step and
+    hour h. predict() linearly interpolates along distance within the hour
+    row, clamping distances outside the trained range to the edges, so each
+    trip costs a couple of array lookups whatever the size of the model.
+    A missing (NaN) hour falls back to the median over all hours at that
+    distance; a missing distance gives a NaN fare.
+    """
+
+    def __init__(self, dist_min: float, dist_max: float, table,
+                 error_bound: Optional[Dict[str, float]] = None):
+        self.dist_min = float(dist_min)
+        self.dist_max = float(dist_max)
+        self.table = np.ascontiguousarray(table, dtype=np.float32)
+        self.n_buckets = self.table.shape[0]
+        self.step = (self.dist_max - self.dist_min) / max(self.n_buckets - 1, 1)
+        # Column HOURS is the fallback "hour" for trips without one
+        self._grid = np.ascontiguousarray(
+            np.concatenate([self.table, np.median(self.table, axis=1, keepdims=True)], axis=1))
+        self.error_bound = dict(error_bound or {})
+
+    @classmethod
+    def from_model(cls, model, dist_min: float, dist_max: float, n_buckets: int = 256) -> "FareLookupTable":
+        import pandas as pd
+        dist = np.linspace(dist_min, dist_max, n_buckets)
+        grid = pd.DataFrame({"dist": np.repeat(dist, HOURS),
+                             "hour": np.tile(np.arange(HOURS), n_buckets)})
+        table = np.asarray(model.predict(grid)).reshape(n_buckets, HOURS)
+        return cls(dist_min, dist_max, table)
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        hour = np.clip(X[:, 1], 0, HOURS - 1)
+        hour = np.where(np.isnan(hour), HOURS, hour).astype(np.intp)
+        if self.step == 0:
+            return self._grid[0, hour].astype(np.float64)
+        pos = np.clip((X[:, 0] - self.dist_min) / self.step, 0, self.n_buckets - 1)
+        # NaN positions index bucket 0 and keep frac NaN, so their fare comes out NaN
+        i = np.minimum(np.nan_to_num(pos).astype(np.intp), self.n_buckets - 2)
+        frac = pos - i
+        lo = self._grid[i, hour]
+        hi = self._grid[i + 1, hour]
+        return lo + frac * (hi - lo)
+
+    def evaluate(self, model, X) -> Dict[str, float]:
+        """Deviation from the real model on X (e.g. the holdout set); stored as error_bound."""
+        diff = np.abs(self.predict(X) - np.asarray(model.predict(X)))
+        self.error_bound = {
+            "max_abs_err": float(diff.max()) if len(diff) else 0.0,
+            "mean_abs_err": float(diff.mean()) if len(diff) else 0.0,
+            "p99_abs_err": float(np.percentile(diff, 99)) if len(diff) else 0.0,
+        }
+        return self.error_bound
+
+    def save(self, path: str):
+        np.savez(path, table=self.table, dist_range=np.array([self.dist_min, self.dist_max]),
+                 error_keys=np.array(list(self.error_bound.keys()), dtype=str),
+                 error_values=np.array(list(self.error_bound.values()), dtype=np.float64))
+
+    @classmethod
+    def load(cls, path: str) -> "FareLookupTable":
+        with np.load(path) as z:
+            lo, hi = z["dist_range"]
+            err = dict(zip((str(k) for k in z["error_keys"]), (float(v) for v in z["error_values"])))
+            return cls(lo, hi, z["table"], err)
+
+def build_lookup_table(model, X_train, X_holdout, n_buckets: int = 256) -> FareLookupTable:
+    """Tabulate `model` over the observed training distance range and score it on the holdout."""
+    dist = np.asarray(X_train["dist"], dtype=np.float64)
+    table = FareLookupTable.from_model(model, float(dist.min()), float(dist.max()), n_buckets)
+    table.evaluate(model, X_holdout)
+    return table
@@ -1,13 +1,142 @@
-from joblib import dump, load
-from sklearn.ensemble import RandomForestRegressor
+import os
+from typing import Optional
+from .concurrency import ThreadBudget, apply_thread_limits, plan_threads
 
-def train_model(X, y, **model_params):
+def train_model(X, y, threads: Optional[ThreadBudget] = None, **model_params):
+    # Imported here so serving a compiled model never needs sklearn
+    from sklearn.ensemble import RandomForestRegressor
+    # n_jobs and native pools come from configs/concurrency.yaml unless given explicitly
+    threads = threads or plan_threads("training")
+    model_params.setdefault("n_jobs", threads.n_jobs)
     model = RandomForestRegressor(**model_params)
-    model.fit(X, y)
+    limiter = apply_thread_limits(threads)
+    try:
+        model.fit(X, y)
+    finally:
+        if limiter is not None:
+            limiter.restore_original_limits()
+    return model
+
+def train_model_streaming(chunks, trees_per_chunk: int = 10, threads: Optional[ThreadBudget] = None,
+                          **model_params):
+    """RandomForestRegressor grown chunk by chunk, for training sets larger than memory.
+
+    Every (X, y) in `chunks` adds `trees_per_chunk` trees fitted on that
+    chunk alone (warm_start), so at most two chunks are held at a time and
+    the forest ends up with trees_per_chunk * n_chunks trees; n_estimators
+    in `model_params` is ignored. A chunk under half the size of the one
+    before it (the tail of the data) is merged into that one rather than
+    getting trees of its own.
+    """
+    from sklearn.ensemble import RandomForestRegressor
+    import pandas as pd
+    threads = threads or plan_threads("training")
+    model_params.pop("n_estimators", None)
+    model_params.setdefault("n_jobs", threads.n_jobs)
+    model = RandomForestRegressor(n_estimators=0, warm_start=True, **model_params)
+    limiter = apply_thread_limits(threads)
+    try:
+        pending = None
+        for X, y in chunks:
+            if pending is not None and len(X) < len(pending[0]) // 2:
+                pending = (pd.concat([pending[0], X]), pd.concat([pending[1], y]))
+                continue
+            if pending is not None:
+                model.n_estimators += trees_per_chunk
+                model.fit(*pending)
+            pending = (X, y)
+        if pending is None:
+            raise ValueError("No training chunks")
+        model.n_estimators += trees_per_chunk
+        model.fit(*pending)
+    finally:
+        if limiter is not None:
+            limiter.restore_original_limits()
+    model.set_params(warm_start=False)
     return model
 
 def save_model(model, path: str):
-    dump(model, path)
+    # Uncompressed on purpose: joblib can only memory-map uncompressed arrays.
+    # Write then rename so a serving process watching `path` never reads a partial file.
+    from joblib import dump
+    tmp = f"{path}.tmp"
+    dump(model, tmp)
+    os.replace(tmp, path)
+
+def load_model(path: str, mmap_mode: Optional[str] = None):
+    # joblib (and sklearn, when unpickling a forest) loads here, at model load, not at import
+    from joblib import load
+    return load(path, mmap_mode=mmap_mode)
+
+DEPTH_CANDIDATES = (4, 6, 8, 10, 12, 14, 16, 20, 24)
+
+def compact_model(model, X_holdout, y_holdout, mae_tolerance: float = 0.01,
+                  depth_candidates=DEPTH_CANDIDATES, float32: bool = True, max_rows: Optional[int] = 50_000):
+    """Smallest CompiledForest whose holdout MAE stays within `mae_tolerance` of the full model.
+
+    `mae_tolerance` is relative (0.01 = at most 1 % worse). Every depth cap in
+    `depth_candidates` (plus no cap) is tried with every prefix of the trees,
+    which for a random forest is a random subset; the combination with the
+    fewest nodes wins. MAEs are measured on at most `max_rows` random holdout
+    rows, and the running mean is kept one tree at a time, so memory is a few
+    vectors of that length whatever the forest size. Returns (forest, report).
+    """
+    import numpy as np
+    from .forest import CompiledForest
+    y = np.asarray(y_holdout, dtype=np.float64)
+    if max_rows and len(y) > max_rows:
+        rows = np.sort(np.random.default_rng(0).choice(len(y), max_rows, replace=False))
+        X_holdout = X_holdout.iloc[rows] if hasattr(X_holdout, "iloc") else np.asarray(X_holdout)[rows]
+        y = y[rows]
+    mae_full = float(np.abs(np.asarray(model.predict(X_holdout)) - y).mean())
+    budget = mae_full * (1 + mae_tolerance) + 1e-12
+    best = None
+    for depth in [*sorted(depth_candidates), None]:
+        cf = CompiledForest.from_sklearn(model, max_depth=depth)
+        # maes[k-1] is the MAE of the mean of the first k trees
+        total = np.zeros(len(y))
+        maes = np.empty(cf.n_estimators)
+        for t, values in enumerate(cf.iter_tree_values(X_holdout)):
+            total += values
+            maes[t] = np.abs(total / (t + 1) - y).mean()
+        ok = np.flatnonzero(maes <= budget)
+        if not ok.size:
+            continue
+        k = int(ok[0]) + 1
+        nodes = int(cf.roots[k]) if k < cf.n_estimators else cf.n_nodes
+        if best is None or nodes < best[0]:
+            best = (nodes, k, depth)
+    _, k, depth = best
+    compact = CompiledForest.from_sklearn(model, n_estimators=k, max_depth=depth)
+    if float32:
+        compact = compact.astype(np.float32)
+    report = {
+        "mae_full": mae_full,
+        "mae_compact": float(np.abs(sum(compact.iter_tree_values(X_holdout)) / k - y).mean()),
+        "n_estimators": k,
+        "max_depth": compact.max_depth,
+        "n_nodes": compact.n_nodes,
+    }
+    return compact, report
 
-def load_model(path: str):
-    return load(path)
+def artifact_stats(path: str, X_sample, repeats: int = 200) -> dict:
+    """On-disk size, load time and median single-row / batch latency of a saved model."""
+    import time
+    import numpy as np
+    from .predict import load_model_from_path
+    start = time.perf_counter()
+    model = load_model_from_path(path)
+    load_seconds = time.perf_counter() - start
+    row = X_sample[:1]
+    model.predict(row)
+    single = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        model.predict(row)
+        single.append(time.perf_counter() - t)
+    t = time.perf_counter()
+    model.predict(X_sample)
+    batch = time.perf_counter() - t
+    return {"size_mb": os.path.getsize(path) / 1e6, "load_seconds": load_seconds,
+            "latency_ms_single": float(np.median(single)) * 1000,
+            "latency_ms_batch": batch * 1000}
@@ -0,0 +1,142 @@
+import math
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    # Vectorized over NumPy arrays (degrees)
+    lat1, lon1, lat2, lon2 = (np.radians(a) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2)**2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+def _unit_vectors(lat, lon) -> np.ndarray:
+    lat, lon = np.radians(lat), np.radians(lon)
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+class PoiIndex:
+    """Nearest point of interest per category (airport, station, hub, ...), in km.
+
+    Batches are answered by one KD-tree per category over 3-D unit vectors,
+    built once and pickled with the model (sklearn; without it a chunked
+    brute-force scan is used). The nearest chord is the nearest great-circle
+    distance, so this is exact, and several times faster than a BallTree
+    with the haversine metric. Single trips go through a memoized grid
+    instead: each `grid_step`-degree cell stores the few POIs that can be
+    nearest to any point inside it, and the exact distance is taken over
+    those, so a warm lookup costs a handful of haversines and matches the
+    tree exactly.
+    """
+
+    def __init__(self, names: Sequence[str], categories: Sequence[str], lat, lon,
+                 grid_step: float = 0.01, max_cells: int = 100_000):
+        self.names = [str(n) for n in names]
+        cats = np.asarray([str(c) for c in categories])
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.categories: List[str] = sorted(set(cats.tolist()))
+        self._members = [np.flatnonzero(cats == c) for c in self.categories]
+        self.grid_step = float(grid_step)
+        self.max_cells = int(max_cells)
+        self._trees = None
+        self._cells: Dict[tuple, list] = {}
+
+    @classmethod
+    def from_csv(cls, path: str, grid_step: float = 0.01) -> "PoiIndex":
+        """CSV with name, category, lat, lon columns; builds the trees straight away."""
+        import pandas as pd
+        df = pd.read_csv(path)
+        index = cls(df["name"], df["category"], df["lat"], df["lon"], grid_step)
+        index.build_trees()
+        return index
+
+    @property
+    def feature_names(self) -> List[str]:
+        return [f"{end}_{c}_km" for end in ("pickup", "dropoff") for c in self.categories]
+
+    def __getstate__(self):
+        # The memo grid is a per-process cache; trees and POIs are what gets shipped
+        state = dict(self.__dict__)
+        state["_cells"] = {}
+        return state
+
+    def build_trees(self):
+        try:
+            from sklearn.neighbors import KDTree
+        except ImportError:
+            return None
+        self._trees = [KDTree(_unit_vectors(self.lat[m], self.lon[m])) for m in self._members]
+        return self._trees
+
+    def nearest_km(self, lat, lon) -> np.ndarray:
+        """(n, n_categories) float32 distances from each point to the nearest POI of each category."""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        trees = self._trees if self._trees is not None else self.build_trees()
+        out = np.empty((len(lat), len(self.categories)), dtype=np.float32)
+        if trees is not None:
+            points = _unit_vectors(lat, lon)
+            for k, tree in enumerate(trees):
+                chord = tree.query(points, k=1, return_distance=True)[0][:, 0]
+                out[:, k] = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / 2, 1.0))
+            return out
+        for k, m in enumerate(self._members):
+            for s in range(0, len(lat), 4096):
+                out[s:s + 4096, k] = _haversine_km(lat[s:s + 4096, None], lon[s:s + 4096, None],
+                                                   self.lat[m], self.lon[m]).min(axis=1)
+        return out
+
+    def _candidates(self, key) -> list:
+        # POIs within d_min(center) + 2 * half-diagonal of the cell center can be
+        # nearest for some point in the cell; nothing farther can. Stored per
+        # category as (lat, cos(lat), lon) in radians, ready for nearest_km_one.
+        clat, clon = (key[0] + 0.5) * self.grid_step, (key[1] + 0.5) * self.grid_step
+        half_diag = float(_haversine_km(clat, clon, clat + self.grid_step / 2, clon + self.grid_step / 2))
+        cands = []
+        for m in self._members:
+            d = _haversine_km(clat, clon, self.lat[m], self.lon[m])
+            near = m[d <= d.min() + 2 * half_diag + 1e-9]
+            cands.append([(math.radians(self.lat[i]), math.cos(math.radians(self.lat[i])), math.radians(self.lon[i]))
+                          for i in near])
+        if len(self._cells) >= self.max_cells:
+            self._cells.clear()
+        self._cells[key] = cands
+        return cands
+
+    def nearest_km_one(self, lat: float, lon: float) -> List[float]:
+        key = (math.floor(lat / self.grid_step), math.floor(lon / self.grid_step))
+        cands = self._cells.get(key) or self._candidates(key)
+        la, lo = math.radians(lat), math.radians(lon)
+        cos_la = math.cos(la)
+        out = []
+        for points in cands:
+            best = math.inf
+            for pla, cos_pla, plo in points:
+                a = math.sin((pla - la) / 2)**2 + cos_la * cos_pla * math.sin((plo - lo) / 2)**2
+                if a < best:
+                    best = a
+            out.append(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(best)))
+        return out
+
+    def features(self, pickup_lat, pickup_lon, dropoff_lat, dropoff_lon) -> np.ndarray:
+        """(n, 2 * n_categories) float32 in feature_names order."""
+        return np.hstack([self.nearest_km(pickup_lat, pickup_lon), self.nearest_km(dropoff_lat, dropoff_lon)])
+
+    def features_one(self, pickup_lat: float, pickup_lon: float, dropoff_lat: float, dropoff_lon: float):
+        return self.nearest_km_one(pickup_lat, pickup_lon) + self.nearest_km_one(dropoff_lat, dropoff_lon)
+
+    def arrays(self, prefix: str = "") -> Dict[str, np.ndarray]:
+        cats = np.empty(len(self.lat), dtype=object)
+        for c, m in zip(self.categories, self._members):
+            cats[m] = c
+        return {f"{prefix}names": np.asarray(self.names), f"{prefix}categories": cats.astype(str),
+                f"{prefix}lat": self.lat, f"{prefix}lon": self.lon,
+                f"{prefix}grid_step": np.array(self.grid_step)}
+
+    @classmethod
+    def from_arrays(cls, z, prefix: str = "") -> Optional["PoiIndex"]:
+        if f"{prefix}lat" not in z:
+            return None
+        return cls(z[f"{prefix}names"], z[f"{prefix}categories"], z[f"{prefix}lat"], z[f"{prefix}lon"],
+                   float(z[f"{prefix}grid_step"]))
@@ -1,25 +1,154 @@
-from typing import Dict, Any
-import pandas as pd
+from typing import Dict, Any, List, Mapping, Optional
+import time
+import warnings
+import numpy as np
+from .features import RawCoordinatesRequired, build_features, feature_columns, features_row
+from .forest import CompiledForest
 from .model import load_model
 
-def predict_single(model, payload: Dict[str, Any]) -> float:
-    # Expect features already engineered externally; keep a minimal fallback:
-    if {"dist","hour"} <= set(payload.keys()):
-        X = pd.DataFrame([{"dist": payload["dist"], "hour": payload["hour"]}])
+RAW_MAPPING = {
+    "pickup_lat": "pickup_lat",
+    "pickup_lon": "pickup_lon",
+    "dropoff_lat": "dropoff_lat",
+    "dropoff_lon": "dropoff_lon",
+}
+
+def _is_featurized(payload: Dict[str, Any]) -> bool:
+    return {"dist","hour"} <= set(payload.keys())
+
+# The predict_* functions take an optional `timings` dict and fill in the
+# seconds spent in "features" and "predict" for per-stage latency metrics.
+# Models trained with spatial features carry their ZonePairStats as
+# `zone_stats_` and their PoiIndex as `poi_index_`.
+
+def _zones(model):
+    return getattr(model, "zone_stats_", None)
+
+def _poi(model):
+    return getattr(model, "poi_index_", None)
+
+def uses_spatial_features(model) -> bool:
+    """True when the model needs raw coordinates ({dist, hour} payloads are rejected)."""
+    return _zones(model) is not None or _poi(model) is not None
+
+def _predict_array(model, X: np.ndarray):
+    # The fast paths feed plain ndarrays in feature_columns order to models
+    # fitted on a DataFrame. Check that order against the model once per call,
+    # then silence sklearn's "no feature names" warning for this call only.
+    names = getattr(model, "feature_names_in_", None)
+    if names is None:
+        return model.predict(X)
+    expected = feature_columns(_zones(model), _poi(model))
+    if list(names) != expected:
+        raise ValueError(f"model expects features {list(names)}, not {expected}")
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        return model.predict(X)
+
+def _predict(model, X, timings: Optional[Dict[str, float]], features_start: float):
+    t = time.perf_counter()
+    y = _predict_array(model, X) if isinstance(X, np.ndarray) else model.predict(X)
+    if timings is not None:
+        timings["features"] = t - features_start
+        timings["predict"] = time.perf_counter() - t
+    return y
+
+def predict_single(model, payload: Dict[str, Any], timings: Optional[Dict[str, float]] = None) -> float:
+    # Fast path: fill a float row directly, no DataFrame / build_features
+    start = time.perf_counter()
+    X = features_row(payload, zones=_zones(model), poi=_poi(model))
+    y = _predict(model, X, timings, start)[0]
+    return float(y)
+
+def predict_rows(model, payloads: List[Dict[str, Any]], timings: Optional[Dict[str, float]] = None,
+                 errors: Optional[Dict[int, Exception]] = None) -> List[float]:
+    """Score a handful of trips (a coalesced /predict batch) from stacked features_row rows.
+
+    Same results as predict_batch without pandas, which only pays off for
+    larger batches. With an `errors` dict, a payload that cannot be
+    featurized is recorded there (index -> exception) and gets NaN, and the
+    other rows are still scored in one model.predict call.
+    """
+    if not payloads:
+        return []
+    start = time.perf_counter()
+    zones, poi = _zones(model), _poi(model)
+    rows, ok = [], []
+    for i, p in enumerate(payloads):
+        try:
+            rows.append(features_row(p, zones=zones, poi=poi))
+        except Exception as e:
+            if errors is None:
+                raise
+            errors[i] = e
+            continue
+        ok.append(i)
+    out = [float("nan")] * len(payloads)
+    if rows:
+        for i, y in zip(ok, _predict(model, np.vstack(rows), timings, start)):
+            out[i] = float(y)
+    return out
+
+def predict_batch(model, payloads: List[Dict[str, Any]],
+                  timings: Optional[Dict[str, float]] = None) -> List[float]:
+    """Score many trips with one build_features and one model.predict call.
+
+    Payloads may mix pre-featurized ({dist, hour}) and raw trips; results
+    come back in input order.
+    """
+    if not payloads:
+        return []
+    import pandas as pd
+    start = time.perf_counter()
+    feat_idx = [i for i, p in enumerate(payloads) if _is_featurized(p)]
+    raw_idx = [i for i, p in enumerate(payloads) if not _is_featurized(p)]
+    zones, poi = _zones(model), _poi(model)
+    if feat_idx and (zones is not None or poi is not None):
+        raise RawCoordinatesRequired()
+    parts = []
+    if feat_idx:
+        parts.append(pd.DataFrame(
+            {"dist": [payloads[i]["dist"] for i in feat_idx],
+             "hour": [payloads[i]["hour"] for i in feat_idx]},
+            index=feat_idx,
+        ))
+    if raw_idx:
+        df = pd.DataFrame([payloads[i] for i in raw_idx], index=raw_idx)
+        parts.append(build_features(df, RAW_MAPPING, "pickup_datetime", zones, poi))
+    X = parts[0] if len(parts) == 1 else pd.concat(parts).sort_index()
+    return [float(v) for v in _predict(model, X, timings, start)]
+
+def predict_columns(model, columns: Mapping[str, Any],
+                    timings: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """Score a columnar batch (column name -> 1-D array) with no per-row Python objects.
+
+    Takes either `dist`/`hour` or the raw coordinate columns plus
+    `pickup_datetime` (ISO strings, datetime64 or int64 ns since the epoch).
+    """
+    start = time.perf_counter()
+    zones, poi = _zones(model), _poi(model)
+    if "dist" in columns and "hour" in columns and zones is None and poi is None:
+        X = np.column_stack([np.asarray(columns["dist"], dtype=np.float64),
+                             np.asarray(columns["hour"], dtype=np.float64)])
     else:
-        # If raw coords/datetime given:
-        from .features import build_features
         import pandas as pd
-        df = pd.DataFrame([payload])
-        df["pickup_datetime"] = pd.to_datetime(df["pickup_datetime"])
-        X = build_features(df, {
-            "pickup_lat": "pickup_lat",
-            "pickup_lon": "pickup_lon",
-            "dropoff_lat": "dropoff_lat",
-            "dropoff_lon": "dropoff_lon",
-        }, "pickup_datetime")
-    y = model.predict(X)[0]
-    return float(y)
+        df = pd.DataFrame({c: columns[c] for c in [*RAW_MAPPING, "pickup_datetime"]}, copy=False)
+        X = build_features(df, RAW_MAPPING, "pickup_datetime", zones, poi)
+    return np.asarray(_predict(model, X, timings, start), dtype=np.float64)
+
+def load_model_from_path(path: str, compiled: bool = False, mmap: bool = False):
+    """Load a model artifact.
 
-def load_model_from_path(path: str):
-    return load_model(path)
+    `.npz` files are CompiledForest exports and load without sklearn. With
+    compiled=True a joblib'd forest is flattened into a CompiledForest.
+    mmap=True memory-maps the arrays of a joblib artifact read-only, so
+    workers loading the same file share them through the page cache. Only a
+    CompiledForest saved with save_model (see scripts/compile_model.py) gains
+    from it; sklearn trees copy their nodes into private memory on unpickle.
+    """
+    if str(path).endswith(".npz"):
+        return CompiledForest.load(path)
+    model = load_model(path, mmap_mode="r" if mmap else None)
+    if compiled and not isinstance(model, CompiledForest):
+        return CompiledForest.from_sklearn(model)
+    return model
@@ -0,0 +1,53 @@
+from typing import Iterable, Iterator, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .features import build_features
+
+class RowSample:
+    """Uniform random sample of at most `max_rows` (X, y) rows out of everything added.
+
+    Every row draws a random key and the `max_rows` smallest keys are kept,
+    so memory stays at `max_rows` plus one chunk however much is streamed
+    through, and the rows keep their original order.
+    """
+
+    def __init__(self, max_rows: int, seed: int = 0):
+        self.max_rows = int(max_rows)
+        self._rng = np.random.default_rng(seed)
+        self.X: Optional[pd.DataFrame] = None
+        self.y: Optional[pd.Series] = None
+        self._keys = np.empty(0)
+        self.seen = 0
+
+    def add(self, X: pd.DataFrame, y: pd.Series):
+        self.seen += len(X)
+        keys = np.concatenate([self._keys, self._rng.random(len(X))])
+        X = X if self.X is None else pd.concat([self.X, X])
+        y = y if self.y is None else pd.concat([self.y, y])
+        if len(keys) > self.max_rows:
+            keep = np.sort(np.argpartition(keys, self.max_rows)[:self.max_rows])
+            X, y, keys = X.iloc[keep], y.iloc[keep], keys[keep]
+        self.X, self.y, self._keys = X, y, keys
+
+def training_chunks(frames: Iterable[pd.DataFrame], mapping: dict, target_col: str, datetime_col: str,
+                    test_size: float = 0.2, holdout: Optional[RowSample] = None,
+                    train_sample: Optional[RowSample] = None,
+                    seed: int = 42) -> Iterator[Tuple[pd.DataFrame, pd.Series]]:
+    """Featurized (X, y) training chunks from raw frames (load_training_data with chunksize).
+
+    A random `test_size` share of every chunk is held out instead of
+    yielded; `holdout` and `train_sample` keep bounded samples of the held
+    out and the training rows for evaluation afterwards.
+    """
+    rng = np.random.default_rng(seed)
+    for df in frames:
+        X = build_features(df, mapping, datetime_col)
+        y = df[target_col]
+        test = rng.random(len(X)) < test_size
+        if holdout is not None:
+            holdout.add(X[test], y[test])
+        X, y = X[~test], y[~test]
+        if train_sample is not None:
+            train_sample.add(X, y)
+        yield X, y
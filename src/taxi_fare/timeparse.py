@@ -0,0 +1,114 @@
+# Hour-of-day extraction from pickup timestamps, the only part of the
+# timestamp the model uses. The hour is the wall-clock hour in the offset the
+# timestamp was written with ("2025-01-01T10:00:00+02:00" -> 10), the same as
+# pd.Timestamp(ts).hour, so trips are bucketed by local time whatever offset
+# the client sends. ISO-8601 strings are read at fixed character positions;
+# pandas is only used for other layouts.
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+ISO = "iso"
+# Rows per block when scanning a column: bounds the byte-string temporaries
+BLOCK_ROWS = 1 << 18
+_ISO_PREFIX = 13  # "YYYY-MM-DDTHH"
+_DIGITS = "0123456789"
+
+def hour_from_iso(ts: str) -> int:
+    """Hour of one timestamp string without building a datetime.
+
+    The common "YYYY-MM-DD[T ]HH..." layout is checked and read in place,
+    whatever follows (minutes, fractions, "Z" or an offset); anything else
+    goes through the cached slow path.
+    """
+    if (len(ts) >= _ISO_PREFIX and ts[4] == "-" and ts[7] == "-" and (ts[10] == "T" or ts[10] == " ")
+            and ts[11] in _DIGITS and ts[12] in _DIGITS):
+        h = (ord(ts[11]) - 48) * 10 + ord(ts[12]) - 48
+        if h < 24:
+            return h
+    return _slow_hour(ts)
+
+@lru_cache(maxsize=4096)
+def _slow_hour(ts: str) -> int:
+    # datetime.fromisoformat keeps the wall-clock hour of the given offset,
+    # same as pd.to_datetime(...).dt.hour. "Z" is only accepted from 3.11.
+    from datetime import datetime
+    try:
+        return datetime.fromisoformat(ts[:-1] + "+00:00" if ts.endswith("Z") else ts).hour
+    except ValueError:
+        import pandas as pd
+        return pd.Timestamp(ts).hour
+
+def detect_format(sample) -> Optional[str]:
+    """ISO for the fixed-position layout, else a strftime format guessed by pandas (or None)."""
+    if not isinstance(sample, str):
+        return None
+    if len(sample) >= _ISO_PREFIX and sample[4] == "-" and sample[7] == "-" and sample[10] in "T ":
+        return ISO
+    from pandas.tseries.api import guess_datetime_format
+    return guess_datetime_format(sample)
+
+def hours_from_column(col: "pd.Series") -> np.ndarray:
+    """Hour of every timestamp in a Series; the layout is detected once, from the first non-missing value.
+
+    datetime64 columns (tz-aware ones in their own zone) use .dt.hour. ISO
+    string columns are parsed block by block from a fixed-width byte view;
+    the odd row that deviates falls back to hour_from_iso. Other layouts are
+    handed to pd.to_datetime with the detected format. The result is int8,
+    or float32 with NaN for missing timestamps (None, NaN, NaT, "") if there
+    are any, like pd.to_datetime(...).dt.hour.
+    """
+    import pandas as pd
+    if hasattr(col, "dt"):
+        return _finish(col.dt.hour.to_numpy(dtype=np.float32, na_value=np.nan))
+    n = len(col)
+    missing = col.isna().to_numpy() | (col == "").to_numpy(dtype=bool, na_value=False)
+    present = np.flatnonzero(~missing)
+    first = col.iloc[present[0]] if len(present) else None
+    fmt = detect_format(first)
+    if fmt != ISO:
+        values = col.mask(pd.Series(missing, index=col.index))
+        if isinstance(first, str):
+            try:
+                parsed = pd.to_datetime(values, format=fmt)
+            except (ValueError, TypeError):
+                parsed = pd.to_datetime(values, format="mixed")
+        else:
+            parsed = pd.to_datetime(values)
+        return _finish(parsed.dt.hour.to_numpy(dtype=np.float32, na_value=np.nan))
+    out = np.empty(n, dtype=np.int8)
+    for s in range(0, n, BLOCK_ROWS):
+        values = col.iloc[s:s + BLOCK_ROWS].to_numpy(dtype=object)
+        out[s:s + len(values)] = _iso_hours(values, missing[s:s + BLOCK_ROWS])
+    if not missing.any():
+        return out
+    hours = out.astype(np.float32)
+    hours[missing] = np.nan
+    return hours
+
+def _finish(hours: np.ndarray) -> np.ndarray:
+    # float32 with NaN only when something is missing, int8 otherwise
+    return hours if np.isnan(hours).any() else hours.astype(np.int8)
+
+def _iso_hours(values: np.ndarray, missing: np.ndarray) -> np.ndarray:
+    # Missing rows are left at 0 here; hours_from_column replaces them with NaN
+    ok = np.zeros(len(values), dtype=bool)
+    hours = np.zeros(len(values), dtype=np.int8)
+    try:
+        chars = values.astype(f"S{_ISO_PREFIX}").view(np.uint8).reshape(len(values), _ISO_PREFIX)
+    except (UnicodeEncodeError, TypeError, ValueError):
+        chars = None
+    if chars is not None:
+        digits = chars[:, 11:13] - ord("0")  # wraps to >= 10 for non-digits
+        h = digits[:, 0] * 10 + digits[:, 1]
+        ok = ((chars[:, 4] == ord("-")) & (chars[:, 7] == ord("-"))
+              & ((chars[:, 10] == ord("T")) | (chars[:, 10] == ord(" ")))
+              & (digits < 10).all(axis=1) & (h < 24))
+        hours[ok] = h[ok]
+    for i in np.flatnonzero(~ok & ~missing):
+        v = values[i]
+        hours[i] = hour_from_iso(v) if isinstance(v, str) else v.hour
+    return hours
@@ -0,0 +1,157 @@
+# The training pipeline shared by scripts/train.py (Databricks/Unity Catalog)
+# and scripts/train_local.py (local MLflow): data preparation before the fit
+# and the derived artifacts after it. The scripts keep their MLflow setup and
+# decide where artifacts end up; everything configured in training.yaml is
+# read here, so the two cannot drift apart.
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Union
+
+from .data import load_training_data, training_schema, training_window
+from .feature_cache import FeatureCache, training_features
+from .features import build_features
+from .model import (DEPTH_CANDIDATES, artifact_stats, compact_model, save_model, train_model,
+                    train_model_streaming)
+from .lookup import build_lookup_table
+from .poi import PoiIndex
+from .streaming import RowSample, training_chunks
+from .zones import ZONE_FEATURES, ZonePairStats, fit_zones, oof_zone_features
+
+@dataclass
+class TrainingSet:
+    """Train/test split ready for fit_model, plus what the model carries and what to log.
+
+    With streaming, `chunks` yields the training chunks and the X/y fields
+    stay None until fit_model has filled them from the bounded row samples.
+    """
+    X_train: Any = None
+    y_train: Any = None
+    X_test: Any = None
+    y_test: Any = None
+    zones: Optional[ZonePairStats] = None
+    poi: Optional[PoiIndex] = None
+    chunks: Optional[Iterator] = None
+    holdout: Optional[RowSample] = None
+    train_sample: Optional[RowSample] = None
+    params: Dict[str, Any] = field(default_factory=dict)
+    metrics: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def streaming(self) -> bool:
+        return self.chunks is not None
+
+def prepare_training(cfg: dict, feature_cache: bool = True,
+                     resolve: Callable[[str], Union[str, Path]] = Path) -> TrainingSet:
+    """Read, featurize and split the training data as configured in `cfg` (training.yaml).
+
+    Covers the pickup-date window, streaming (chunks are only read as
+    fit_model consumes them), the feature cache and the zone/POI features,
+    whose training rows get out-of-fold zone stats. `resolve` maps the
+    relative paths in `cfg` (data, POI file, feature cache) to real ones.
+    """
+    data_path = str(resolve(cfg["data_path"]))
+    target_col = cfg.get("target_col", "fare_amount")
+    datetime_col = cfg.get("datetime_col", "pickup_datetime")
+    mapping = cfg["feature_mapping"]
+    test_size, seed = cfg.get("test_size", 0.2), cfg.get("random_state", 42)
+    w_cfg, s_cfg, z_cfg, p_cfg = (cfg.get(k) or {} for k in ("window", "streaming", "zones", "poi"))
+    start, end = training_window(data_path, w_cfg.get("days"), w_cfg.get("start"), w_cfg.get("end"))
+    ts = TrainingSet()
+    if start or end:
+        ts.params.update(window_start=start, window_end=end)
+    spatial = z_cfg.get("enabled", False) or p_cfg.get("enabled", False)
+
+    if s_cfg.get("enabled", False):
+        if spatial:
+            raise ValueError("streaming training does not support zones/poi features")
+        d_cfg = cfg.get("data") or {}
+        schema = training_schema(mapping, target_col, datetime_col, d_cfg.get("float32", True))
+        chunksize = s_cfg.get("chunksize", 1_000_000)
+        frames = load_training_data(data_path, schema, d_cfg.get("format"), chunksize, start, end)
+        sample_rows = s_cfg.get("sample_rows", 200_000)
+        ts.holdout, ts.train_sample = RowSample(sample_rows, seed), RowSample(sample_rows, seed + 1)
+        ts.chunks = training_chunks(frames, mapping, target_col, datetime_col, test_size,
+                                    ts.holdout, ts.train_sample, seed)
+        ts.params["streaming_chunksize"] = chunksize
+        return ts
+
+    from sklearn.model_selection import train_test_split
+    # Zone/POI features need the raw coordinates (df), which a cache hit does not have
+    f_cfg = cfg.get("feature_cache") or {}
+    cache = None
+    if feature_cache and f_cfg.get("enabled", True) and not spatial:
+        cache = FeatureCache.from_config(dict(f_cfg, dir=str(resolve(f_cfg.get("dir", "artifacts/feature_cache")))))
+    X, y, df = training_features(data_path, mapping, target_col, datetime_col, cfg.get("data"), start, end, cache)
+    ts.X_train, ts.X_test, ts.y_train, ts.y_test = train_test_split(X, y, test_size=test_size, random_state=seed)
+    if not spatial:
+        return ts
+
+    train_df, test_df = df.loc[ts.X_train.index], df.loc[ts.X_test.index]
+    grid, min_trips = tuple(z_cfg.get("grid", (32, 32))), z_cfg.get("min_trips", 5)
+    if z_cfg.get("enabled", False):
+        ts.zones = fit_zones(train_df, mapping, ts.y_train, ts.X_train["dist"], grid, min_trips)
+        ts.metrics["zones_pairs_covered"] = float((ts.zones.count > 0).mean())
+    if p_cfg.get("enabled", False):
+        ts.poi = PoiIndex.from_csv(str(resolve(p_cfg.get("path", "data/poi.csv"))), p_cfg.get("grid_step", 0.01))
+    dist = ts.X_train["dist"]
+    ts.X_train = build_features(train_df, mapping, datetime_col, ts.zones, ts.poi)
+    ts.X_test = build_features(test_df, mapping, datetime_col, ts.zones, ts.poi)
+    if ts.zones is not None:
+        # Training rows get out-of-fold medians, or each trip's own fare leaks into its zone_fare;
+        # the stats over the whole training split are for the test rows and the saved model
+        ts.X_train[ZONE_FEATURES] = oof_zone_features(train_df, mapping, ts.y_train, dist, grid, min_trips,
+                                                      z_cfg.get("folds", 5), seed)
+    return ts
+
+def fit_model(ts: TrainingSet, cfg: dict):
+    """Fit the configured forest on `ts` and attach its zone/POI lookups."""
+    model_params = cfg["model_params"]
+    if ts.streaming:
+        s_cfg = cfg.get("streaming") or {}
+        model = train_model_streaming(ts.chunks, s_cfg.get("trees_per_chunk", 10), **model_params)
+        ts.X_train, ts.y_train = ts.train_sample.X, ts.train_sample.y
+        ts.X_test, ts.y_test = ts.holdout.X, ts.holdout.y
+        ts.params["n_estimators"] = model.n_estimators
+        ts.metrics["streaming_train_rows"] = float(ts.train_sample.seen)
+    else:
+        model = train_model(ts.X_train, ts.y_train, **model_params)
+    if ts.zones is not None:
+        model.zone_stats_ = ts.zones
+    if ts.poi is not None:
+        model.poi_index_ = ts.poi
+    return model
+
+def training_artifacts(model, ts: TrainingSet, cfg: dict, out_dir: Union[str, Path],
+                       model_path: Union[str, Path, None] = None) -> Dict[str, Path]:
+    """Write the configured lookup table and compacted forest to `out_dir`.
+
+    The compacted forest is measured against the saved full model
+    (artifact_stats) at `model_path`, which is written to out_dir/model.joblib
+    when not given. Returns {name: path} of the artifacts; the metrics go to
+    ts.metrics.
+    """
+    out_dir = Path(out_dir)
+    out = {}
+    lt_cfg = cfg.get("lookup_table") or {}
+    # The table is over {dist, hour} only, so it cannot stand in for a zone/POI model
+    if lt_cfg.get("enabled", False) and ts.zones is None and ts.poi is None:
+        table = build_lookup_table(model, ts.X_train, ts.X_test, lt_cfg.get("dist_buckets", 256))
+        out["lookup_table"] = out_dir / "fare_table.npz"
+        table.save(str(out["lookup_table"]))
+        ts.metrics.update({f"lookup_{k}": v for k, v in table.error_bound.items()})
+    c_cfg = cfg.get("compaction") or {}
+    if c_cfg.get("enabled", False):
+        compact, report = compact_model(model, ts.X_test, ts.y_test, c_cfg.get("mae_tolerance", 0.01),
+                                        c_cfg.get("depth_candidates", DEPTH_CANDIDATES), c_cfg.get("float32", True),
+                                        c_cfg.get("max_rows", 50_000))
+        out["compact_model"] = out_dir / "model_compact.npz"
+        compact.save(str(out["compact_model"]))
+        ts.metrics.update({"compact_mae_holdout": report["mae_compact"],
+                           "compact_n_estimators": report["n_estimators"],
+                           "compact_max_depth": report["max_depth"]})
+        if model_path is None:
+            model_path = out_dir / "model.joblib"
+            save_model(model, str(model_path))
+        for name, path in (("full", model_path), ("compact", out["compact_model"])):
+            ts.metrics.update({f"{name}_{k}": v for k, v in artifact_stats(str(path), ts.X_test).items()})
+    return out
@@ -0,0 +1,134 @@
+import math
+from typing import Dict, Optional
+import numpy as np
+
+# Extra feature columns added by build_features / features_row when a model carries zone stats
+ZONE_FEATURES = ["zone_fare", "zone_dist"]
+
+class ZonePairStats:
+    """Regular lat/lon grid over the service area plus dense per-(pickup zone, dropoff zone) stats.
+
+    A coordinate maps to its zone with two subtractions and a floor, points
+    outside the box snap to the nearest edge cell, so both the vectorized
+    and the single-trip lookups are O(1). `fare[i, j]` and `dist[i, j]` are
+    the median fare and median distance of the training trips from zone i
+    to zone j; pairs with fewer than `min_trips` trips hold the overall
+    medians instead. Arrays are float32 (n_zones x n_zones each).
+    """
+
+    def __init__(self, bounds, shape, fare, dist, count):
+        self.lat_min, self.lat_max, self.lon_min, self.lon_max = (float(b) for b in bounds)
+        self.n_lat, self.n_lon = (int(s) for s in shape)
+        self.lat_step = (self.lat_max - self.lat_min) / self.n_lat
+        self.lon_step = (self.lon_max - self.lon_min) / self.n_lon
+        self.fare = np.ascontiguousarray(fare, dtype=np.float32)
+        self.dist = np.ascontiguousarray(dist, dtype=np.float32)
+        self.count = np.ascontiguousarray(count, dtype=np.int32)
+
+    @property
+    def n_zones(self) -> int:
+        return self.n_lat * self.n_lon
+
+    @classmethod
+    def from_trips(cls, pickup_lat, pickup_lon, dropoff_lat, dropoff_lon, fare, dist,
+                   grid=(32, 32), min_trips: int = 5, quantile: float = 0.005,
+                   bounds=None) -> "ZonePairStats":
+        """Fit the grid to the central (1 - 2 * quantile) of all trip endpoints, unless
+        `bounds` (lat_min, lat_max, lon_min, lon_max) is given, and tabulate medians."""
+        import pandas as pd
+        if bounds is None:
+            bounds = _grid_bounds(pickup_lat, pickup_lon, dropoff_lat, dropoff_lon, quantile)
+        lat_min, lat_max, lon_min, lon_max = bounds
+        n = int(grid[0]) * int(grid[1])
+        empty = np.zeros((n, n), dtype=np.float32)
+        stats = cls((lat_min, lat_max, lon_min, lon_max), grid, empty, empty, empty.astype(np.int32))
+        pair = stats.zone_ids(pickup_lat, pickup_lon) * n + stats.zone_ids(dropoff_lat, dropoff_lon)
+        trips = pd.DataFrame({"pair": pair, "fare": np.asarray(fare, dtype=np.float64),
+                              "dist": np.asarray(dist, dtype=np.float64)})
+        agg = trips.groupby("pair").agg(fare=("fare", "median"), dist=("dist", "median"), count=("fare", "size"))
+        agg = agg[agg["count"] >= min_trips]
+        fare_t = np.full(n * n, trips["fare"].median(), dtype=np.float32)
+        dist_t = np.full(n * n, trips["dist"].median(), dtype=np.float32)
+        count_t = np.zeros(n * n, dtype=np.int32)
+        idx = agg.index.to_numpy()
+        fare_t[idx], dist_t[idx], count_t[idx] = agg["fare"], agg["dist"], agg["count"]
+        return cls((lat_min, lat_max, lon_min, lon_max), grid,
+                   fare_t.reshape(n, n), dist_t.reshape(n, n), count_t.reshape(n, n))
+
+    def zone_ids(self, lat, lon) -> np.ndarray:
+        i = np.clip(((np.asarray(lat, dtype=np.float64) - self.lat_min) / self.lat_step).astype(np.int64),
+                    0, self.n_lat - 1)
+        j = np.clip(((np.asarray(lon, dtype=np.float64) - self.lon_min) / self.lon_step).astype(np.int64),
+                    0, self.n_lon - 1)
+        return i * self.n_lon + j
+
+    def zone_id(self, lat: float, lon: float) -> int:
+        i = min(max(math.floor((lat - self.lat_min) / self.lat_step), 0), self.n_lat - 1)
+        j = min(max(math.floor((lon - self.lon_min) / self.lon_step), 0), self.n_lon - 1)
+        return i * self.n_lon + j
+
+    def features(self, pickup_lat, pickup_lon, dropoff_lat, dropoff_lon) -> np.ndarray:
+        """(n, 2) float32 [zone_fare, zone_dist] for arrays of trips."""
+        zp, zd = self.zone_ids(pickup_lat, pickup_lon), self.zone_ids(dropoff_lat, dropoff_lon)
+        return np.column_stack([self.fare[zp, zd], self.dist[zp, zd]])
+
+    def features_one(self, pickup_lat: float, pickup_lon: float, dropoff_lat: float, dropoff_lon: float):
+        zp, zd = self.zone_id(pickup_lat, pickup_lon), self.zone_id(dropoff_lat, dropoff_lon)
+        return self.fare[zp, zd], self.dist[zp, zd]
+
+    def arrays(self, prefix: str = "") -> Dict[str, np.ndarray]:
+        return {f"{prefix}bounds": np.array([self.lat_min, self.lat_max, self.lon_min, self.lon_max]),
+                f"{prefix}shape": np.array([self.n_lat, self.n_lon]),
+                f"{prefix}fare": self.fare, f"{prefix}dist": self.dist, f"{prefix}count": self.count}
+
+    @classmethod
+    def from_arrays(cls, z, prefix: str = "") -> Optional["ZonePairStats"]:
+        if f"{prefix}bounds" not in z:
+            return None
+        return cls(z[f"{prefix}bounds"], z[f"{prefix}shape"], z[f"{prefix}fare"],
+                   z[f"{prefix}dist"], z[f"{prefix}count"])
+
+    def save(self, path: str):
+        np.savez(path, **self.arrays())
+
+    @classmethod
+    def load(cls, path: str) -> "ZonePairStats":
+        with np.load(path) as z:
+            return cls.from_arrays(z)
+
+def _grid_bounds(pickup_lat, pickup_lon, dropoff_lat, dropoff_lon, quantile: float):
+    lats = np.concatenate([np.asarray(pickup_lat, dtype=np.float64), np.asarray(dropoff_lat, dtype=np.float64)])
+    lons = np.concatenate([np.asarray(pickup_lon, dtype=np.float64), np.asarray(dropoff_lon, dtype=np.float64)])
+    lat_min, lat_max = np.quantile(lats, [quantile, 1 - quantile])
+    lon_min, lon_max = np.quantile(lons, [quantile, 1 - quantile])
+    # Guard against a degenerate box (all trips on one line)
+    return lat_min, max(lat_max, lat_min + 1e-6), lon_min, max(lon_max, lon_min + 1e-6)
+
+def fit_zones(df, mapping: dict, fare, dist, grid=(32, 32), min_trips: int = 5) -> ZonePairStats:
+    """ZonePairStats from a training frame with source column names (see build_features)."""
+    source = {canonical: src for src, canonical in mapping.items()}
+    cols = [df[source.get(c, c)] for c in ("pickup_lat", "pickup_lon", "dropoff_lat", "dropoff_lon")]
+    return ZonePairStats.from_trips(*cols, fare=fare, dist=dist, grid=grid, min_trips=min_trips)
+
+def oof_zone_features(df, mapping: dict, fare, dist, grid=(32, 32), min_trips: int = 5,
+                      folds: int = 5, seed: int = 0) -> np.ndarray:
+    """Out-of-fold (n, 2) float32 [zone_fare, zone_dist] for the training rows themselves.
+
+    Each row gets the medians of the other `folds - 1` folds, tabulated on
+    one grid fitted to all rows, so no trip's own fare feeds its feature.
+    Use it for the training matrix; the stats from fit_zones on all
+    training rows are for the test rows and the saved model.
+    """
+    source = {canonical: src for src, canonical in mapping.items()}
+    cols = [np.asarray(df[source.get(c, c)], dtype=np.float64)
+            for c in ("pickup_lat", "pickup_lon", "dropoff_lat", "dropoff_lon")]
+    fare, dist = np.asarray(fare, dtype=np.float64), np.asarray(dist, dtype=np.float64)
+    bounds = _grid_bounds(*cols, quantile=0.005)
+    fold = np.random.default_rng(seed).permutation(len(fare)) % folds
+    out = np.empty((len(fare), 2), dtype=np.float32)
+    for k in range(folds):
+        test = fold == k
+        stats = ZonePairStats.from_trips(*(c[~test] for c in cols), fare=fare[~test], dist=dist[~test],
+                                         grid=grid, min_trips=min_trips, bounds=bounds)
+        out[test] = stats.features(*(c[test] for c in cols))
+    return out
@@ -6,3 +6,232 @@ def test_health():
     r = c.get("/health")
     assert r.status_code == 200
     assert "status" in r.json()
+
+def test_predict_batch():
+    trip = {
+        "pickup_lat": 59.33, "pickup_lon": 18.06,
+        "dropoff_lat": 59.36, "dropoff_lon": 18.01,
+        "pickup_datetime": "2025-01-01T10:00:00Z",
+    }
+    with TestClient(app) as c:
+        single = c.post("/predict", json=trip).json()["fare"]
+        r = c.post("/predict_batch", json={"trips": [trip, {"dist": 0.058, "hour": 10}]})
+        assert r.status_code == 200
+        fares = r.json()["fares"]
+        assert len(fares) == 2
+        assert fares[0] == single
+
+def test_admin_reload_swaps_model(monkeypatch):
+    import app.main as main
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    auth = {"X-Admin-Token": "secret"}
+    with TestClient(app) as c:
+        before = c.get("/health").json()
+        assert before["model_version"] is not None
+        old = main.model
+        assert c.post("/admin/reload", headers={"X-Admin-Token": "wrong"}).status_code == 403
+        r = c.post("/admin/reload", headers=auth)
+        assert r.status_code == 200
+        assert main.model is old  # unchanged artifact -> no reload
+        r = c.post("/admin/reload", params={"force": True}, headers=auth)
+        assert r.json()["version"] == before["model_version"]
+        assert main.model is not old
+
+def test_admin_reload_closed_without_token(monkeypatch):
+    import app.main as main
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    with TestClient(app) as c:
+        assert c.post("/admin/reload").status_code == 403
+        monkeypatch.setattr(main, "ADMIN_OPEN", True)  # TAXI_FARE_ADMIN_OPEN=1
+        assert c.post("/admin/reload").status_code == 200
+
+def test_predict_stream_ndjson_and_csv():
+    import json
+    rows = [
+        '{"pickup_lat": 59.33, "pickup_lon": 18.06, "dropoff_lat": 59.36, "dropoff_lon": 18.01, "pickup_datetime": "2025-01-01T10:00:00Z"}',
+        '{"dist": 0.05, "hour": 3}',
+        'not json',
+        '{"dist": "far", "hour": 3}',
+    ]
+    with TestClient(app) as c:
+        r = c.post("/predict_stream", content="\n".join(rows).encode(),
+                   headers={"content-type": "application/x-ndjson"})
+        out = [json.loads(line) for line in r.text.splitlines()]
+        assert [o.get("row") for o in out[:4]] == [0, 1, 2, 3]
+        assert "fare" in out[0] and "fare" in out[1]
+        assert "error" in out[2] and "error" in out[3]
+        assert out[4]["summary"]["rows"] == 4 and out[4]["summary"]["errors"] == 2
+
+        csv_body = "dist,hour\n0.05,3\n0.1,x\n"
+        r = c.post("/predict_stream", content=csv_body.encode(), headers={"content-type": "text/csv"})
+        lines = r.text.splitlines()
+        assert lines[0] == "row,fare,error"
+        assert lines[1].startswith("0,") and lines[1].endswith(",")
+        assert lines[2].startswith("1,,")
+        # Error text with commas and quotes stays one CSV cell
+        import csv
+        r = c.post("/predict_stream", content=b'dist,hour\n"0,1",3\n', headers={"content-type": "text/csv"})
+        (row_no, fare, error), = list(csv.reader(r.text.splitlines()))[1:]
+        assert row_no == "0" and fare == "" and error
+
+def test_predict_batch_columnar_formats():
+    import numpy as np
+    import pytest
+    pa = pytest.importorskip("pyarrow")
+    msgpack = pytest.importorskip("msgpack")
+    dist, hour = [0.05, 0.2, 0.01], [3, 18, 23]
+    with TestClient(app) as c:
+        expected = c.post("/predict_batch", json={"trips": [
+            {"dist": d, "hour": h} for d, h in zip(dist, hour)]}).json()["fares"]
+
+        table = pa.table({"dist": dist, "hour": hour})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as w:
+            w.write_table(table)
+        r = c.post("/predict_batch", content=sink.getvalue().to_pybytes(),
+                   headers={"content-type": "application/vnd.apache.arrow.stream"})
+        assert r.headers["content-type"] == "application/vnd.apache.arrow.stream"
+        assert pa.ipc.open_stream(r.content).read_all().column("fare").to_pylist() == expected
+
+        body = msgpack.packb({"dist": np.array(dist).tobytes(), "hour": hour})
+        r = c.post("/predict_batch", content=body, headers={"content-type": "application/msgpack"})
+        fares = np.frombuffer(msgpack.unpackb(r.content)["fare"], dtype="<f8")
+        assert fares.tolist() == expected
+
+        r = c.post("/predict_batch", content=msgpack.packb({"hour": hour}),
+                   headers={"content-type": "application/msgpack"})
+        assert r.status_code == 422
+
+def test_metrics_reports_stage_latency():
+    trip = {
+        "pickup_lat": 59.33, "pickup_lon": 18.06,
+        "dropoff_lat": 59.36, "dropoff_lon": 18.01,
+        "pickup_datetime": "2025-01-01T10:00:00Z",
+    }
+    with TestClient(app) as c:
+        assert c.post("/predict_features", json={"dist": 0.05, "hour": 9}).status_code == 200
+        assert c.post("/predict_features", json={"dist": "x"}).status_code == 422
+        assert c.post("/predict_batch", json={"trips": [trip]}).status_code == 200
+        r = c.get("/metrics")
+        assert r.status_code == 200
+        body = r.text
+        for stage in ("validation", "features", "predict", "serialization"):
+            assert f'prediction_stage_seconds_count{{endpoint="/predict_batch",stage="{stage}"}}' in body
+        assert 'endpoint="/predict_features",stage="predict"' in body
+
+def test_metrics_multiprocess(tmp_path):
+    import subprocess, sys
+    code = (
+        "from fastapi.testclient import TestClient\n"
+        "from app.main import app\n"
+        "with TestClient(app) as c:\n"
+        "    c.post('/predict_features', json={'dist': 0.05, 'hour': 9})\n"
+        "    r = c.get('/metrics')\n"
+        "    assert r.status_code == 200, r.status_code\n"
+        "    assert 'prediction_stage_seconds_bucket' in r.text\n"
+    )
+    env = dict(__import__("os").environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    subprocess.run([sys.executable, "-c", code], env=env, check=True, timeout=120)
+    assert any(tmp_path.iterdir())
+
+def test_gunicorn_conf_creates_multiproc_dir_before_preload(tmp_path):
+    # preload_app imports app.main in the master before on_starting runs
+    import subprocess, sys
+    target = tmp_path / "missing" / "prom"
+    code = (
+        "import runpy\n"
+        "runpy.run_path('docker/gunicorn_conf.py')\n"
+        "import app.main\n"
+        "app.main.PREDICTIONS_TOTAL.inc()\n"
+    )
+    env = dict(__import__("os").environ, PROMETHEUS_MULTIPROC_DIR=str(target))
+    subprocess.run([sys.executable, "-c", code], env=env, check=True, timeout=120)
+    assert target.is_dir() and any(target.iterdir())
+
+def test_ready_after_warmup():
+    import app.main as main
+    with TestClient(app) as c:
+        r = c.get("/ready")
+        assert r.status_code == 200
+        assert r.json()["ready"] is True
+        assert "model_warmup_seconds" in c.get("/metrics").text
+        main.ready = False
+        assert c.get("/ready").status_code == 503
+
+def test_worker_booted_without_model_becomes_ready_on_reload(monkeypatch, tmp_path):
+    import app.main as main
+    from prometheus_client import REGISTRY
+    served = REGISTRY.get_sample_value("predictions_total")
+    misses = REGISTRY.get_sample_value("prediction_cache_misses_total")
+    with TestClient(app) as c:  # startup warm-up runs
+        assert c.get("/ready").status_code == 200
+    # Warm-up requests are not counted as served predictions or cache lookups
+    assert REGISTRY.get_sample_value("predictions_total") == served
+    assert REGISTRY.get_sample_value("prediction_cache_misses_total") == misses
+
+    monkeypatch.setattr(main, "model", None)
+    monkeypatch.setattr(main, "ready", False)
+    monkeypatch.setattr(main, "ADMIN_OPEN", True)
+    path = main.MODEL_PATH
+    monkeypatch.setattr(main, "MODEL_PATH", str(tmp_path / "missing.joblib"))
+    with TestClient(app) as c:
+        assert c.get("/ready").status_code == 503
+        monkeypatch.setattr(main, "MODEL_PATH", path)
+        assert c.post("/admin/reload").status_code == 200
+        assert c.get("/ready").status_code == 200
+
+def test_serves_zone_and_poi_model(tmp_path):
+    import numpy as np
+    import pandas as pd
+    from sklearn.ensemble import RandomForestRegressor
+    import app.main as main
+    from taxi_fare.features import build_features
+    from taxi_fare.model import save_model
+    from taxi_fare.poi import PoiIndex
+    from taxi_fare.zones import fit_zones
+
+    rng = np.random.default_rng(0)
+    n = 300
+    df = pd.DataFrame({"pickup_lat": 59.3 + rng.uniform(0, 0.1, n), "pickup_lon": 18.0 + rng.uniform(0, 0.1, n),
+                       "dropoff_lat": 59.3 + rng.uniform(0, 0.1, n), "dropoff_lon": 18.0 + rng.uniform(0, 0.1, n),
+                       "pickup_datetime": [f"2025-01-01T{h % 24:02d}:00:00Z" for h in range(n)]})
+    mapping = {k: k for k in ("pickup_lat", "pickup_lon", "dropoff_lat", "dropoff_lon")}
+    y = pd.Series(rng.uniform(50, 500, n))
+    base = build_features(df, mapping, "pickup_datetime")
+    zones = fit_zones(df, mapping, y, base["dist"], grid=(4, 4), min_trips=1)
+    poi = PoiIndex.from_csv("data/poi.csv")
+    spatial = RandomForestRegressor(n_estimators=3, random_state=0).fit(
+        build_features(df, mapping, "pickup_datetime", zones, poi), y)
+    spatial.zone_stats_, spatial.poi_index_ = zones, poi
+    save_model(spatial, str(tmp_path / "model.joblib"))
+
+    original = main.MODEL_PATH
+    main.MODEL_PATH = str(tmp_path / "model.joblib")
+    try:
+        main.reload_model(force=True)
+        assert main.model.zone_stats_ is not None
+        with TestClient(app) as c:
+            assert c.get("/ready").status_code == 200
+            trip = {"pickup_lat": 59.33, "pickup_lon": 18.06, "dropoff_lat": 59.36, "dropoff_lon": 18.01,
+                    "pickup_datetime": "2025-01-01T10:00:00Z"}
+            assert c.post("/predict", json=trip).status_code == 200
+            assert c.post("/predict_batch", json={"trips": [trip]}).status_code == 200
+            assert c.post("/predict_features", json={"dist": 0.05, "hour": 9}).status_code == 422
+            assert c.post("/predict_batch", json={"trips": [trip, {"dist": 0.05, "hour": 9}]}).status_code == 422
+    finally:
+        main.MODEL_PATH = original
+        main.reload_model(force=True)
+
+def test_coalesced_predict_skips_pandas_batch_path(monkeypatch):
+    import app.main as main
+    trip = {"pickup_lat": 59.33, "pickup_lon": 18.06, "dropoff_lat": 59.36, "dropoff_lon": 18.01,
+            "pickup_datetime": "2025-01-01T10:00:00Z"}
+    with TestClient(app) as c:
+        expected = main.predict_batch(main.model, [trip, dict(trip, pickup_lat=59.2)])
+
+        def no_batch(*args, **kwargs):
+            raise AssertionError("coalesced /predict went through predict_batch")
+        monkeypatch.setattr(main, "predict_batch", no_batch)
+        assert main._predict_coalesced([trip]) == expected[:1]
+        assert main._predict_coalesced([trip, dict(trip, pickup_lat=59.2)]) == expected
+        assert c.post("/predict", json=trip).json()["fare"] == expected[0]
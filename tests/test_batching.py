@@ -0,0 +1,60 @@
+import asyncio
+from app.batching import MicroBatcher
+
+def test_batcher_coalesces_and_routes_results():
+    calls = []
+    def fn(payloads):
+        calls.append(len(payloads))
+        return [p["x"] * 2 for p in payloads]
+
+    async def run():
+        b = MicroBatcher(fn, max_batch_size=8, max_wait_ms=20)
+        b.start()
+        out = await asyncio.gather(*[b.submit({"x": i}) for i in range(20)])
+        await b.stop()
+        return out
+
+    out = asyncio.run(run())
+    assert out == [i * 2 for i in range(20)]
+    assert sum(calls) == 20
+    assert max(calls) <= 8 and len(calls) < 20
+
+def test_batcher_propagates_errors():
+    def fn(payloads):
+        raise ValueError("boom")
+
+    async def run():
+        b = MicroBatcher(fn, max_wait_ms=0)
+        try:
+            await b.submit({"x": 1})
+        except ValueError as e:
+            return str(e)
+        finally:
+            await b.stop()
+
+    assert asyncio.run(run()) == "boom"
+
+def test_admitted_batches_shed_load_and_never_score_dropped_work():
+    import time
+    from app.executor import InferenceExecutor, Overloaded, DeadlineExceeded
+    scored = []
+
+    def fn(payloads):
+        time.sleep(0.05)
+        scored.extend(payloads)
+        return [0.0] * len(payloads)
+
+    async def run():
+        ex = InferenceExecutor(max_workers=1, max_queue=4, deadline_ms=20)
+        b = MicroBatcher(fn, max_batch_size=2, max_wait_ms=1, executor=ex.pool)
+        b.start()
+        out = await asyncio.gather(*[ex.admit(b.submit, {"x": i}) for i in range(200)], return_exceptions=True)
+        await asyncio.sleep(0.3)
+        await b.stop()
+        return out, ex
+
+    out, ex = asyncio.run(run())
+    kinds = [type(o).__name__ for o in out]
+    assert kinds.count("Overloaded") == 195  # only capacity (1 + 4) was ever admitted
+    assert kinds.count("DeadlineExceeded") + kinds.count("float") == 5
+    assert len(scored) <= 5 and (ex._admitted, ex._queued) == (0, 0)
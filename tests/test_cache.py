@@ -0,0 +1,34 @@
+from taxi_fare.cache import PredictionCache
+
+TRIP = {
+    "pickup_lat": 59.33001, "pickup_lon": 18.06, "dropoff_lat": 59.36,
+    "dropoff_lon": 18.01, "pickup_datetime": "2025-01-01T10:00:00Z",
+}
+
+class Model:
+    pass
+
+def test_cache_quantizes_and_evicts():
+    evictions = []
+    c = PredictionCache(max_size=2, precision=3, on_evict=lambda r, n: evictions.append((r, n)))
+    m = Model()
+    assert c.get(m, TRIP) is None
+    c.put(m, TRIP, 1.0)
+    # Same cell and hour -> hit; other hour -> miss
+    assert c.get(m, dict(TRIP, pickup_lat=59.33004, pickup_datetime="2025-02-01T10:45:00Z")) == 1.0
+    assert c.get(m, dict(TRIP, pickup_datetime="2025-01-01T11:00:00Z")) is None
+    c.put(m, {"dist": 0.05, "hour": 3}, 2.0)
+    c.put(m, {"dist": 0.06, "hour": 3}, 3.0)
+    assert len(c) == 2 and c.get(m, TRIP) is None
+    assert evictions == [("lru", 1)]
+
+def test_cache_ttl_and_model_change():
+    evictions = []
+    c = PredictionCache(ttl_seconds=0, on_evict=lambda r, n: evictions.append(r))
+    m = Model()
+    c.put(m, TRIP, 1.0)
+    assert c.get(m, TRIP) is None
+    c = PredictionCache(on_evict=lambda r, n: evictions.append((r, n)))
+    c.put(m, TRIP, 1.0)
+    assert c.get(Model(), TRIP) is None
+    assert evictions == ["ttl", ("model_changed", 1)]
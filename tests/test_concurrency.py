@@ -0,0 +1,24 @@
+from taxi_fare.concurrency import available_cpus, plan_threads
+
+def test_available_cpus_respects_cgroup_quota(tmp_path):
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert available_cpus(tmp_path) <= 2
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert available_cpus(tmp_path) >= 1
+
+def test_plan_threads_splits_cpus():
+    serving = plan_threads("serving", {"cpus": 8, "serving": {"workers": 2}})
+    assert (serving.workers, serving.inference_threads, serving.n_jobs, serving.native_threads) == (2, 4, 1, 1)
+    training = plan_threads("training", {"cpus": 8})
+    assert (training.workers, training.n_jobs, training.native_threads) == (1, 8, 1)
+    assert plan_threads("training", {"cpus": 8, "training": {"n_jobs": -1}}).n_jobs == -1
+
+def test_single_process_serving_gets_every_cpu(monkeypatch):
+    from taxi_fare.concurrency import serving_processes
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert serving_processes() == 1
+    single = plan_threads("serving", {"cpus": 8}, processes=serving_processes())
+    assert (single.workers, single.inference_threads) == (1, 8)
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")  # as exported by docker/gunicorn_conf.py
+    assert plan_threads("serving", {"cpus": 8}, processes=serving_processes()).inference_threads == 2
+    assert plan_threads("serving", {"cpus": 8}).workers == 8  # what gunicorn_conf starts
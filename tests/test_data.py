@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from taxi_fare.data import (load_training_data, partition_dates, training_schema, training_window,
+                             write_partitioned)
+from taxi_fare.features import build_features
+
+MAPPING = {"lat1": "pickup_lat", "lon1": "pickup_lon", "lat2": "dropoff_lat", "lon2": "dropoff_lon"}
+
+def _frame(n=25):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "lat1": 59.3 + rng.uniform(0, 0.1, n), "lon1": 18.0 + rng.uniform(0, 0.1, n),
+        "lat2": 59.3 + rng.uniform(0, 0.1, n), "lon2": 18.0 + rng.uniform(0, 0.1, n),
+        "when": [f"2025-01-01T{h % 24:02d}:15:00+02:00" for h in range(n)],
+        "fare": rng.uniform(50, 500, n), "vendor": ["a"] * n,
+    })
+
+def test_csv_and_parquet_project_columns_and_chunk(tmp_path):
+    df = _frame()
+    df.to_csv(tmp_path / "trips.csv", index=False)
+    df.to_parquet(tmp_path / "trips.parquet", index=False)
+    schema = training_schema(MAPPING, "fare", "when")
+    for name in ("trips.csv", "trips.parquet"):
+        got = load_training_data(str(tmp_path / name), schema)
+        assert sorted(got.columns) == sorted(schema)
+        assert got["lat1"].dtype == np.float32 and got["fare"].dtype == np.float32
+        # Timestamps stay strings: the hour is the one written, not UTC
+        assert build_features(got, MAPPING, "when")["hour"].tolist() == [h % 24 for h in range(len(df))]
+        chunks = list(load_training_data(str(tmp_path / name), schema, chunksize=10))
+        assert [len(c) for c in chunks] == [10, 10, 5]
+        assert chunks[-1].index.tolist() == list(range(20, 25))
+        pd.testing.assert_frame_equal(pd.concat(chunks), got)
+    # Unprojected CSV reads keep the timestamps as written too
+    whole = load_training_data(str(tmp_path / "trips.csv"))
+    assert whole["when"].tolist() == df["when"].tolist()
+    assert pd.concat(load_training_data(str(tmp_path / "trips.csv"), chunksize=10))["when"].tolist() == df["when"].tolist()
+
+def test_partitioned_dataset_window(tmp_path):
+    df = _frame(30).assign(when=[f"2025-03-{d:02d}T23:30:00+02:00" for d in range(1, 31)])
+    chunks = [df.iloc[:12], df.iloc[12:]]
+    assert write_partitioned(chunks, tmp_path / "ds", "when") == 30
+    assert len(partition_dates(tmp_path / "ds")) == 30
+    start, end = training_window(tmp_path / "ds", days=7)
+    assert (start, end) == ("2025-03-24", "2025-03-30")
+    schema = training_schema(MAPPING, "fare", "when")
+    got = load_training_data(str(tmp_path / "ds"), schema, start=start, end=end)
+    # Dates are the written ones (23:30+02:00 is still the same day), not UTC
+    assert sorted(got["when"].str.slice(8, 10).astype(int)) == list(range(24, 31))
+    assert got["lat1"].dtype == np.float32 and "pickup_date" not in got
+    assert sum(len(c) for c in load_training_data(str(tmp_path / "ds"), schema, chunksize=4, end="2025-03-10")) == 10
+    df.to_csv(tmp_path / "trips.csv", index=False)
+    with pytest.raises(ValueError, match="date-partitioned"):
+        training_window(tmp_path / "trips.csv", days=7)
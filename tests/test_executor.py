@@ -0,0 +1,69 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.executor import InferenceExecutor, Overloaded, DeadlineExceeded
+
+def test_executor_sheds_beyond_capacity():
+    release = threading.Event()
+
+    async def run():
+        ex = InferenceExecutor(max_workers=1, max_queue=1, deadline_ms=0)
+        first = asyncio.ensure_future(ex.run(release.wait))
+        second = asyncio.ensure_future(ex.run(lambda: 2))
+        await asyncio.sleep(0.01)
+        with pytest.raises(Overloaded):
+            await ex.run(lambda: 3)
+        release.set()
+        return await first, await second
+
+    assert asyncio.run(run()) == (True, 2)
+
+def test_executor_drops_jobs_past_deadline():
+    async def run():
+        ex = InferenceExecutor(max_workers=1, max_queue=4, deadline_ms=10)
+        slow = asyncio.ensure_future(ex.run(time.sleep, 0.05))
+        await asyncio.sleep(0.001)
+        with pytest.raises(DeadlineExceeded):
+            await ex.run(lambda: 1)
+        await slow
+        return await ex.run(lambda: 1)
+
+    assert asyncio.run(run()) == 1
+
+def test_cancelled_request_keeps_its_slot_until_the_job_finishes():
+    release = threading.Event()
+
+    async def run():
+        ex = InferenceExecutor(max_workers=1, max_queue=1, deadline_ms=0)
+        running = asyncio.ensure_future(ex.run(release.wait))
+        queued = asyncio.ensure_future(ex.run(lambda: 2))
+        await asyncio.sleep(0.01)
+        running.cancel()
+        queued.cancel()
+        await asyncio.sleep(0.01)
+        # The queued job never ran and is gone; the running one still holds its worker
+        assert (ex._admitted, ex._queued) == (1, 0)
+        release.set()
+        await asyncio.sleep(0.01)
+        assert ex._admitted == 0
+        return await ex.run(lambda: 3)
+
+    assert asyncio.run(run()) == 3
+
+def test_waiting_run_queues_for_a_slot_instead_of_shedding():
+    release = threading.Event()
+
+    async def run():
+        ex = InferenceExecutor(max_workers=1, max_queue=0, deadline_ms=1)
+        busy = asyncio.ensure_future(ex.run(release.wait))
+        await asyncio.sleep(0.01)
+        with pytest.raises(Overloaded):
+            await ex.run(lambda: 1)
+        waiting = asyncio.ensure_future(ex.run(lambda: 2, wait=True))
+        await asyncio.sleep(0.02)
+        assert not waiting.done()
+        release.set()
+        return await busy, await waiting
+
+    assert asyncio.run(run()) == (True, 2)
@@ -0,0 +1,51 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from taxi_fare.feature_cache import FeatureCache, training_features
+
+MAPPING = {k: k for k in ("pickup_lat", "pickup_lon", "dropoff_lat", "dropoff_lon")}
+
+def _write(path, n, seed=0):
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({
+        "pickup_lat": 59.3 + rng.uniform(0, 0.1, n), "pickup_lon": 18.0 + rng.uniform(0, 0.1, n),
+        "dropoff_lat": 59.3 + rng.uniform(0, 0.1, n), "dropoff_lon": 18.0 + rng.uniform(0, 0.1, n),
+        "pickup_datetime": [f"2025-01-01T{h % 24:02d}:00:00Z" for h in range(n)],
+        "fare_amount": rng.uniform(50, 500, n),
+    }).to_csv(path, index=False)
+
+def _mapped(a):
+    while a is not None and not isinstance(a, np.memmap):
+        a = getattr(a, "base", None)
+    return a is not None
+
+def test_hit_is_memory_mapped_and_key_follows_data_and_config(tmp_path):
+    data = tmp_path / "trips.csv"
+    _write(data, 50)
+    cache = FeatureCache(tmp_path / "cache")
+    X, y, df = training_features(data, MAPPING, "fare_amount", "pickup_datetime", cache=cache)
+    assert df is not None
+    X2, y2, df2 = training_features(data, MAPPING, "fare_amount", "pickup_datetime", cache=cache)
+    assert df2 is None and _mapped(X2["dist"].to_numpy())
+    assert list(X2.columns) == list(X.columns) and all(np.array_equal(X2[c], X[c]) for c in X)
+    assert np.array_equal(y2, y) and y2.name == "fare_amount"
+    # Other dtypes or other content: a new entry
+    assert training_features(data, MAPPING, "fare_amount", "pickup_datetime", {"float32": False}, cache=cache)[2] is not None
+    _write(data, 50, seed=1)
+    assert training_features(data, MAPPING, "fare_amount", "pickup_datetime", cache=cache)[2] is not None
+    assert len(cache.entries()) == 3
+
+def test_eviction_by_size_and_age(tmp_path):
+    X = pd.DataFrame({"dist": np.zeros(1000, np.float32), "hour": np.zeros(1000, np.int8)})
+    y = pd.Series(np.zeros(1000, np.float32), name="fare")
+    cache = FeatureCache(tmp_path, max_bytes=30_000)  # three entries of ~9.5 kB
+    for key in ("a", "b", "c"):
+        cache.put(key, X, y)
+        time.sleep(0.01)
+    cache.get("a")  # most recently used now
+    cache.put("d", X, y)
+    assert sorted(k for k, _, _ in cache.entries()) == ["a", "c", "d"]
+    cache.max_bytes, cache.max_age_seconds = None, 3600
+    os.utime(tmp_path / "a" / "meta.json", (time.time() - 7200,) * 2)
+    assert cache.evict() == 1 and [k for k, _, _ in cache.entries()] == ["c", "d"]
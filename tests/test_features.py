@@ -1,4 +1,5 @@
 from taxi_fare.features import build_features
+import numpy as np
 import pandas as pd
 
 def test_build_features():
@@ -15,3 +16,30 @@ def test_build_features():
     X = build_features(df, mapping, "pickup_datetime")
     assert list(X.columns) == ["dist","hour"]
     assert len(X) == 1
+
+def test_features_row_matches_build_features():
+    from taxi_fare.features import features_row
+    rows = [
+        {"pickup_lat": 59.33, "pickup_lon": 18.06, "dropoff_lat": 59.36,
+         "dropoff_lon": 18.01, "pickup_datetime": ts}
+        for ts in ["2025-01-01T10:00:00Z", "2025-01-02T18:30:00+02:00",
+                   "2025-01-03 23:59:59", "2025-01-04T00:15:00.123-05:00"]
+    ]
+    mapping = {k: k for k in ["pickup_lat", "pickup_lon", "dropoff_lat", "dropoff_lon"]}
+    for r in rows:
+        expected = build_features(pd.DataFrame([r]), mapping, "pickup_datetime").to_numpy()
+        # build_features stores float32, the precision the tree models compare at
+        assert (features_row(r).astype(np.float32) == expected).all()
+
+def test_build_features_reads_only_mapped_columns_and_parses_hours():
+    ts = ["2025-01-01T10:00:00Z", "2025-01-02 18:30:00+02:00", "2025-01-03T23:59:59.5-05:00",
+          "2025-1-4 7:05", "2025-01-05T00:00"]
+    df = pd.DataFrame({"lat1": [59.33] * 5, "lon1": [18.06] * 5, "lat2": [59.36] * 5, "lon2": [18.01] * 5,
+                       "when": ts, "notes": ["x"] * 5}, index=[5, 4, 3, 2, 1])
+    mapping = {"lat1": "pickup_lat", "lon1": "pickup_lon", "lat2": "dropoff_lat", "lon2": "dropoff_lon"}
+    X = build_features(df, mapping, "when")
+    assert X.dtypes.tolist() == [np.float32, np.int8]
+    assert X.index.tolist() == [5, 4, 3, 2, 1]
+    assert X["hour"].tolist() == [10, 18, 23, 7, 0]
+    assert X["hour"].tolist() == [pd.Timestamp(t).hour for t in ts]
+    assert list(df.columns) == ["lat1", "lon1", "lat2", "lon2", "when", "notes"]
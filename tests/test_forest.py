@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from taxi_fare.forest import CompiledForest
+from taxi_fare.predict import load_model_from_path
+
+def _data(n=500):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"dist": rng.uniform(0, 0.2, n), "hour": rng.integers(0, 24, n)})
+    y = 50 + 800 * X["dist"] + 3 * X["hour"] + rng.normal(0, 5, n)
+    return X, y
+
+def test_compiled_forest_matches_sklearn(tmp_path):
+    X, y = _data()
+    rf = RandomForestRegressor(n_estimators=20, random_state=0).fit(X, y)
+    cf = CompiledForest.from_sklearn(rf)
+    assert np.allclose(cf.predict(X), rf.predict(X))
+    assert np.allclose(cf.predict(X.iloc[:1].to_numpy()), rf.predict(X.iloc[:1]))
+
+    path = tmp_path / "model.npz"
+    cf.save(str(path))
+    loaded = load_model_from_path(str(path))
+    assert list(loaded.feature_names_in_) == ["dist", "hour"]
+    assert np.array_equal(loaded.predict(X), cf.predict(X))
+
+def test_compiled_forest_mmap_load(tmp_path):
+    from taxi_fare.model import save_model
+    X, y = _data(100)
+    cf = CompiledForest.from_sklearn(RandomForestRegressor(n_estimators=5, random_state=0).fit(X, y))
+    path = tmp_path / "model_compiled.joblib"
+    save_model(cf, str(path))
+    loaded = load_model_from_path(str(path), mmap=True)
+    assert isinstance(loaded.value, np.memmap)
+    assert np.array_equal(loaded.predict(X), cf.predict(X))
+
+def test_truncated_float32_forest_and_compaction():
+    from taxi_fare.model import compact_model
+    X, y = _data(2000)
+    rf = RandomForestRegressor(n_estimators=20, random_state=0).fit(X[:1500], y[:1500])
+    # Cap above the real depth and float32 storage take exactly the same branches
+    deep = CompiledForest.from_sklearn(rf, max_depth=1000).astype(np.float32)
+    assert deep.threshold.dtype == np.float32
+    assert np.array_equal(deep.apply(X), CompiledForest.from_sklearn(rf).apply(X))
+    first5 = CompiledForest.from_sklearn(rf, n_estimators=5)
+    assert np.allclose(first5.predict(X), np.mean([t.predict(X.to_numpy()) for t in rf.estimators_[:5]], axis=0))
+    assert CompiledForest.from_sklearn(rf, max_depth=3).max_depth == 3
+
+    compact, report = compact_model(rf, X[1500:], y[1500:], mae_tolerance=0.02)
+    assert report["mae_compact"] <= report["mae_full"] * 1.02 + 1e-4
+    assert compact.n_nodes < CompiledForest.from_sklearn(rf).n_nodes
+    # Per-tree values add up to predict; a row cap below the holdout size samples it
+    assert np.allclose(sum(compact.iter_tree_values(X)) / compact.n_estimators, compact.predict(X))
+    small, _ = compact_model(rf, X[1500:], y[1500:], mae_tolerance=0.02, max_rows=200)
+    assert small.n_estimators <= rf.n_estimators
+
+def test_compiled_forest_routes_nan_like_sklearn(tmp_path):
+    X, y = _data(600)
+    X_nan = X.assign(hour=X["hour"].astype(float).mask(X.index % 7 == 0))
+    for train in (X, X_nan):  # NaN unseen in training, and seen
+        rf = RandomForestRegressor(n_estimators=10, random_state=0).fit(train, y)
+        cf = CompiledForest.from_sklearn(rf)
+        for rows in (X_nan.iloc[:20], X_nan):  # all-trees and per-tree traversal
+            assert np.allclose(cf.predict(rows), rf.predict(rows))
+            assert np.allclose(cf.astype(np.float32).predict(rows), rf.predict(rows), atol=1e-3)
+        cf.save(str(tmp_path / "m.npz"))
+        assert np.array_equal(CompiledForest.load(str(tmp_path / "m.npz")).predict(X_nan), cf.predict(X_nan))
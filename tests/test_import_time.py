@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+# Cold import of app.main, in ms (-X importtime cumulative). Generous for slow
+# CI machines; the module check below is what catches pandas/sklearn creeping back.
+IMPORT_BUDGET_MS = float(os.environ.get("TAXI_FARE_IMPORT_BUDGET_MS", 1500))
+LAZY_MODULES = ("pandas", "sklearn", "joblib", "pyarrow", "msgpack", "scipy", "threadpoolctl")
+
+def _cold_import():
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(ROOT), str(ROOT / "src")]))
+    env.pop("TAXI_FARE_PRELOAD_MODEL", None)
+    code = ("import sys, app.main; "
+            f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))")
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                       capture_output=True, text=True, timeout=120, check=True)
+    return r.stdout.strip(), r.stderr
+
+def test_serving_import_skips_heavy_modules_and_fits_budget():
+    loaded, profile = _cold_import()
+    assert loaded == "", f"imported at app.main import time: {loaded}"
+    cumulative_us = {}
+    for line in profile.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cum, name = line.split("|")
+            if cum.strip().isdigit():
+                cumulative_us[name.strip()] = int(cum)
+    assert cumulative_us["app.main"] / 1000 < IMPORT_BUDGET_MS
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+from taxi_fare.data import load_training_data, training_schema
+from taxi_fare.model import train_model_streaming
+from taxi_fare.streaming import RowSample, training_chunks
+
+MAPPING = {k: k for k in ("pickup_lat", "pickup_lon", "dropoff_lat", "dropoff_lon")}
+
+def test_streaming_training_over_chunks(tmp_path):
+    n = 2050
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "pickup_lat": 59.3 + rng.uniform(0, 0.1, n), "pickup_lon": 18.0 + rng.uniform(0, 0.1, n),
+        "dropoff_lat": 59.3 + rng.uniform(0, 0.1, n), "dropoff_lon": 18.0 + rng.uniform(0, 0.1, n),
+        "pickup_datetime": [f"2025-01-01T{h % 24:02d}:00:00Z" for h in range(n)],
+    })
+    df["fare_amount"] = 50 + 2000 * np.hypot(df["dropoff_lat"] - df["pickup_lat"], df["dropoff_lon"] - df["pickup_lon"])
+    df.to_csv(tmp_path / "trips.csv", index=False)
+    frames = load_training_data(str(tmp_path / "trips.csv"), training_schema(MAPPING, "fare_amount", "pickup_datetime"),
+                                chunksize=500)
+    holdout, train = RowSample(300, 0), RowSample(300, 1)
+    chunks = training_chunks(frames, MAPPING, "fare_amount", "pickup_datetime", 0.2, holdout, train)
+    model = train_model_streaming(chunks, trees_per_chunk=3, n_estimators=999, random_state=0, n_jobs=1)
+    # 4 full chunks; the 50-row tail is merged into the last one
+    assert model.n_estimators == len(model.estimators_) == 12
+    assert len(holdout.X) == 300 and holdout.X.index.is_monotonic_increasing
+    assert holdout.seen + train.seen == n
+    assert np.mean(np.abs(model.predict(holdout.X) - holdout.y)) < 10
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from taxi_fare.lookup import FareLookupTable, build_lookup_table
+
+def test_lookup_table_tracks_model(tmp_path):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"dist": rng.uniform(0, 0.2, 400), "hour": rng.integers(0, 24, 400)})
+    y = 50 + 800 * X["dist"] + 3 * X["hour"]
+    rf = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+
+    table = build_lookup_table(rf, X.iloc[:300], X.iloc[300:], n_buckets=128)
+    assert set(table.error_bound) == {"max_abs_err", "mean_abs_err", "p99_abs_err"}
+    assert table.error_bound["mean_abs_err"] < 5
+
+    # Exact on grid points, clamped outside the trained range
+    grid = pd.DataFrame({"dist": [table.dist_min, table.dist_max], "hour": [7, 7]})
+    assert np.allclose(table.predict(grid), rf.predict(grid), atol=1e-3)
+    far = table.predict(np.array([[table.dist_max * 10, 7.0]]))
+    assert np.allclose(far, table.predict(np.array([[table.dist_max, 7.0]])))
+
+    path = tmp_path / "fare_table.npz"
+    table.save(str(path))
+    loaded = FareLookupTable.load(str(path))
+    assert loaded.error_bound == table.error_bound
+    assert np.array_equal(loaded.predict(X), table.predict(X))
+
+def test_lookup_table_falls_back_for_missing_hour():
+    table = FareLookupTable(0.0, 1.0, np.arange(48, dtype=np.float32).reshape(2, 24))
+    y = table.predict(np.array([[0.0, np.nan], [1.0, np.nan], [0.5, 3.0], [np.nan, 3.0]]))
+    assert y[:3].tolist() == [11.5, 35.5, 15.0]  # NaN hour -> median over the hours
+    assert np.isnan(y[3])
+    assert table.predict(np.array([[0.5, np.nan]]))[0] == 23.5
@@ -0,0 +1,43 @@
+import pickle
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from taxi_fare.features import build_features
+from taxi_fare.forest import CompiledForest
+from taxi_fare.poi import PoiIndex, _haversine_km
+from taxi_fare.predict import predict_batch, predict_single
+
+def _points(n=500):
+    rng = np.random.default_rng(1)
+    return rng.uniform(59.2, 59.7, n), rng.uniform(17.8, 18.3, n)
+
+def test_tree_grid_and_brute_force_agree():
+    poi = PoiIndex.from_csv("data/poi.csv", grid_step=0.02)
+    lat, lon = _points()
+    tree = poi.nearest_km(lat, lon)
+    assert poi.categories == ["airport", "hub", "station"]
+    for k, c in enumerate(poi.categories):
+        m = np.array([cat == c for cat in pd.read_csv("data/poi.csv")["category"]])
+        brute = _haversine_km(lat[:, None], lon[:, None], poi.lat[m], poi.lon[m]).min(axis=1)
+        assert np.allclose(tree[:, k], brute, atol=1e-4)
+    single = np.array([poi.nearest_km_one(a, b) for a, b in zip(lat, lon)])
+    assert np.allclose(single, tree, atol=1e-4)
+    # npz-style rebuild (no pickled trees) and pickling drop nothing but the memo grid
+    rebuilt = PoiIndex.from_arrays(poi.arrays())
+    assert np.allclose(rebuilt.nearest_km(lat, lon), tree)
+    assert pickle.loads(pickle.dumps(poi))._cells == {}
+
+def test_poi_features_through_predict(tmp_path):
+    lat, lon = _points(300)
+    df = pd.DataFrame({"pickup_lat": lat, "pickup_lon": lon, "dropoff_lat": lat[::-1], "dropoff_lon": lon[::-1],
+                       "pickup_datetime": "2025-01-01T10:00:00Z"})
+    poi = PoiIndex.from_csv("data/poi.csv")
+    X = build_features(df, {}, "pickup_datetime", poi=poi)
+    assert list(X.columns[2:]) == poi.feature_names
+    model = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, X["pickup_airport_km"] * 10)
+    model.poi_index_ = poi
+    trips = [df.iloc[i].to_dict() for i in range(10)]
+    assert np.allclose(predict_batch(model, trips), [predict_single(model, t) for t in trips])
+    path = tmp_path / "model.npz"
+    CompiledForest.from_sklearn(model).save(str(path))
+    assert CompiledForest.load(str(path)).poi_index_.feature_names == poi.feature_names
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from taxi_fare.predict import predict_single, predict_rows, predict_batch
+
+RAW = {
+    "pickup_lat": 59.33, "pickup_lon": 18.06,
+    "dropoff_lat": 59.36, "dropoff_lon": 18.01,
+    "pickup_datetime": "2025-01-01T10:00:00Z",
+}
+
+def _model():
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.uniform(0, 0.2, 200), rng.integers(0, 24, 200)])
+    y = 50 + 800 * X[:, 0] + X[:, 1]
+    X = pd.DataFrame(X, columns=["dist", "hour"])
+    return RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+
+def test_predict_batch_matches_single():
+    model = _model()
+    payloads = [RAW, {"dist": 0.05, "hour": 3}, dict(RAW, pickup_datetime="2025-01-02T18:30:00Z")]
+    ys = predict_batch(model, payloads)
+    assert ys == [predict_single(model, p) for p in payloads]
+    assert predict_rows(model, payloads) == ys
+    assert predict_batch(model, []) == [] == predict_rows(model, [])
+
+def test_predict_columns_matches_predict_batch():
+    from taxi_fare.predict import predict_columns
+    model = _model()
+    trips = [RAW, dict(RAW, pickup_lat=59.2, pickup_datetime="2025-01-02T18:30:00Z")]
+    columns = {k: np.array([t[k] for t in trips]) for k in RAW}
+    assert predict_columns(model, columns).tolist() == predict_batch(model, trips)
+    feats = {"dist": np.array([0.05, 0.1]), "hour": np.array([3, 4])}
+    assert predict_columns(model, feats).tolist() == predict_batch(
+        model, [{"dist": 0.05, "hour": 3}, {"dist": 0.1, "hour": 4}])
+
+def test_predict_rows_isolates_rows_that_fail_to_featurize():
+    model = _model()
+    good = [RAW, {"dist": 0.05, "hour": 3}]
+    errors = {}
+    ys = predict_rows(model, [good[0], dict(RAW, pickup_datetime="not a time"), good[1]], errors=errors)
+    assert list(errors) == [1] and np.isnan(ys[1])
+    assert [ys[0], ys[2]] == predict_rows(model, good)
+
+def test_ndarray_paths_check_column_order_and_keep_warnings_scoped():
+    import warnings
+    import pytest
+    model = _model()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        predict_single(model, RAW)
+        with pytest.warns(UserWarning, match="valid feature names"):
+            model.predict(np.array([[0.05, 3.0]]))
+    model.feature_names_in_ = np.array(["hour", "dist"], dtype=object)
+    with pytest.raises(ValueError, match="expects features"):
+        predict_single(model, RAW)
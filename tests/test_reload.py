@@ -0,0 +1,27 @@
+import asyncio
+import os
+from app.reload import ModelWatcher, model_version
+
+def test_model_version_tracks_content(tmp_path):
+    p = tmp_path / "model.joblib"
+    p.write_bytes(b"a")
+    v1 = model_version(str(p))
+    p.write_bytes(b"b")
+    assert model_version(str(p)) != v1
+
+def test_watcher_reloads_on_change(tmp_path):
+    p = tmp_path / "model.joblib"
+    p.write_bytes(b"a")
+    calls = []
+
+    async def run():
+        w = ModelWatcher(lambda: str(p), lambda: calls.append(1), poll_seconds=0.01)
+        w.start()
+        await asyncio.sleep(0.05)
+        st = p.stat()
+        os.utime(p, (st.st_atime, st.st_mtime + 5))
+        await asyncio.sleep(0.05)
+        await w.stop()
+
+    asyncio.run(run())
+    assert calls == [1]
@@ -0,0 +1,18 @@
+import asyncio
+from app.streaming import iter_lines, iter_rows, iter_chunks
+
+async def _gen(items):
+    for x in items:
+        yield x
+
+async def _collect(ait):
+    return [x async for x in ait]
+
+def test_rows_split_across_chunks():
+    body = [b"pickup_lat,ho", b"ur\n1.5,3\r\n\n2", b".5,4,extra\n3.5,5"]
+    rows = asyncio.run(_collect(iter_rows(iter_lines(_gen(body)), "csv")))
+    assert rows[0] == (0, {"pickup_lat": "1.5", "hour": "3"}, None)
+    assert rows[1][0] == 1 and rows[1][1] is None and "expected 2 fields" in rows[1][2]
+    assert rows[2] == (2, {"pickup_lat": "3.5", "hour": "5"}, None)
+    chunks = asyncio.run(_collect(iter_chunks(_gen(rows), 2)))
+    assert [len(c) for c in chunks] == [2, 1]
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+from taxi_fare.timeparse import ISO, detect_format, hour_from_iso, hours_from_column
+
+# Wall-clock hour in the written offset, as pd.Timestamp(ts).hour
+CASES = [
+    "2025-01-01T10:00:00Z", "2025-01-01T10:00:00+00:00", "2025-01-02T18:30:00+02:00",
+    "2025-01-03T23:59:59.999999-05:00", "2025-01-04T00:15:00+0530", "2025-01-05 07:00:00",
+    "2025-01-06T13", "2025-03-30T02:30:00+01:00", "2025-1-7 8:05", "2025-01-08T09:00:00.5Z",
+]
+
+def test_hour_from_iso_matches_pandas():
+    for ts in CASES:
+        assert hour_from_iso(ts) == pd.Timestamp(ts).hour, ts
+
+def test_detect_format():
+    assert detect_format("2025-01-01T10:00:00Z") == ISO
+    assert detect_format("2025-01-01 10:00") == ISO
+    assert detect_format("2025/01/31 22:00:00") == "%Y/%m/%d %H:%M:%S"
+    assert detect_format(1735725600) is None
+
+def test_hours_from_column_iso_mixed_offsets_and_fallback_rows():
+    col = pd.Series(CASES * 3)
+    expected = [pd.Timestamp(ts).hour for ts in CASES * 3]
+    hours = hours_from_column(col)
+    assert hours.dtype == np.int8
+    assert hours.tolist() == expected
+
+def test_hours_from_column_other_layouts_and_dtypes():
+    assert hours_from_column(pd.Series(["2025/01/31 22:00:00", "2025/02/01 03:10:00"])).tolist() == [22, 3]
+    naive = pd.Series(pd.to_datetime(["2025-01-01 10:00", "2025-06-01 23:00"]))
+    assert hours_from_column(naive).tolist() == [10, 23]
+    # tz-aware columns give the hour in their own zone
+    assert hours_from_column(naive.dt.tz_localize("UTC").dt.tz_convert("Europe/Stockholm")).tolist() == [11, 1]
+    assert hours_from_column(pd.Series(naive.dt.as_unit("ns").astype("int64"))).tolist() == [10, 23]
+
+def test_hours_from_column_missing_values_become_nan():
+    iso = pd.Series(["2025-01-01T10:00:00Z", None, np.nan, "", "2025-01-01T23:30:00+02:00"], dtype=object)
+    hours = hours_from_column(iso)
+    assert hours.dtype == np.float32
+    assert np.isnan(hours[1:4]).all() and hours[[0, 4]].tolist() == [10, 23]
+    other = hours_from_column(pd.Series([None, "2025/01/31 22:00:00", ""], dtype=object))
+    assert np.isnan(other[[0, 2]]).all() and other[1] == 22
+    dt = hours_from_column(pd.Series(pd.to_datetime(["2025-01-01 05:00", None])))
+    assert np.isnan(dt[1]) and dt[0] == 5
+    assert hours_from_column(pd.Series([pd.NaT, pd.Timestamp("2025-01-01 07:00")], dtype=object))[1] == 7
+    assert hours_from_column(pd.Series(["2025-01-01T10:00:00Z"])).dtype == np.int8
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from taxi_fare.training import fit_model, prepare_training, training_artifacts
+
+MAPPING = {k: k for k in ("pickup_lat", "pickup_lon", "dropoff_lat", "dropoff_lon")}
+
+def _cfg(tmp_path, n=1000, **extra):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "pickup_lat": 59.3 + rng.uniform(0, 0.1, n), "pickup_lon": 18.0 + rng.uniform(0, 0.1, n),
+        "dropoff_lat": 59.3 + rng.uniform(0, 0.1, n), "dropoff_lon": 18.0 + rng.uniform(0, 0.1, n),
+        "pickup_datetime": [f"2025-01-01T{h % 24:02d}:00:00+01:00" for h in range(n)],
+    })
+    df["fare_amount"] = 50 + 2000 * np.hypot(df["dropoff_lat"] - df["pickup_lat"], df["dropoff_lon"] - df["pickup_lon"])
+    df.to_csv(tmp_path / "trips.csv", index=False)
+    return dict({"data_path": "trips.csv", "feature_mapping": MAPPING, "test_size": 0.3, "random_state": 7,
+                 "model_params": {"n_estimators": 4, "random_state": 0, "n_jobs": 1},
+                 "feature_cache": {"dir": "cache"}, "lookup_table": {"enabled": True, "dist_buckets": 16},
+                 "compaction": {"enabled": True, "depth_candidates": [4]}}, **extra)
+
+def test_prepare_fit_and_artifacts(tmp_path):
+    cfg = _cfg(tmp_path)
+    ts = prepare_training(cfg, resolve=lambda p: tmp_path / p)
+    assert not ts.streaming and len(ts.X_test) == 300
+    assert (tmp_path / "cache").is_dir()  # relative cache dir resolved like the data
+    model = fit_model(ts, cfg)
+    out = training_artifacts(model, ts, cfg, tmp_path)
+    assert sorted(p.name for p in out.values()) == ["fare_table.npz", "model_compact.npz"]
+    assert (tmp_path / "model.joblib").exists() and "compact_max_depth" in ts.metrics
+
+def test_streaming_and_zones_follow_the_config(tmp_path):
+    cfg = _cfg(tmp_path, streaming={"enabled": True, "chunksize": 250, "trees_per_chunk": 1, "sample_rows": 1000})
+    ts = prepare_training(cfg, resolve=lambda p: tmp_path / p)
+    model = fit_model(ts, cfg)
+    assert ts.streaming and model.n_estimators == 4
+    # test_size from the config, not a hard-coded 0.2
+    assert abs(len(ts.X_test) / 1000 - 0.3) < 0.06 and ts.metrics["streaming_train_rows"] == len(ts.X_train)
+
+    cfg = _cfg(tmp_path, zones={"enabled": True, "grid": [4, 4], "min_trips": 1, "folds": 3})
+    ts = prepare_training(cfg, resolve=lambda p: tmp_path / p)
+    model = fit_model(ts, cfg)
+    assert list(ts.X_train.columns) == ["dist", "hour", "zone_fare", "zone_dist"]
+    assert model.zone_stats_ is ts.zones and "fare_table.npz" not in str(training_artifacts(model, ts, cfg, tmp_path))
+    # Full-split stats for the test rows, out-of-fold ones for the training rows
+    raw = pd.read_csv(tmp_path / "trips.csv")
+    coords = lambda idx: [raw.loc[idx, c] for c in MAPPING]
+    assert np.array_equal(ts.X_test[["zone_fare", "zone_dist"]].to_numpy(), ts.zones.features(*coords(ts.X_test.index)))
+    assert not np.array_equal(ts.X_train["zone_fare"].to_numpy(), ts.zones.features(*coords(ts.X_train.index))[:, 0])
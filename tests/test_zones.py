@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from taxi_fare.features import build_features, features_row
+from taxi_fare.forest import CompiledForest
+from taxi_fare.predict import predict_batch, predict_single
+from taxi_fare.zones import ZonePairStats, fit_zones, oof_zone_features
+
+MAPPING = {k: k for k in ["pickup_lat", "pickup_lon", "dropoff_lat", "dropoff_lon"]}
+
+def _trips(n=2000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"pickup_lat": rng.uniform(59.25, 59.40, n), "pickup_lon": rng.uniform(17.9, 18.2, n),
+                       "dropoff_lat": rng.uniform(59.25, 59.40, n), "dropoff_lon": rng.uniform(17.9, 18.2, n),
+                       "pickup_datetime": "2025-01-01T10:00:00Z"})
+    fare = 50 + 800 * np.hypot(df.dropoff_lat - df.pickup_lat, df.dropoff_lon - df.pickup_lon)
+    return df, fare
+
+def test_zone_lookup_scalar_matches_vectorized_and_medians():
+    df, fare = _trips()
+    X = build_features(df, MAPPING, "pickup_datetime")
+    zones = fit_zones(df, MAPPING, fare, X["dist"], grid=(4, 4), min_trips=1)
+    lat = np.array([59.0, 59.26, 59.33, 59.39, 60.0])
+    lon = np.array([17.0, 17.95, 18.05, 18.19, 19.0])
+    assert zones.zone_ids(lat, lon).tolist() == [zones.zone_id(a, b) for a, b in zip(lat, lon)]
+    assert zones.zone_ids(lat, lon)[[0, -1]].tolist() == [0, zones.n_zones - 1]  # clamped to the edges
+    zp = zones.zone_ids(df.pickup_lat, df.pickup_lon)
+    zd = zones.zone_ids(df.dropoff_lat, df.dropoff_lon)
+    mask = (zp == zp[0]) & (zd == zd[0])
+    assert np.isclose(zones.fare[zp[0], zd[0]], np.median(fare[mask]))
+    assert zones.count.sum() == len(df)
+
+def test_zone_features_batch_single_and_compiled_roundtrip(tmp_path):
+    df, fare = _trips()
+    base = build_features(df, MAPPING, "pickup_datetime")
+    zones = fit_zones(df, MAPPING, fare, base["dist"], grid=(8, 8), min_trips=3)
+    X = build_features(df, MAPPING, "pickup_datetime", zones)
+    assert list(X.columns) == ["dist", "hour", "zone_fare", "zone_dist"]
+    trip = df.iloc[7].to_dict()
+    assert (features_row(trip, zones=zones).astype(np.float32) == X.iloc[[7]].to_numpy()).all()
+
+    model = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, fare)
+    model.zone_stats_ = zones
+    trips = [df.iloc[i].to_dict() for i in range(5)]
+    assert predict_batch(model, trips) == [predict_single(model, t) for t in trips]
+
+    path = tmp_path / "model.npz"
+    CompiledForest.from_sklearn(model).save(str(path))
+    loaded = CompiledForest.load(str(path))
+    assert isinstance(loaded.zone_stats_, ZonePairStats)
+    assert np.allclose(predict_batch(loaded, trips), predict_batch(model, trips))
+
+def test_oof_zone_features_do_not_leak_the_target():
+    df, _ = _trips()
+    noise = np.random.default_rng(1).uniform(50, 500, len(df))  # fare unrelated to location
+    dist = build_features(df, MAPPING, "pickup_datetime")["dist"]
+    in_sample = fit_zones(df, MAPPING, noise, dist, grid=(8, 8), min_trips=1)
+    leaked = in_sample.features(df.pickup_lat, df.pickup_lon, df.dropoff_lat, df.dropoff_lon)[:, 0]
+    oof = oof_zone_features(df, MAPPING, noise, dist, grid=(8, 8), min_trips=1)
+    assert oof.shape == (len(df), 2) and oof.dtype == np.float32
+    assert np.corrcoef(leaked, noise)[0, 1] > 0.5
+    assert abs(np.corrcoef(oof[:, 0], noise)[0, 1]) < 0.1